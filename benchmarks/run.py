@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+"""Benchmarks the importers on synthetic statement files.
+
+Every measurement runs in a fresh process, so that the peak memory usage (RSS)
+of one run doesn't hide the next one.
+
+The stages are:
+* detect: Format auto detection on the start of the file.
+* decode: Encoding detection and decoding of the file.
+* parse: Reading the CSV rows and parsing their values.
+* build: Creating the model objects.
+* serialize: Writing the transactions as QIF.
+"""
+
+import getopt
+import io
+import json
+import os
+import os.path
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000)
+# The currency to import from statements that need one.
+CURRENCY_BY_IMPORTER = {'interactive-brokers': 'USD'}
+
+
+class Usage(Exception):
+    """Usage: run.py [options]
+
+    Options:
+    [-h|--help]
+    [-f format|--format=format]  Can be repeated. Default: All formats.
+    [-n rows|--rows=rows]        Can be repeated. Default: 1000, 10000, 100000.
+    [-k dir|--keep=dir]          Keeps the generated files in this directory.
+    [-s|--strict]                Validates the transactions while importing.
+    [--json]                     Prints the results as JSON lines.
+    """
+
+    def __init__(self, msg=''):
+        self.msg = msg
+
+    def __str__(self):
+        formats = ', '.join(synthetic.FORMATS)
+        return '\n'.join(
+            (self.__doc__, self.msg, 'Available formats: %s.' % formats)
+        )
+
+
+def measure(format_name: str, filename: str, strict: bool) -> dict:
+    """Imports a file and measures the time of each stage.
+
+    :param format_name: The format of the file, see `synthetic.FORMATS`.
+    :param filename: The file to import.
+    :param strict: Whether to validate the transactions.
+    :return: The number of transactions, the peak RSS in bytes and the time of
+    each stage in seconds.
+    """
+    # Imported here to include the imports in the memory usage.
+    from pybank import convert
+    from pybank import encoding
+    from pybank import importer
+    from pybank import qif
+    from pybank.importer import auto
+
+    importer_name = synthetic.FORMATS[format_name][2]
+    importer_class = convert.IMPORTER_BY_NAME[importer_name]
+    times = {}
+
+    start = time.perf_counter()
+    file_encoding = encoding.detect_encoding(
+        filename, hint=importer_class.encoding, use_cache=False
+    )
+    with open(filename, 'r', encoding=file_encoding, newline='') as file:
+        file = io.StringIO(file.read())
+    times['decode'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prefix = importer.read_prefix(file)
+    detected = [c for c in auto.IMPORTERS if c.signature.matches(prefix)]
+    times['detect'] = time.perf_counter() - start
+
+    bank_importer = importer_class(strict=strict)
+    create = bank_importer._create
+    build_time = 0.0
+
+    def timed_create(model_class, **values):
+        nonlocal build_time
+        start = time.perf_counter()
+        transaction = create(model_class, **values)
+        build_time += time.perf_counter() - start
+        return transaction
+
+    bank_importer._create = timed_create
+    currency = CURRENCY_BY_IMPORTER.get(importer_name)
+    start = time.perf_counter()
+    transactions = bank_importer.import_transactions(file, currency)
+    import_time = time.perf_counter() - start
+    times['parse'] = import_time - build_time
+    times['build'] = build_time
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as output:
+        with qif.Writer(output) as writer:
+            for transaction in transactions:
+                writer.write_transaction(transaction)
+    times['serialize'] = time.perf_counter() - start
+
+    return {
+        'transactions': len(transactions),
+        'detected': detected[0].__name__ if detected else None,
+        'peak_rss': _get_peak_rss(),
+        'times': times,
+    }
+
+
+def _get_peak_rss() -> int:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+def _run(format_name, rows, directory, strict):
+    filename = os.path.join(directory, '%s-%i.csv' % (format_name, rows))
+    if not os.path.exists(filename):
+        synthetic.write(format_name, filename, rows)
+    args = [sys.executable, __file__, '--measure', format_name, filename]
+    if strict:
+        args.append('--strict')
+    output = subprocess.run(args, check=True, capture_output=True, text=True)
+    result = json.loads(output.stdout)
+    result.update(format=format_name, rows=rows)
+    return result
+
+
+def _print_result(result):
+    times = result['times']
+    total = sum(times.values())
+    print(
+        '%-25s %9i %11.0f %9.1f %8.1f %8.1f %8.1f %8.1f %8.1f'
+        % (
+            result['format'],
+            result['rows'],
+            result['rows'] / total,
+            result['peak_rss'] / 1e6,
+            times['detect'] * 1e3,
+            times['decode'] * 1e3,
+            times['parse'] * 1e3,
+            times['build'] * 1e3,
+            times['serialize'] * 1e3,
+        )
+    )
+
+
+def _parse_args(argv):
+    formats = []
+    rows = []
+    keep_dir = None
+    strict = False
+    as_json = False
+
+    options = 'hf:n:k:s'
+    options_long = ['help', 'format=', 'rows=', 'keep=', 'strict', 'json']
+    try:
+        opts, other_args = getopt.getopt(argv[1:], options, options_long)
+    except getopt.error as msg:
+        raise Usage(msg)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            raise Usage()
+        if opt in ('-f', '--format'):
+            if arg not in synthetic.FORMATS:
+                raise Usage('Unknown format: %s.' % arg)
+            formats.append(arg)
+        if opt in ('-n', '--rows'):
+            try:
+                rows.append(int(arg))
+            except ValueError:
+                raise Usage('Invalid number of rows: %s.' % arg)
+        if opt in ('-k', '--keep'):
+            keep_dir = arg
+        if opt in ('-s', '--strict'):
+            strict = True
+        if opt == '--json':
+            as_json = True
+    if other_args:
+        raise Usage('Unexpected arguments: %s.' % ' '.join(other_args))
+
+    return (
+        formats or list(synthetic.FORMATS),
+        rows or list(DEFAULT_ROWS),
+        keep_dir,
+        strict,
+        as_json,
+    )
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+    if argv[1:2] == ['--measure']:
+        result = measure(argv[2], argv[3], strict='--strict' in argv[4:])
+        print(json.dumps(result))
+        return 0
+
+    try:
+        formats, rows, keep_dir, strict, as_json = _parse_args(argv)
+    except Usage as err:
+        print(err, file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory(prefix='pybank-benchmark-') as tmp_dir:
+        directory = keep_dir or tmp_dir
+        os.makedirs(directory, exist_ok=True)
+        if not as_json:
+            print(
+                '%-25s %9s %11s %9s %8s %8s %8s %8s %8s'
+                % (
+                    'format',
+                    'rows',
+                    'rows/s',
+                    'RSS MB',
+                    'detect',
+                    'decode',
+                    'parse',
+                    'build',
+                    'serial.',
+                )
+            )
+        for format_name in formats:
+            for row_count in rows:
+                result = _run(format_name, row_count, directory, strict)
+                if as_json:
+                    print(json.dumps(result))
+                else:
+                    _print_result(result)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
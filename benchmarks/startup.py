@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+
+"""Benchmarks the startup time of the command line tools.
+
+Runs each command several times in a fresh process and reports the fastest and
+the median wall time, and which of the heavy dependencies the command loaded.
+The conversions use a small synthetic statement, so the time is dominated by
+the startup.
+"""
+
+import getopt
+import json
+import os
+import os.path
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic
+
+DEFAULT_REPEAT = 10
+# Dependencies that should only be loaded when needed.
+HEAVY_MODULES = ('charset_normalizer', 'pydantic', 'selenium')
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src')
+
+# Runs a module as __main__ and prints the loaded heavy modules to stderr.
+_RUNNER = """\
+import atexit, runpy, sys
+heavy = %r
+atexit.register(lambda: print(
+    '\\nHEAVY:' + ','.join(m for m in heavy if m in sys.modules),
+    file=sys.stderr))
+sys.argv = sys.argv[1:]
+runpy.run_module(sys.argv[0], run_name='__main__', alter_sys=True)
+"""
+
+
+class Usage(Exception):
+    """Usage: startup.py [options]
+
+    Options:
+    [-h|--help]
+    [-n repeat|--repeat=repeat]  Runs per command. Default: 10.
+    [-l ms|--limit=ms]           Fails if a median time exceeds the limit.
+    [--json]                     Prints the results as JSON lines.
+    """
+
+    def __init__(self, msg=''):
+        self.msg = msg
+
+    def __str__(self):
+        return '\n'.join((self.__doc__, self.msg))
+
+
+def _get_commands(directory):
+    statement = os.path.join(directory, 'postfinance.csv')
+    synthetic.write('postfinance-checking', statement, rows=10)
+    return {
+        'python': None,
+        'convert --help': ['pybank.convert', '--help'],
+        'fetch --help': ['pybank.fetch', '--help'],
+        'convert file': [
+            'pybank.convert',
+            '-i',
+            'postfinance-checking',
+            statement,
+        ],
+        'convert file auto': ['pybank.convert', '-i', 'auto', statement],
+    }
+
+
+def _run_once(module_args, env):
+    if module_args is None:
+        args = [sys.executable, '-c', 'pass']
+    else:
+        runner = _RUNNER % (HEAVY_MODULES,)
+        args = [sys.executable, '-c', runner] + module_args
+    start = time.perf_counter()
+    output = subprocess.run(
+        args, env=env, capture_output=True, text=True, check=False
+    )
+    wall = time.perf_counter() - start
+    heavy = []
+    for line in output.stderr.splitlines():
+        if line.startswith('HEAVY:'):
+            heavy = [m for m in line[len('HEAVY:') :].split(',') if m]
+    return wall, heavy
+
+
+def measure(name, module_args, repeat, env):
+    """Runs a command repeatedly and measures its wall time.
+
+    :param name: The name of the command.
+    :param module_args: The module and its arguments, or None for a bare
+    Python interpreter.
+    :param repeat: The number of runs.
+    :param env: The environment of the processes.
+    :return: The fastest and median time in seconds and the loaded heavy
+    modules.
+    """
+    # Warm up the file system caches and pybank's encoding cache.
+    _run_once(module_args, env)
+    times = []
+    for _ in range(repeat):
+        wall, heavy = _run_once(module_args, env)
+        times.append(wall)
+    return {
+        'command': name,
+        'min': min(times),
+        'median': statistics.median(times),
+        'heavy_modules': heavy,
+    }
+
+
+def _parse_args(argv):
+    repeat = DEFAULT_REPEAT
+    limit = None
+    as_json = False
+
+    options = 'hn:l:'
+    options_long = ['help', 'repeat=', 'limit=', 'json']
+    try:
+        opts, other_args = getopt.getopt(argv[1:], options, options_long)
+    except getopt.error as msg:
+        raise Usage(msg)
+    for opt, arg in opts:
+        if opt in ('-h', '--help'):
+            raise Usage()
+        if opt in ('-n', '--repeat'):
+            try:
+                repeat = int(arg)
+            except ValueError:
+                raise Usage('Invalid number of runs: %s.' % arg)
+        if opt in ('-l', '--limit'):
+            try:
+                limit = float(arg) / 1000
+            except ValueError:
+                raise Usage('Invalid limit: %s.' % arg)
+        if opt == '--json':
+            as_json = True
+    if other_args:
+        raise Usage('Unexpected arguments: %s.' % ' '.join(other_args))
+    return repeat, limit, as_json
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+    try:
+        repeat, limit, as_json = _parse_args(argv)
+    except Usage as err:
+        print(err, file=sys.stderr)
+        return 2
+
+    exceeded = []
+    with tempfile.TemporaryDirectory(prefix='pybank-startup-') as directory:
+        env = dict(
+            os.environ,
+            XDG_CACHE_HOME=os.path.join(directory, 'cache'),
+            PYTHONPATH=os.pathsep.join(
+                filter(None, (SRC_DIR, os.environ.get('PYTHONPATH')))
+            ),
+        )
+        if not as_json:
+            print(
+                '%-20s %9s %9s  %s'
+                % ('command', 'min ms', 'median ms', 'heavy modules')
+            )
+        for name, module_args in _get_commands(directory).items():
+            result = measure(name, module_args, repeat, env)
+            if as_json:
+                print(json.dumps(result))
+            else:
+                print(
+                    '%-20s %9.1f %9.1f  %s'
+                    % (
+                        name,
+                        result['min'] * 1e3,
+                        result['median'] * 1e3,
+                        ', '.join(result['heavy_modules']) or '-',
+                    )
+                )
+            if limit is not None and result['median'] > limit:
+                exceeded.append(name)
+
+    if exceeded:
+        print('Over the limit: %s.' % ', '.join(exceeded), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
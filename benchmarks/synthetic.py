@@ -0,0 +1,536 @@
+"""Generates synthetic statement files in all supported formats.
+
+The files mimic the real exports: metadata headers, column layouts, number and
+date formats, text encodings and a realistic mix of payees, memos and amounts.
+The content is random, but deterministic for a given seed.
+
+Usage: synthetic.py format rows outfile
+"""
+
+import datetime
+import random
+import sys
+from typing import Callable, Iterator
+
+START_DATE = datetime.datetime(2015, 1, 1)
+
+PAYEES = (
+    'SUPERMARKT GMBH',
+    'Deutsche Bahn',
+    'Stadtwerke München',
+    'AMAZON EU S.A R.L.',
+    'Bäckerei Müller',
+    'Migros',
+    'Coop Pronto',
+    'SBB CFF FFS',
+    'Swisscom (Schweiz) AG',
+    'Spotify AB',
+)
+PAYERS = ('Arbeitgeber AG', 'Max Muster', 'Erika Mustermann', 'Finanzamt')
+MEMOS = (
+    'Einkauf',
+    'Miete Januar',
+    'Gehalt',
+    'Lastschrift  Strom',
+    'KARTENZAHLUNG',
+    'Dauerauftrag Sparplan',
+    'Rückerstattung',
+    'Überweisung',
+)
+SYMBOLS = ('AAPL', 'MSFT', 'VT', 'VTI', 'BND', 'NESN', 'SPY')
+CURRENCIES = ('USD', 'USD', 'USD', 'EUR', 'CHF')
+
+
+class _Random(random.Random):
+    """A random generator with helpers for statement data."""
+
+    def dates(self, rows: int) -> Iterator[datetime.datetime]:
+        """Yields ascending dates, a few transactions per day."""
+        date = START_DATE
+        for _ in range(rows):
+            if self.random() < 0.3:
+                date += datetime.timedelta(days=1)
+            yield date + datetime.timedelta(
+                hours=self.randrange(8, 20), minutes=self.randrange(60)
+            )
+
+    def amount(self) -> float:
+        if self.random() < 0.1:
+            return round(self.uniform(100, 5000), 2)
+        return -round(self.lognormvariate(3, 1.2), 2)
+
+
+def _format_de(amount: float) -> str:
+    """Formats an amount like 1.234,56."""
+    return (
+        '{:,.2f}'.format(amount)
+        .replace(',', '_')
+        .replace('.', ',')
+        .replace('_', '.')
+    )
+
+
+def _quote(*cells: str, delimiter: str = ';') -> str:
+    return delimiter.join('"%s"' % c.replace('"', '""') for c in cells) + '\n'
+
+
+def _dkb_checking_old(rng: _Random, rows: int) -> Iterator[str]:
+    yield _quote('Kontonummer:', 'DE64120300001234567890 / Girokonto')
+    yield '\n'
+    yield _quote('Von:', '01.01.2015')
+    yield _quote('Bis:', '31.12.2024')
+    yield _quote('Kontostand vom 31.12.2024:', '1.234,56 EUR')
+    yield '\n'
+    yield _quote(
+        'Buchungstag',
+        'Wertstellung',
+        'Buchungstext',
+        'Auftraggeber / Begünstigter',
+        'Verwendungszweck',
+        'Kontonummer',
+        'BLZ',
+        'Betrag (EUR)',
+        'Gläubiger-ID',
+        'Mandatsreferenz',
+        'Kundenreferenz',
+    )
+    for date in rng.dates(rows):
+        amount = rng.amount()
+        payer_payee = rng.choice(PAYERS if amount > 0 else PAYEES)
+        yield _quote(
+            date.strftime('%d.%m.%Y'),
+            date.strftime('%d.%m.%Y'),
+            'Lastschrift' if amount < 0 else 'Gutschrift',
+            payer_payee,
+            rng.choice(MEMOS),
+            'DE%020d' % rng.randrange(10**20),
+            'BYLADEM1001',
+            _format_de(amount),
+            '',
+            '',
+            '',
+        )
+
+
+def _dkb_checking_new(rng: _Random, rows: int) -> Iterator[str]:
+    yield _quote('Girokonto', 'DE64120300001234567890')
+    yield _quote('')
+    yield _quote('Kontostand vom 31.12.2024:', '1.234,56 €')
+    yield _quote('')
+    yield _quote(
+        'Buchungsdatum',
+        'Wertstellung',
+        'Status',
+        'Zahlungspflichtige*r',
+        'Zahlungsempfänger*in',
+        'Verwendungszweck',
+        'Umsatztyp',
+        'IBAN',
+        'Betrag (€)',
+        'Gläubiger-ID',
+        'Mandatsreferenz',
+        'Kundenreferenz',
+    )
+    for date in rng.dates(rows):
+        amount = rng.amount()
+        payer, payee = 'Max Muster', rng.choice(PAYEES)
+        if amount > 0:
+            payer, payee = rng.choice(PAYERS), 'Max Muster'
+        yield _quote(
+            date.strftime('%d.%m.%y'),
+            date.strftime('%d.%m.%y'),
+            'Gebucht',
+            payer,
+            payee,
+            rng.choice(MEMOS),
+            'Ausgang' if amount < 0 else 'Eingang',
+            'DE%020d' % rng.randrange(10**20),
+            _format_de(amount),
+            '',
+            '',
+            '',
+        )
+
+
+def _dkb_credit_card_old(rng: _Random, rows: int) -> Iterator[str]:
+    yield _quote('Kreditkarte:', '4748********1234 Kreditkarte')
+    yield '\n'
+    yield _quote('Von:', '01.01.2015')
+    yield _quote('Bis:', '31.12.2024')
+    yield _quote('Saldo:', '-123,45 EUR')
+    yield _quote('Datum:', '31.12.2024')
+    yield '\n'
+    yield _quote(
+        'Umsatz abgerechnet und nicht im Saldo enthalten',
+        'Wertstellung',
+        'Belegdatum',
+        'Beschreibung',
+        'Betrag (EUR)',
+        'Ursprünglicher Betrag',
+    )
+    for date in rng.dates(rows):
+        amount = rng.amount()
+        foreign = rng.random() < 0.2
+        yield _quote(
+            'Ja',
+            date.strftime('%d.%m.%Y'),
+            date.strftime('%d.%m.%Y'),
+            rng.choice(PAYEES),
+            _format_de(amount),
+            _format_de(amount * 1.1) + ' USD' if foreign else '',
+        )
+
+
+def _dkb_credit_card_new(rng: _Random, rows: int) -> Iterator[str]:
+    yield _quote('Kreditkarte:', '4748 •••• •••• 1234')
+    yield _quote('')
+    yield _quote('Saldo vom 31.12.2024:', '-123,45 €')
+    yield _quote('')
+    yield _quote(
+        'Belegdatum',
+        'Wertstellung',
+        'Status',
+        'Beschreibung',
+        'Umsatztyp',
+        'Betrag (€)',
+        'Fremdwährungsbetrag',
+    )
+    for date in rng.dates(rows):
+        amount = rng.amount()
+        yield _quote(
+            date.strftime('%d.%m.%y'),
+            date.strftime('%d.%m.%y'),
+            'Gebucht',
+            rng.choice(PAYEES),
+            'Im Geschäft',
+            _format_de(amount),
+            '',
+        )
+
+
+def _postfinance_checking_old(rng: _Random, rows: int) -> Iterator[str]:
+    yield 'Buchungsart:;Alle Buchungen\n'
+    yield 'Konto:;CH1209000000123456789\n'
+    yield 'Währung:;CHF\n'
+    yield '\n'
+    yield (
+        'Buchungsdatum;Avisierungstext;Gutschrift in CHF;Lastschrift in CHF;'
+        'Valuta;Saldo in CHF\n'
+    )
+    for date in rng.dates(rows):
+        amount = rng.amount()
+        credit, debit = (
+            ('%.2f' % amount, '') if amount > 0 else ('', '%.2f' % -amount)
+        )
+        yield '%s;"%s %s";%s;%s;%s;\n' % (
+            date.strftime('%d.%m.%Y'),
+            rng.choice(MEMOS).upper(),
+            rng.choice(PAYEES),
+            credit,
+            debit,
+            date.strftime('%d.%m.%Y'),
+        )
+
+
+def _postfinance_checking_new(rng: _Random, rows: int) -> Iterator[str]:
+    yield 'Datum von:;="2015-01-01"\n'
+    yield 'Datum bis:;="2024-12-31"\n'
+    yield 'Kategorie:;="Alle"\n'
+    yield 'Konto:;="CH1209000000123456789"\n'
+    yield 'Währung:;="CHF"\n'
+    yield '\n'
+    yield (
+        'Datum;Bewegungstyp;Avisierungstext;Gutschrift in CHF;'
+        'Lastschrift in CHF;Label;Kategorie\n'
+    )
+    for date in rng.dates(rows):
+        amount = rng.amount()
+        credit, debit = (
+            ('%.2f' % amount, '') if amount > 0 else ('', '%.2f' % amount)
+        )
+        yield '%s;Zahlung;"%s %s";%s;%s;;%s\n' % (
+            date.strftime('%Y-%m-%d'),
+            rng.choice(MEMOS),
+            rng.choice(PAYEES),
+            credit,
+            debit,
+            rng.choice(('Lebensmittel', 'Mobilität', 'Wohnen', '')),
+        )
+
+
+def _postfinance_credit_card(rng: _Random, rows: int) -> Iterator[str]:
+    yield 'Kartenkonto:;0000 1234 5678\n'
+    yield 'Karte:;XXXX XXXX XXXX 1234 PostFinance Visa Classic Card\n'
+    yield '\n'
+    yield 'Datum;Buchungsdetails;Gutschrift in CHF;Lastschrift in CHF\n'
+    for date in rng.dates(rows):
+        amount = rng.amount()
+        credit, debit = (
+            ('%.2f' % amount, '') if amount > 0 else ('', '%.2f' % -amount)
+        )
+        yield '%s;%s;%s;%s\n' % (
+            date.strftime('%Y-%m-%d'),
+            rng.choice(PAYEES),
+            credit,
+            debit,
+        )
+
+
+def _ib(rng: _Random, rows: int) -> Iterator[str]:
+    yield 'Statement,Header,Field Name,Field Value\n'
+    yield 'Statement,Data,BrokerName,Interactive Brokers LLC\n'
+    yield 'Statement,Data,Title,Activity Statement\n'
+    yield 'Statement,Data,Period,"January 1, 2015 - December 31, 2024"\n'
+    yield 'Account Information,Header,Field Name,Field Value\n'
+    yield 'Account Information,Data,Account,U1234567\n'
+    yield 'Account Information,Data,Base Currency,CHF\n'
+
+    # Sections are written one after another, like in real statements.
+    sections: dict[str, list[str]] = {
+        'Deposits & Withdrawals': [
+            'Deposits & Withdrawals,Header,Currency,Settle Date,Description,'
+            'Amount\n'
+        ],
+        'Trades': [
+            'Trades,Header,DataDiscriminator,Asset Category,Currency,Symbol,'
+            'Date/Time,Quantity,T. Price,C. Price,Proceeds,Comm/Fee,Basis,'
+            'Realized P/L,MTM P/L,Code\n'
+        ],
+        'Dividends': ['Dividends,Header,Currency,Date,Description,Amount\n'],
+        'Withholding Tax': [
+            'Withholding Tax,Header,Currency,Date,Description,Amount,Code\n'
+        ],
+        'Interest': ['Interest,Header,Currency,Date,Description,Amount\n'],
+        'Fees': ['Fees,Header,Subtitle,Currency,Date,Description,Amount\n'],
+    }
+    for date in rng.dates(rows):
+        currency = rng.choice(CURRENCIES)
+        day = date.strftime('%Y-%m-%d')
+        symbol = rng.choice(SYMBOLS)
+        kind = rng.random()
+        if kind < 0.6:
+            quantity = rng.randrange(1, 200) * rng.choice((1, -1))
+            price = round(rng.uniform(10, 500), 2)
+            proceeds = -quantity * price
+            sections['Trades'].append(
+                'Trades,Data,Order,Stocks,%s,%s,"%s",%i,%.2f,%.2f,%.2f,%.2f,'
+                '0,0,0,O\n'
+                % (
+                    currency,
+                    symbol,
+                    date.strftime('%Y-%m-%d, %H:%M:%S'),
+                    quantity,
+                    price,
+                    price,
+                    proceeds,
+                    -1,
+                )
+            )
+        elif kind < 0.62:
+            quantity = rng.randrange(1000, 20000) * rng.choice((1, -1))
+            sections['Trades'].append(
+                'Trades,Data,Order,Forex,USD,EUR.USD,"%s",%i,1.1,1.1,%.2f,'
+                '-2,0,0,0,\n'
+                % (
+                    date.strftime('%Y-%m-%d, %H:%M:%S'),
+                    quantity,
+                    -quantity * 1.1,
+                )
+            )
+        elif kind < 0.75:
+            amount = round(rng.uniform(1, 300), 2)
+            description = '%s(US0000000000) Cash Dividend USD 0.5 per Share' % (
+                symbol
+            )
+            sections['Dividends'].append(
+                'Dividends,Data,%s,%s,%s,%.2f\n'
+                % (currency, day, description, amount)
+            )
+            sections['Withholding Tax'].append(
+                'Withholding Tax,Data,%s,%s,%s - US Tax,%.2f,\n'
+                % (currency, day, description, -amount * 0.15)
+            )
+        elif kind < 0.85:
+            sections['Interest'].append(
+                'Interest,Data,%s,%s,%s Credit Interest for Jan-2024,%.2f\n'
+                % (currency, day, currency, rng.uniform(-5, 20))
+            )
+        elif kind < 0.9:
+            sections['Fees'].append(
+                'Fees,Data,Other Fees,%s,%s,Market data fee,%.2f\n'
+                % (currency, day, -rng.uniform(1, 10))
+            )
+        else:
+            sections['Deposits & Withdrawals'].append(
+                'Deposits & Withdrawals,Data,%s,%s,Electronic Fund Transfer,'
+                '%.2f\n' % (currency, day, rng.uniform(-1000, 5000))
+            )
+    for section, lines in sections.items():
+        yield from lines
+        if section in ('Deposits & Withdrawals', 'Dividends', 'Interest'):
+            yield '%s,Data,Total,,,0\n' % section
+
+
+def _wise(rng: _Random, rows: int) -> Iterator[str]:
+    yield (
+        '"TransferWise ID",Date,Amount,Currency,Description,'
+        '"Payment Reference","Running Balance","Exchange From",'
+        '"Exchange To","Exchange Rate","Payer Name","Payee Name",'
+        '"Payee Account Number",Merchant,"Total fees"\n'
+    )
+    balance = 1000.0
+    for i, date in enumerate(rng.dates(rows)):
+        amount = rng.amount()
+        balance += amount
+        exchange = rng.random() < 0.1
+        merchant = rng.choice(PAYEES) if amount < 0 else ''
+        yield (
+            '%s,%s,%.2f,EUR,"%s",%s,%.2f,%s,%s,%s,"%s","%s",%s,"%s",%.2f\n'
+            % (
+                'CARD-%i' % (100000000 + i),
+                date.strftime('%d-%m-%Y'),
+                amount,
+                'Card transaction of %.2f EUR issued by %s'
+                % (-amount, merchant)
+                if merchant
+                else 'Received money from Max Muster',
+                '',
+                balance,
+                'USD' if exchange else '',
+                'EUR' if exchange else '',
+                '0.91' if exchange else '',
+                'Max Muster' if amount > 0 else '',
+                merchant,
+                '',
+                merchant,
+                0.5 if exchange else 0,
+            )
+        )
+
+
+def _revolut(rng: _Random, rows: int) -> Iterator[str]:
+    yield (
+        'Type,Product,Started Date,Completed Date,Description,Amount,Fee,'
+        'Currency,State,Balance\n'
+    )
+    balance = 1000.0
+    for date in rng.dates(rows):
+        amount = rng.amount()
+        balance += amount
+        completed = date + datetime.timedelta(hours=rng.randrange(48))
+        yield '%s,Current,%s,%s,%s,%.2f,%.2f,%s,%s,%.2f\n' % (
+            'CARD_PAYMENT' if amount < 0 else 'TOPUP',
+            date.strftime('%Y-%m-%d %H:%M:%S'),
+            completed.strftime('%Y-%m-%d %H:%M:%S'),
+            rng.choice(PAYEES),
+            amount,
+            0.5 if rng.random() < 0.05 else 0,
+            rng.choice(('EUR', 'EUR', 'CHF', 'USD')),
+            'COMPLETED' if rng.random() < 0.98 else 'REVERTED',
+            balance,
+        )
+
+
+def _schwab(rng: _Random, rows: int) -> Iterator[str]:
+    yield (
+        '"Transactions  for account XXXX-1234 as of 12/31/2024 23:59:59 ET"\n'
+    )
+    yield (
+        '"Date","Action","Symbol","Description","Quantity","Price",'
+        '"Fees & Comm","Amount",\n'
+    )
+    total = 0.0
+    for date in rng.dates(rows):
+        kind = rng.random()
+        if kind < 0.5:
+            action, description = 'Credit Interest', 'SCHWAB1 INT 12/30-01/30'
+            amount = round(rng.uniform(0.01, 20), 2)
+        elif kind < 0.7:
+            action, description = 'Service Fee', 'FOREIGN TAX  PAID'
+            amount = -round(rng.uniform(1, 30), 2)
+        elif kind < 0.9:
+            action, description = 'Wire Funds', 'WIRED FUNDS DISBURSED'
+            amount = -round(rng.uniform(100, 10000), 2)
+        else:
+            action, description = 'Journal', 'JOURNAL TO XXXX-5678'
+            amount = round(rng.uniform(100, 10000), 2)
+        total += amount
+        yield '"%s","%s","","%s","","","","%s",\n' % (
+            date.strftime('%m/%d/%Y'),
+            action,
+            description,
+            _format_dollars(amount),
+        )
+    yield '"Transactions Total","","","","","","","%s",\n' % (
+        _format_dollars(total)
+    )
+
+
+def _format_dollars(amount: float) -> str:
+    return ('-$' if amount < 0 else '$') + '{:,.2f}'.format(abs(amount))
+
+
+# The generators by format name, with the encoding of their files and the
+# name of their importer in `pybank.convert.IMPORTER_BY_NAME`.
+FORMATS: dict[str, tuple[Callable[[_Random, int], Iterator[str]], str, str]] = {
+    'dkb-checking-old': (_dkb_checking_old, 'iso-8859-1', 'dkb-checking'),
+    'dkb-checking': (_dkb_checking_new, 'utf-8-sig', 'dkb-checking'),
+    'dkb-credit-card-old': (
+        _dkb_credit_card_old,
+        'iso-8859-1',
+        'dkb-credit-card',
+    ),
+    'dkb-credit-card': (_dkb_credit_card_new, 'utf-8-sig', 'dkb-credit-card'),
+    'postfinance-checking-old': (
+        _postfinance_checking_old,
+        'windows-1252',
+        'postfinance-checking',
+    ),
+    'postfinance-checking': (
+        _postfinance_checking_new,
+        'windows-1252',
+        'postfinance-checking',
+    ),
+    'postfinance-credit-card': (
+        _postfinance_credit_card,
+        'windows-1252',
+        'postfinance-credit-card',
+    ),
+    'interactive-brokers': (_ib, 'utf-8', 'interactive-brokers'),
+    'wise': (_wise, 'utf-8', 'wise'),
+    'revolut': (_revolut, 'utf-8', 'revolut'),
+    'schwab-brokerage': (_schwab, 'utf-8', 'schwab-brokerage'),
+}
+
+
+def generate(format_name: str, rows: int, seed: int = 0) -> Iterator[str]:
+    """Generates the lines of a synthetic statement.
+
+    :param format_name: The format, see `FORMATS`.
+    :param rows: The number of transaction rows.
+    :param seed: The random seed.
+    :return: An iterator over the lines.
+    """
+    generator = FORMATS[format_name][0]
+    return generator(_Random(seed), rows)
+
+
+def write(format_name: str, filename: str, rows: int, seed: int = 0) -> None:
+    """Writes a synthetic statement file in the encoding of the format.
+
+    :param format_name: The format, see `FORMATS`.
+    :param filename: The file to write.
+    :param rows: The number of transaction rows.
+    :param seed: The random seed.
+    """
+    file_encoding = FORMATS[format_name][1]
+    with open(filename, 'w', encoding=file_encoding, newline='') as file:
+        file.writelines(generate(format_name, rows, seed))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 4 or sys.argv[1] not in FORMATS:
+        print(__doc__, file=sys.stderr)
+        print('Formats: %s.' % ', '.join(FORMATS), file=sys.stderr)
+        sys.exit(2)
+    write(sys.argv[1], sys.argv[3], int(sys.argv[2]))
@@ -0,0 +1,426 @@
+"""Columnar storage for many transactions.
+
+A `TransactionBatch` stores transactions column by column in compact arrays
+instead of as one model object per transaction:
+
+* The date as seconds since 0001-01-01, i.e. the date ordinal times 86400 plus
+  the seconds of the day.
+* The amount as a fixed-point integer, see `AMOUNT_SCALE`.
+* The type of the transaction as an index into `TYPES`.
+* Currencies, memos, payees etc. as ids into a string table shared by all
+  batches derived from the same batch.
+
+Filtering, sorting, grouping and summing work on the arrays. Model objects are
+only created when a transaction is accessed.
+
+`to_bytes` and `from_bytes` store a batch in a compact binary form, which is
+little more than the arrays themselves.
+"""
+
+import array
+import bisect
+import datetime
+import math
+import struct
+import sys
+from typing import Iterable, Iterator
+
+from . import model
+
+
+# Amounts are stored in units of 1/AMOUNT_SCALE, matching the QIF precision.
+AMOUNT_SCALE = 10_000
+SECONDS_PER_DAY = 24 * 60 * 60
+
+# The supported transaction types. The index is the type code.
+TYPES = (
+    model.Transaction,
+    model.Payment,
+    model.InvestmentSecurityPurchase,
+    model.InvestmentSecuritySale,
+    model.InvestmentDividend,
+    model.InvestmentInterestExpense,
+    model.InvestmentInterestIncome,
+    model.InvestmentMiscExpense,
+    model.InvestmentMiscIncome,
+)
+
+# Fields stored as string ids, -1 meaning None.
+STRING_FIELDS = ('memo', 'category', 'payer', 'payee', 'symbol')
+# Fields stored as floats, NaN meaning not set.
+FLOAT_FIELDS = ('quantity', 'price', 'commissions')
+
+_TYPE_CODES = {cls: code for code, cls in enumerate(TYPES)}
+_FIELDS_BY_TYPE = [
+    (
+        tuple(f for f in STRING_FIELDS if f in cls.model_fields),
+        tuple(f for f in FLOAT_FIELDS if f in cls.model_fields),
+    )
+    for cls in TYPES
+]
+_NO_STRING = -1
+
+# Identifies the binary form, including its version.
+_MAGIC = b'PYBANKB1'
+# Type code, item size and length of an array.
+_ARRAY_HEADER = struct.Struct('<cBQ')
+
+
+class _StringTable:
+    """Interns strings, mapping each distinct string to an integer id."""
+
+    __slots__ = ('ids', 'strings')
+
+    def __init__(self):
+        self.ids: dict[str, int] = {}
+        self.strings: list[str] = []
+
+    def get_id(self, string: str | None) -> int:
+        if string is None:
+            return _NO_STRING
+        string_id = self.ids.get(string)
+        if string_id is None:
+            string_id = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+
+    def get_string(self, string_id: int) -> str | None:
+        if string_id == _NO_STRING:
+            return None
+        return self.strings[string_id]
+
+
+class TransactionBatch:
+    """Many transactions, stored column by column.
+
+    Create a batch with `from_transactions` or `append`. `append` changes the
+    batch in place, all other operations return new batches and leave the
+    original unchanged.
+
+    Dates are stored with a precision of seconds.
+    """
+
+    def __init__(self, strings: _StringTable | None = None):
+        """Create a new, empty batch.
+
+        :param strings: The string table to share with another batch.
+        """
+        self._strings = strings if strings is not None else _StringTable()
+        self._types = array.array('B')
+        self._times = array.array('q')
+        self._amounts = array.array('q')
+        self._currencies = array.array('l')
+        self._string_columns = {f: array.array('l') for f in STRING_FIELDS}
+        self._float_columns = {f: array.array('d') for f in FLOAT_FIELDS}
+        # Whether the transactions are sorted by date, for range queries.
+        self._sorted = True
+
+    @classmethod
+    def from_transactions(
+        cls,
+        transactions: Iterable[model.Transaction],
+        currency: str | None = None,
+    ) -> 'TransactionBatch':
+        """Creates a batch from model transactions.
+
+        :param transactions: The transactions. Can be a lazy iterable.
+        :param currency: The currency of the transactions, if known.
+        :return: The batch.
+        """
+        batch = cls()
+        for transaction in transactions:
+            batch.append(transaction, currency)
+        return batch
+
+    def append(
+        self, transaction: model.Transaction, currency: str | None = None
+    ) -> None:
+        """Appends a transaction to the batch.
+
+        :param transaction: The transaction.
+        :param currency: The currency of the transaction, if known.
+        :raises ValueError: For unsupported transaction types.
+        """
+        try:
+            type_code = _TYPE_CODES[type(transaction)]
+        except KeyError:
+            raise ValueError(
+                'Unsupported transaction type: %s.' % type(transaction).__name__
+            )
+        time = _to_time(transaction.date)
+        if self._times and time < self._times[-1]:
+            self._sorted = False
+        self._types.append(type_code)
+        self._times.append(time)
+        self._amounts.append(round(transaction.amount * AMOUNT_SCALE))
+        self._currencies.append(self._strings.get_id(currency))
+        # Only look up the fields of the type. Missing attributes are slow on
+        # pydantic models.
+        string_fields, float_fields = _FIELDS_BY_TYPE[type_code]
+        get_id = self._strings.get_id
+        for field, column in self._string_columns.items():
+            if field in string_fields:
+                column.append(get_id(getattr(transaction, field)))
+            else:
+                column.append(_NO_STRING)
+        for field, column in self._float_columns.items():
+            value = (
+                getattr(transaction, field) if field in float_fields else None
+            )
+            column.append(math.nan if value is None else value)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __getitem__(self, index: int) -> model.Transaction:
+        """Converts a transaction of the batch into a model object.
+
+        :param index: The index of the transaction.
+        :return: The transaction.
+        """
+        type_code = self._types[index]
+        string_fields, float_fields = _FIELDS_BY_TYPE[type_code]
+        values = {
+            'date': _from_time(self._times[index]),
+            'amount': self._amounts[index] / AMOUNT_SCALE,
+        }
+        get_string = self._strings.get_string
+        for field in string_fields:
+            values[field] = get_string(self._string_columns[field][index])
+        for field in float_fields:
+            value = self._float_columns[field][index]
+            if not math.isnan(value):
+                values[field] = value
+        return TYPES[type_code].model_construct(**values)
+
+    def __iter__(self) -> Iterator[model.Transaction]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def currencies(self) -> list[str | None]:
+        """The distinct currencies, in the order they first occur."""
+        get_string = self._strings.get_string
+        return [get_string(i) for i in dict.fromkeys(self._currencies)]
+
+    def get_currency(self, index: int) -> str | None:
+        """Returns the currency of a transaction.
+
+        :param index: The index of the transaction.
+        :return: The currency, if known.
+        """
+        return self._strings.get_string(self._currencies[index])
+
+    def filter(
+        self,
+        currency: str | None = None,
+        start: datetime.datetime | None = None,
+        end: datetime.datetime | None = None,
+    ) -> 'TransactionBatch':
+        """Selects the transactions of a currency and a date range.
+
+        :param currency: Only select transactions in this currency.
+        :param start: Only select transactions on or after this date.
+        :param end: Only select transactions before this date.
+        :return: The selected transactions.
+        """
+        first, last = 0, len(self)
+        start_time = None if start is None else _to_time(start)
+        end_time = None if end is None else _to_time(end)
+        if self._sorted:
+            # Range query on the sorted dates.
+            if start_time is not None:
+                first = bisect.bisect_left(self._times, start_time)
+            if end_time is not None:
+                last = bisect.bisect_left(self._times, end_time)
+            start_time = end_time = None
+        indices = range(first, last)
+        if start_time is not None or end_time is not None:
+            min_time = start_time if start_time is not None else -math.inf
+            max_time = end_time if end_time is not None else math.inf
+            times = self._times
+            indices = [i for i in indices if min_time <= times[i] < max_time]
+        if currency is not None:
+            currency_id = self._strings.ids.get(currency)
+            currencies = self._currencies
+            indices = [i for i in indices if currencies[i] == currency_id]
+        return self._take(indices)
+
+    def sort(self) -> 'TransactionBatch':
+        """Sorts the transactions by date.
+
+        The sort is stable, i.e. transactions on the same date keep their
+        order.
+
+        :return: The sorted transactions.
+        """
+        if self._sorted:
+            return self._take(range(len(self)))
+        indices = sorted(range(len(self)), key=self._times.__getitem__)
+        return self._take(indices, sorted_by_date=True)
+
+    def group_by_currency(self) -> dict[str | None, 'TransactionBatch']:
+        """Groups the transactions by currency.
+
+        :return: The transactions by currency, in order of appearance.
+        """
+        indices_by_currency: dict[int, list[int]] = {}
+        for index, currency_id in enumerate(self._currencies):
+            indices = indices_by_currency.get(currency_id)
+            if indices is None:
+                indices = indices_by_currency[currency_id] = []
+            indices.append(index)
+        get_string = self._strings.get_string
+        return {
+            get_string(currency_id): self._take(indices)
+            for currency_id, indices in indices_by_currency.items()
+        }
+
+    def sum(self) -> float:
+        """Returns the total amount of the transactions.
+
+        The amounts are summed as fixed-point integers, so there are no
+        rounding errors.
+
+        :return: The total amount.
+        """
+        return sum(self._amounts) / AMOUNT_SCALE
+
+    def to_bytes(self) -> bytes:
+        """Returns the batch in a compact binary form, see `from_bytes`.
+
+        :return: The binary form.
+        """
+        strings = [s.encode('utf-8') for s in self._strings.strings]
+        parts = [_MAGIC, bytes((self._sorted,))]
+        _pack_array(parts, array.array('q', map(len, strings)))
+        parts.extend(strings)
+        for column in self._get_columns():
+            _pack_array(parts, column)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'TransactionBatch':
+        """Restores a batch from its binary form, see `to_bytes`.
+
+        :param data: The binary form.
+        :return: The batch.
+        :raises ValueError: If the data isn't a batch of this version or
+        platform.
+        """
+        if not data.startswith(_MAGIC):
+            raise ValueError('Not a transaction batch.')
+        view = memoryview(data)
+        offset = len(_MAGIC)
+        is_sorted = bool(view[offset])
+        offset += 1
+        lengths, offset = _unpack_array(view, offset, 'q')
+        batch = cls()
+        for length in lengths:
+            batch._strings.get_id(str(view[offset : offset + length], 'utf-8'))
+            offset += length
+        columns = batch._get_columns()
+        for i, column in enumerate(columns):
+            columns[i], offset = _unpack_array(view, offset, column.typecode)
+        if offset != len(view) or len(set(map(len, columns))) > 1:
+            raise ValueError('Corrupt transaction batch.')
+        batch._set_columns(columns)
+        batch._sorted = is_sorted
+        return batch
+
+    def _get_columns(self) -> list[array.array]:
+        return [
+            self._types,
+            self._times,
+            self._amounts,
+            self._currencies,
+            *(self._string_columns[f] for f in STRING_FIELDS),
+            *(self._float_columns[f] for f in FLOAT_FIELDS),
+        ]
+
+    def _set_columns(self, columns: list[array.array]) -> None:
+        self._types, self._times, self._amounts, self._currencies = columns[:4]
+        string_columns = columns[4 : 4 + len(STRING_FIELDS)]
+        float_columns = columns[4 + len(STRING_FIELDS) :]
+        self._string_columns = dict(zip(STRING_FIELDS, string_columns))
+        self._float_columns = dict(zip(FLOAT_FIELDS, float_columns))
+
+    def _take(
+        self, indices: list[int] | range, sorted_by_date: bool | None = None
+    ) -> 'TransactionBatch':
+        """Returns a new batch with the transactions at the given indices.
+
+        The indices must be in ascending order unless `sorted_by_date` is set.
+        """
+        batch = TransactionBatch(self._strings)
+        batch._types = _take_column(self._types, indices)
+        batch._times = _take_column(self._times, indices)
+        batch._amounts = _take_column(self._amounts, indices)
+        batch._currencies = _take_column(self._currencies, indices)
+        batch._string_columns = {
+            f: _take_column(c, indices) for f, c in self._string_columns.items()
+        }
+        batch._float_columns = {
+            f: _take_column(c, indices) for f, c in self._float_columns.items()
+        }
+        batch._sorted = (
+            self._sorted if sorted_by_date is None else sorted_by_date
+        )
+        return batch
+
+
+def _pack_array(parts: list[bytes], column: array.array) -> None:
+    parts.append(
+        _ARRAY_HEADER.pack(
+            column.typecode.encode('ascii'), column.itemsize, len(column)
+        )
+    )
+    if sys.byteorder == 'big':
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    parts.append(column.tobytes())
+
+
+def _unpack_array(
+    view: memoryview, offset: int, typecode: str
+) -> tuple[array.array, int]:
+    try:
+        code, itemsize, length = _ARRAY_HEADER.unpack_from(view, offset)
+    except struct.error:
+        raise ValueError('Corrupt transaction batch.')
+    column = array.array(typecode)
+    if code != typecode.encode('ascii') or itemsize != column.itemsize:
+        # E.g. written on a platform with another size of C longs.
+        raise ValueError('Incompatible transaction batch.')
+    offset += _ARRAY_HEADER.size
+    end = offset + length * itemsize
+    if end > len(view):
+        raise ValueError('Corrupt transaction batch.')
+    column.frombytes(view[offset:end])
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column, end
+
+
+def _take_column(
+    column: array.array, indices: list[int] | range
+) -> array.array:
+    if isinstance(indices, range) and indices.step == 1:
+        return column[indices.start : indices.stop]
+    return array.array(column.typecode, map(column.__getitem__, indices))
+
+
+def _to_time(date: datetime.datetime) -> int:
+    return (
+        date.toordinal() * SECONDS_PER_DAY
+        + date.hour * 3600
+        + date.minute * 60
+        + date.second
+    )
+
+
+def _from_time(time: int) -> datetime.datetime:
+    days, seconds = divmod(time, SECONDS_PER_DAY)
+    return datetime.datetime.fromordinal(days) + datetime.timedelta(
+        seconds=seconds
+    )
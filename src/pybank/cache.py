@@ -0,0 +1,160 @@
+"""On-disk cache of imported statements.
+
+`StatementCache` stores the imported transactions of statement files, keyed by
+the content of the file and the importer. Converting an unchanged file again
+skips the encoding detection and the importer entirely.
+"""
+
+import hashlib
+import logging
+import os
+import os.path
+import tempfile
+import zlib
+from typing import TYPE_CHECKING
+
+from . import encoding
+
+if TYPE_CHECKING:
+    from . import batch
+
+
+# The default size budget of the statement cache.
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+ENTRY_EXTENSION = '.batch'
+_READ_SIZE = 1024 * 1024
+# The columns compress well. The fastest level already gets most of the gain.
+_COMPRESSION_LEVEL = 1
+
+logger = logging.getLogger(__name__)
+
+
+class StatementCache:
+    """Caches imported transactions on disk, keyed by the file content.
+
+    Each entry is a `TransactionBatch` in its compressed binary form. Reading
+    an entry touches its modification time, so `evict` removes the least
+    recently used entries first.
+
+    Several processes can share the cache. Entries are written atomically and
+    missing or corrupt entries are treated as misses.
+    """
+
+    def __init__(
+        self, directory: str | None = None, max_size: int = DEFAULT_MAX_SIZE
+    ):
+        """Create a new cache.
+
+        :param directory: The cache directory. Default: `statements` in
+        `encoding.get_cache_dir`.
+        :param max_size: The size budget in bytes, see `evict`.
+        """
+        self._directory = directory or os.path.join(
+            encoding.get_cache_dir(), 'statements'
+        )
+        self._max_size = max_size
+
+    def get_key(
+        self,
+        filename: str,
+        importer_name: str,
+        importer_version: int | str,
+        currency: str | None = None,
+    ) -> str:
+        """Returns the cache key of importing a file.
+
+        :param filename: The statement file.
+        :param importer_name: The name of the importer.
+        :param importer_version: The version of the importer.
+        :param currency: The currency filter of the import, if any.
+        :return: The key.
+        """
+        content_hash = hashlib.blake2b(digest_size=16)
+        with open(filename, 'rb') as file:
+            while chunk := file.read(_READ_SIZE):
+                content_hash.update(chunk)
+        key = hashlib.blake2b(digest_size=16)
+        for part in (
+            content_hash.hexdigest(),
+            importer_name,
+            str(importer_version),
+            currency or '',
+        ):
+            key.update(part.encode('utf-8') + b'\0')
+        return key.hexdigest()
+
+    def get(self, key: str) -> 'batch.TransactionBatch | None':
+        """Returns the cached transactions of a key.
+
+        :param key: The key, see `get_key`.
+        :return: The transactions, or None if not cached.
+        """
+        filename = self._get_filename(key)
+        try:
+            with open(filename, 'rb') as file:
+                data = file.read()
+            os.utime(filename)
+        except OSError:
+            return None
+        # Imported here, as it loads the model and pydantic with it.
+        from . import batch
+
+        try:
+            return batch.TransactionBatch.from_bytes(zlib.decompress(data))
+        except (ValueError, zlib.error) as e:
+            logger.debug('Ignoring cache entry %s: %s' % (filename, e))
+            return None
+
+    def put(self, key: str, transactions: 'batch.TransactionBatch') -> None:
+        """Caches the transactions of a key.
+
+        Failures are logged and otherwise ignored.
+
+        :param key: The key, see `get_key`.
+        :param transactions: The transactions.
+        """
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            fd, tmp_filename = tempfile.mkstemp(
+                dir=self._directory, suffix='.tmp'
+            )
+            with os.fdopen(fd, 'wb') as file:
+                file.write(
+                    zlib.compress(transactions.to_bytes(), _COMPRESSION_LEVEL)
+                )
+            os.replace(tmp_filename, self._get_filename(key))
+        except OSError as e:
+            logger.debug('Failed to cache transactions: %s.' % e)
+
+    def evict(self) -> int:
+        """Removes the least recently used entries beyond the size budget.
+
+        :return: The number of removed entries.
+        """
+        try:
+            with os.scandir(self._directory) as entries:
+                files = [
+                    (stat.st_mtime_ns, stat.st_size, entry.path)
+                    for entry in entries
+                    if entry.name.endswith(ENTRY_EXTENSION)
+                    for stat in (entry.stat(),)
+                ]
+        except OSError:
+            return 0
+        total_size = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total_size <= self._max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+            removed += 1
+        if removed:
+            logger.debug('Evicted %i cached statements.' % removed)
+        return removed
+
+    def _get_filename(self, key: str) -> str:
+        return os.path.join(self._directory, key + ENTRY_EXTENSION)
@@ -0,0 +1,323 @@
+"""Rules-based categorization of transactions.
+
+The rules file is a TOML file with a list of rules. Each rule has a category
+and one kind of pattern, which is matched against the normalized description
+of a transaction:
+
+    [[rules]]
+    category = "Expenses:Living:Groceries"
+    contains = ["migros", "coop"]
+
+    [[rules]]
+    category = "Expenses:Transport"
+    regex = '^sbb\\b'
+
+The kinds are `exact`, `startswith`, `contains` and `regex`. A pattern can be
+a string or a list of strings. The first matching rule in the file wins.
+Patterns are normalized like the descriptions, except for regexes, which have
+to match the lowercase description as is.
+
+The rules are compiled into one matcher per kind: a dict for `exact`, a trie
+for `startswith`, an Aho-Corasick automaton for `contains` and one regex for
+`regex`. So the time to categorize a description doesn't grow with the number
+of rules. The result of each distinct description is memoized.
+"""
+
+import dataclasses
+import re
+import tomllib
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from . import model
+
+
+EXACT = 'exact'
+STARTSWITH = 'startswith'
+CONTAINS = 'contains'
+REGEX = 'regex'
+KINDS = (EXACT, STARTSWITH, CONTAINS, REGEX)
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+# The fields of a transaction which make up its description, in order.
+_DESCRIPTION_FIELDS = ('payer', 'payee', 'memo')
+# Larger than any rule index.
+_NO_RULE = float('inf')
+
+
+@dataclasses.dataclass(frozen=True)
+class Rule:
+    """A categorization rule.
+
+    :param kind: How the patterns are matched, one of `KINDS`.
+    :param patterns: The patterns. Normalized, except for regexes.
+    :param category: The category of matching transactions.
+    :param index: The position of the rule in the rules file, from 0.
+    """
+
+    kind: str
+    patterns: tuple[str, ...]
+    category: str
+    index: int
+
+
+def normalize_description(text: str) -> str:
+    """Returns the normalized form of a description, as matched by the rules.
+
+    :param text: The description.
+    :return: The normalized description.
+    """
+    return _WHITESPACE_PATTERN.sub(' ', text).strip().casefold()
+
+
+def get_description(transaction: 'model.Transaction') -> str:
+    """Returns the description of a transaction, as matched by the rules.
+
+    :param transaction: The transaction.
+    :return: The payer, payee and memo, if any, normalized.
+    """
+    parts = (getattr(transaction, f, None) for f in _DESCRIPTION_FIELDS)
+    return normalize_description(' '.join(p for p in parts if p))
+
+
+def load_rules(filename: str) -> list[Rule]:
+    """Reads the rules from a rules file.
+
+    :param filename: The rules file.
+    :return: The rules, in file order.
+    :raises ValueError: If the file isn't a valid rules file.
+    """
+    try:
+        with open(filename, 'rb') as file:
+            document = tomllib.load(file)
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError('Invalid rules file %s: %s.' % (filename, e))
+    rules = []
+    for index, values in enumerate(document.get('rules', [])):
+        if not isinstance(values, dict):
+            raise ValueError('Invalid rule %i: %r.' % (index + 1, values))
+        kinds = [k for k in KINDS if k in values]
+        category = values.get('category')
+        if len(kinds) != 1 or not isinstance(category, str):
+            raise ValueError(
+                'Rule %i needs a category and one of %s.'
+                % (index + 1, ', '.join(KINDS))
+            )
+        patterns = values[kinds[0]]
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if not patterns or not all(isinstance(p, str) for p in patterns):
+            raise ValueError('Invalid patterns of rule %i.' % (index + 1))
+        rules.append(create_rule(kinds[0], patterns, category, index))
+    return rules
+
+
+def create_rule(
+    kind: str, patterns: Iterable[str], category: str, index: int
+) -> Rule:
+    """Creates a rule, normalizing its patterns.
+
+    :param kind: How the patterns are matched, one of `KINDS`.
+    :param patterns: The patterns.
+    :param category: The category of matching transactions.
+    :param index: The position of the rule, from 0.
+    :return: The rule.
+    :raises ValueError: For unknown kinds, empty patterns and invalid regexes.
+    """
+    if kind not in KINDS:
+        raise ValueError('Unknown kind of rule %i: %s.' % (index + 1, kind))
+    if kind == REGEX:
+        patterns = tuple(patterns)
+        for pattern in patterns:
+            try:
+                # Grouped like in the combined regex, see _compile_regexes.
+                compiled = re.compile('(?:%s)' % pattern)
+            except re.error as e:
+                raise ValueError(
+                    'Invalid regex of rule %i: %s.' % (index + 1, e)
+                )
+            if compiled.groups:
+                # Would slow down the combined regex, and backreferences to
+                # them would break it.
+                raise ValueError(
+                    'Regex of rule %i has groups, use (?:...).' % (index + 1)
+                )
+    else:
+        patterns = tuple(normalize_description(p) for p in patterns)
+    if not all(patterns):
+        raise ValueError('Empty pattern in rule %i.' % (index + 1))
+    return Rule(kind, patterns, category, index)
+
+
+class Categorizer:
+    """Finds the first matching rule of descriptions."""
+
+    def __init__(self, rules: Iterable[Rule]):
+        """Compile rules.
+
+        :param rules: The rules. Their index decides which one wins.
+        """
+        self._rules = {}
+        exact: dict[str, int] = {}
+        prefixes = _Trie()
+        substrings = _AhoCorasick()
+        regexes = []
+        for rule in rules:
+            self._rules[rule.index] = rule
+            for pattern in rule.patterns:
+                if rule.kind == EXACT:
+                    if exact.get(pattern, _NO_RULE) > rule.index:
+                        exact[pattern] = rule.index
+                elif rule.kind == STARTSWITH:
+                    prefixes.add(pattern, rule.index)
+                elif rule.kind == CONTAINS:
+                    substrings.add(pattern, rule.index)
+                else:
+                    regexes.append((pattern, rule.index))
+        substrings.build()
+        self._exact = exact
+        self._prefixes = prefixes
+        self._substrings = substrings
+        regexes.sort(key=lambda r: r[1])
+        self._regex = _compile_regexes(p for p, _ in regexes)
+        self._regexes = [re.compile(p) for p, _ in regexes]
+        self._regex_indices = [i for _, i in regexes]
+        self._cache: dict[str, Rule | None] = {}
+
+    def categorize(self, description: str) -> Rule | None:
+        """Returns the first rule matching a normalized description.
+
+        :param description: The description, see `normalize_description`.
+        :return: The rule, or None if no rule matches.
+        """
+        try:
+            return self._cache[description]
+        except KeyError:
+            pass
+        best = min(
+            self._exact.get(description, _NO_RULE),
+            self._prefixes.find_first(description),
+            self._substrings.find_first(description),
+        )
+        if self._regex is not None and self._regex_indices[0] < best:
+            best = min(best, self._find_first_regex(description))
+        rule = self._rules[best] if best != _NO_RULE else None
+        self._cache[description] = rule
+        return rule
+
+    def _find_first_regex(self, description: str) -> int | float:
+        # Most descriptions match no regex, which the combined regex finds in
+        # one pass. It can't tell which regex matched, without capturing
+        # groups, which would make it much slower.
+        if self._regex.search(description) is None:
+            return _NO_RULE
+        for regex, index in zip(self._regexes, self._regex_indices):
+            if regex.search(description):
+                return index
+        return _NO_RULE
+
+    def filter(
+        self, transactions: Iterable['model.Transaction']
+    ) -> Iterator['model.Transaction']:
+        """Categorizes the uncategorized transactions.
+
+        Transactions which already have a category, e.g. from the bank, keep
+        it.
+
+        :param transactions: The transactions.
+        :return: The transactions.
+        """
+        for transaction in transactions:
+            if not transaction.category:
+                rule = self.categorize(get_description(transaction))
+                if rule is not None:
+                    transaction.category = rule.category
+            yield transaction
+
+
+class _Trie:
+    """Finds the first rule whose prefix starts a text."""
+
+    def __init__(self):
+        # Child nodes by character, and the first rule ending at the node.
+        self._root: dict = {}
+
+    def add(self, prefix: str, index: int) -> None:
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        if node.get(None, _NO_RULE) > index:
+            node[None] = index
+
+    def find_first(self, text: str) -> int | float:
+        best = _NO_RULE
+        node = self._root
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            index = node.get(None, _NO_RULE)
+            if index < best:
+                best = index
+        return best
+
+
+class _AhoCorasick:
+    """Finds the first rule whose substring is in a text, in one pass."""
+
+    def __init__(self):
+        # Per state: the transitions, the failure state and the first rule of
+        # all patterns ending at the state.
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._first: list[int | float] = [_NO_RULE]
+
+    def add(self, pattern: str, index: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._first.append(_NO_RULE)
+            state = next_state
+        self._first[state] = min(self._first[state], index)
+
+    def build(self) -> None:
+        """Computes the failure states, after adding all patterns."""
+        goto, fail, first = self._goto, self._fail, self._first
+        # Breadth first, so that the failure state of a state is done first.
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                first[next_state] = min(
+                    first[next_state], first[fail[next_state]]
+                )
+
+    def find_first(self, text: str) -> int | float:
+        goto, fail, first = self._goto, self._fail, self._first
+        if len(goto) == 1:
+            return _NO_RULE
+        best = _NO_RULE
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if first[state] < best:
+                best = first[state]
+        return best
+
+
+def _compile_regexes(patterns: Iterable[str]) -> re.Pattern | None:
+    alternatives = ['(?:%s)' % pattern for pattern in patterns]
+    if not alternatives:
+        return None
+    return re.compile('|'.join(alternatives))
@@ -11,51 +11,82 @@ Supported financial institutions:
 For more information see http://github.com/thowi/pybank.
 """
 
+import collections
+import contextlib
+import functools
+import glob
 import logging
 import getopt
+import os
+import os.path
+import shutil
 import sys
+import tempfile
+import threading
+import time
 
-import charset_normalizer
-
-import pybank.importer.auto
-import pybank.importer.dkb
-import pybank.importer.ib
-import pybank.importer.postfinance
-import pybank.importer.revolut
-import pybank.importer.schwab
-import pybank.importer.wise
-from pybank import qif
-
-
-IMPORTER_BY_NAME = {
-    'auto': pybank.importer.auto.AutoImporter,
-    'dkb-checking': pybank.importer.dkb.DkbCheckingImporter,
-    'dkb-credit-card': pybank.importer.dkb.DkbCreditCardImporter,
-    'interactive-brokers': pybank.importer.ib.InteractiveBrokersImporter,
-    'postfinance-checking': pybank.importer.postfinance.PostFinanceCheckingImporter,
-    'postfinance-credit-card': pybank.importer.postfinance.PostFinanceCreditCardImporter,
-    'revolut': pybank.importer.revolut.RevolutImporter,
-    'schwab-brokerage': pybank.importer.schwab.SchwabBrokerageImporter,
-    'wise': pybank.importer.wise.WiseImporter,
-}
+from pybank import cache
+from pybank import encoding
+from pybank import incremental
+from pybank import metrics
+from pybank import profiling
+from pybank import registry
+
+
+# Importer classes by name. Only the selected importer is imported.
+IMPORTER_BY_NAME = registry.IMPORTERS
 LOG_FORMAT = '%(message)s'
+# The number of files listed when profiling a batch conversion.
+SLOWEST_FILES = 10
 LOG_FORMAT_DEBUG = '%(levelname)s %(name)s: %(message)s'
+# The extension of output files in batch mode.
+OUTPUT_EXTENSION = '.qif'
 
 
 logger = logging.getLogger(__name__)
 
 
 class Usage(Exception):
-    """Usage: convert.py [options] [inputfile.csv]
+    """Usage: convert.py [options] [inputfile.csv ...]
 
     Will read from inputfile.csv if specified, else from STDIN.
     Will write to STDOUT.
 
+    Batch mode: Several input files, directories or glob patterns. Each file is
+    converted in a pool of worker processes. Will write one file per input into
+    the output directory, or else all outputs to STDOUT in input order.
+
     Options:
     [-h|--help]
-    [-i importer|--importer=importer]
+    [-i importer|--importer=importer]  Default in batch mode: auto.
     [-c currency|--currency=USD]       Filters the transactions for a currency.
-    [-d|--debug]
+    [-j jobs|--jobs=jobs]              Worker processes. Default: CPU count.
+    [-o outdir|--outdir=outdir]        Output directory for batch mode.
+    [-s|--strict]                      Validates all imported transactions.
+    [-p|--profile]                     Logs the time spent in each stage.
+    [--profile-dump=prefix]            Implies --profile. Writes a cProfile
+        profile to prefix.prof and the top memory allocations to
+        prefix.tracemalloc.txt. Not in batch mode.
+    [--cache]                          Caches the imported transactions, keyed
+        by the file content and the importer. Unchanged files aren't imported
+        again.
+    [--cache-size=MB]                  Implies --cache. The size budget of the
+        cache. The least recently used entries are evicted. Default: 256.
+    [--incremental=statefile]          Only writes the transactions past the
+        high-water mark of the source, and advances the mark in the state
+        file. Not in batch mode.
+    [--seen-index=indexfile]           Only writes the transactions whose
+        import id isn't in the index of the source yet, and adds the new ids to
+        the index. Not in batch mode.
+    [--source=name]                    The source of the high-water mark and
+        the import ids. Default: The importer name and the currency. Set it
+        when importing several accounts with the same importer.
+    [--rules=rulesfile]                Categorizes the uncategorized
+        transactions with the first matching rule of a rules file.
+    [--metrics=file]                   Appends the import metrics to a file as
+        JSON lines, or writes them in the Prometheus text format if the file
+        ends in .prom.
+    [-d|--debug]                       Implies --strict.
     """
 
     def __init__(self, msg=''):
@@ -71,10 +102,38 @@ class Usage(Exception):
 def _parse_args(argv):
     importer_name = None
     currency = None
+    jobs = None
+    output_dir = None
+    strict = False
+    profile = False
+    profile_dump = None
+    metrics_filename = None
+    cache_size = None
+    state_filename = None
+    index_filename = None
+    source = None
+    rules_filename = None
     debug = False
 
-    options = 'hi:c:d'
-    options_long = ['help', 'importer=', 'currency=', 'debug']
+    options = 'hi:c:j:o:spd'
+    options_long = [
+        'help',
+        'importer=',
+        'currency=',
+        'jobs=',
+        'outdir=',
+        'strict',
+        'profile',
+        'profile-dump=',
+        'metrics=',
+        'cache',
+        'cache-size=',
+        'incremental=',
+        'seen-index=',
+        'source=',
+        'rules=',
+        'debug',
+    ]
     try:
         opts, other_args = getopt.getopt(argv[1:], options, options_long)
     except getopt.error as msg:
@@ -82,83 +141,597 @@ def _parse_args(argv):
     for opt, arg in opts:
         if opt in ('-h', '--help'):
             print(Usage())
-            return 0
+            return None
         if opt in ('-i', '--importer'):
             importer_name = arg
         if opt in ('-c', '--currency'):
             currency = arg
+        if opt in ('-j', '--jobs'):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                raise Usage('Invalid number of jobs: %s.' % arg)
+        if opt in ('-o', '--outdir'):
+            output_dir = arg
+        if opt in ('-s', '--strict'):
+            strict = True
+        if opt in ('-p', '--profile'):
+            profile = True
+        if opt == '--profile-dump':
+            profile = True
+            profile_dump = arg
+        if opt == '--metrics':
+            metrics_filename = arg
+        if opt == '--cache' and cache_size is None:
+            cache_size = cache.DEFAULT_MAX_SIZE
+        if opt == '--incremental':
+            state_filename = arg
+        if opt == '--seen-index':
+            index_filename = arg
+        if opt == '--source':
+            source = arg
+        if opt == '--rules':
+            rules_filename = arg
+        if opt == '--cache-size':
+            try:
+                cache_size = int(float(arg) * 1024 * 1024)
+            except ValueError:
+                raise Usage('Invalid cache size: %s.' % arg)
         if opt in ('-d', '--debug'):
             debug = True
 
+    batch = (
+        output_dir is not None
+        or len(other_args) > 1
+        or any(os.path.isdir(a) or glob.has_magic(a) for a in other_args)
+    )
+    if batch and not importer_name:
+        importer_name = 'auto'
+
     if not importer_name:
         raise Usage('Must specify an importer name.')
     if importer_name not in IMPORTER_BY_NAME:
         raise Usage('Unknown importer: %s.' % importer_name)
-
-    if len(other_args) > 1:
-        raise Usage('Too many non-option arguments: %s.' % other_args)
+    if batch and not other_args:
+        raise Usage('Batch mode needs input files.')
+    if batch and profile_dump:
+        raise Usage('Profile dumps are not supported in batch mode.')
+    if batch and state_filename:
+        raise Usage('Incremental imports are not supported in batch mode.')
+    if batch and index_filename:
+        raise Usage('Seen indexes are not supported in batch mode.')
+    if source and not (state_filename or index_filename):
+        raise Usage('A source needs --incremental or --seen-index.')
+    if (state_filename or index_filename) and not source:
+        source = ':'.join(filter(None, (importer_name, currency)))
 
     return (
         importer_name,
         currency,
+        strict or debug,
         debug,
-        other_args[0] if other_args else None,
+        other_args if batch else None,
+        other_args[0] if other_args and not batch else None,
+        jobs,
+        output_dir,
+        profile,
+        profile_dump,
+        metrics_filename,
+        cache_size,
+        state_filename,
+        index_filename,
+        source,
+        rules_filename,
     )
 
 
-def _convert_file(importer_name, currency, debug, filename):
+def _convert_file(
+    importer_name,
+    currency,
+    strict,
+    debug,
+    filename,
+    output=None,
+    profiler=None,
+    metrics_sink=None,
+    statement_cache=None,
+    filters=(),
+):
+    """Converts a file, or STDIN if no file name is given.
+
+    :param filters: Objects whose `filter` method selects the transactions to
+    write, applied in order.
+
+    :return: Whether all transactions were written.
+    """
     importer_class = IMPORTER_BY_NAME[importer_name]
-    importer = importer_class(debug)
-
-    if filename:
-        with _open_file(filename) as file:
-            transactions = importer.import_transactions(
-                file=file, currency=currency
-            )
-    else:
-        transactions = importer.import_transactions(
-            file=sys.stdin, currency=currency
-        )
+    importer = importer_class(debug, strict, profiler, metrics_sink)
+
+    if not filename:
+        transactions = importer.iter_transactions(sys.stdin, currency)
+        return _write_transactions(transactions, output, profiler, filters)
+    # The auto importer knows the encoding of the detected format, if any.
+    encoding_hint = importer_class.get_encoding(filename)
+    if statement_cache is None:
+        with _open_file(filename, encoding_hint, profiler) as file:
+            # The transactions are imported lazily, so the output is written
+            # while the input is still being read.
+            transactions = importer.iter_transactions(file, currency)
+            return _write_transactions(transactions, output, profiler, filters)
+
+    key = statement_cache.get_key(
+        filename, importer_name, importer_class.version, currency
+    )
+    cached = statement_cache.get(key)
+    if cached is not None:
+        logger.debug('Using cached import of %s.' % filename)
+        return _write_transactions(cached, output, profiler, filters)
+    # Imported here, as it loads the model and pydantic with it.
+    from pybank import batch
+
+    imported = batch.TransactionBatch()
+    with _open_file(filename, encoding_hint, profiler) as file:
+        transactions = importer.iter_transactions(file=file, currency=currency)
+        appended = _append_to(imported, transactions, currency)
+        written = _write_transactions(appended, output, profiler, filters)
+        if written:
+            # Filters may stop reading early, e.g. at a high-water mark, but
+            # the cache needs the whole statement.
+            collections.deque(appended, maxlen=0)
+    if written:
+        statement_cache.put(key, imported)
+    return written
+
+
+def _append_to(imported, transactions, currency):
+    for transaction in transactions:
+        imported.append(transaction, currency)
+        yield transaction
+
+
+def _write_transactions(transactions, output=None, profiler=None, filters=()):
+    """Writes transactions as QIF.
+
+    :return: Whether all transactions were written.
+    """
+    # Imported here, as it loads the model and pydantic with it, which --help
+    # and usage errors don't need.
+    from pybank import qif
 
+    for transaction_filter in filters:
+        transactions = transaction_filter.filter(transactions)
     try:
-        txns_qif = (qif.serialize_transaction(t) for t in transactions)
-        print('\n'.join(txns_qif))
+        with qif.Writer(output or sys.stdout) as writer:
+            if profiler is None:
+                for transaction in transactions:
+                    writer.write_transaction(transaction)
+            else:
+                # The importer measures the parsing.
+                for transaction in transactions:
+                    with profiler.stage(profiling.SERIALIZATION):
+                        writer.write_transaction(transaction)
     except qif.SerializationError as e:
         logger.error('Serialization error: %s.', e)
-        return
+        return False
+    return True
 
 
-def _open_file(filename):
-    encoding_guess = charset_normalizer.from_path(filename).best()
-    if encoding_guess:
-        logger.debug('Detected encoding: %s.' % encoding_guess.encoding)
-        encoding = encoding_guess.encoding
-        # Strip the BOM from UTF-8 files.
-        if encoding.lower() == 'utf_8':
-            encoding = 'utf-8-sig'
+def _open_file(filename, encoding_hint=None, profiler=None):
+    if profiler is not None:
+        with profiler.stage(profiling.ENCODING_DETECTION):
+            file_encoding = encoding.detect_encoding(
+                filename, hint=encoding_hint
+            )
     else:
-        logger.warning('Failed to detect encoding. Falling back to utf-8.')
-        encoding = 'utf-8-sig'
+        file_encoding = encoding.detect_encoding(filename, hint=encoding_hint)
     # Use newline='' as suggested by the csv.readerdocs.
-    return open(filename, 'r', encoding=encoding, newline='')
+    return open(filename, 'r', encoding=file_encoding, newline='')
+
+
+def _expand_inputs(input_args, output_dir=None):
+    """Expands directories and glob patterns into a sorted list of files.
+
+    Within directories, hidden files and QIF files are skipped, as well as the
+    output directory, so that the outputs of an earlier run aren't converted.
+    """
+    output_dir = os.path.abspath(output_dir) if output_dir else None
+    filenames = set()
+    for input_arg in input_args:
+        paths = (
+            glob.glob(input_arg, recursive=True)
+            if glob.has_magic(input_arg)
+            else [input_arg]
+        )
+        for path in paths:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path):
+                    dirs[:] = [
+                        d
+                        for d in dirs
+                        if not d.startswith('.')
+                        and os.path.abspath(os.path.join(root, d)) != output_dir
+                    ]
+                    filenames.update(
+                        os.path.join(root, f)
+                        for f in files
+                        if not f.startswith('.')
+                        and not f.lower().endswith(OUTPUT_EXTENSION)
+                    )
+            else:
+                filenames.add(path)
+    return sorted(filenames)
+
+
+def _get_output_filenames(filenames, output_dir):
+    """Maps the input files to output files, mirroring their directories.
+
+    Inputs which only differ in their extension, e.g. `a.csv` and `a.txt`,
+    keep it in their outputs, `a.csv.qif` and `a.txt.qif`.
+    """
+    if len(filenames) == 1:
+        common_dir = os.path.dirname(os.path.abspath(filenames[0]))
+    else:
+        common_dir = os.path.commonpath([os.path.abspath(f) for f in filenames])
+    relatives = [
+        os.path.relpath(os.path.abspath(f), common_dir) for f in filenames
+    ]
+    stems = collections.Counter(os.path.splitext(r)[0] for r in relatives)
+    output_filenames = []
+    for relative in relatives:
+        stem = os.path.splitext(relative)[0]
+        if stems[stem] > 1:
+            stem = relative
+        output_filenames.append(
+            os.path.join(output_dir, stem + OUTPUT_EXTENSION)
+        )
+    return output_filenames
+
+
+def _convert_batch_file(
+    importer_name,
+    currency,
+    strict,
+    debug,
+    filename,
+    output,
+    profile=False,
+    collect_metrics=False,
+    cache_size=None,
+    rules_filename=None,
+):
+    """Converts one file of a batch in a worker process.
+
+    :return: The size of the input file in bytes, the profiler stats if
+    profiling and the import metrics if collecting them.
+    """
+    profiler = profiling.Profiler() if profile else None
+    metrics_sink = metrics.MemorySink() if collect_metrics else None
+    statement_cache = None
+    if cache_size is not None:
+        statement_cache = cache.StatementCache(max_size=cache_size)
+    filters = []
+    if rules_filename:
+        filters.append(_load_worker_categorizer(rules_filename))
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    try:
+        with open(output, 'w') as output_file:
+            written = _convert_file(
+                importer_name,
+                currency,
+                strict,
+                debug,
+                filename,
+                output_file,
+                profiler,
+                metrics_sink,
+                statement_cache,
+                filters,
+            )
+        if not written:
+            # The error is logged. Fail the file, rather than keep a partial
+            # output.
+            raise ValueError('Not all transactions were written.')
+    except Exception:
+        os.remove(output)
+        raise
+    stats = profiler.get_stats() if profiler else None
+    records = metrics_sink.records if metrics_sink else None
+    return os.path.getsize(filename), stats, records
+
+
+def _load_categorizer(rules_filename):
+    # Imported here, only needed with --rules.
+    from pybank import categorize
+
+    return categorize.Categorizer(categorize.load_rules(rules_filename))
+
+
+# So that each worker process compiles the rules once.
+_load_worker_categorizer = functools.cache(_load_categorizer)
+
+
+class _BatchProgress:
+    """Logs the progress and throughput of a batch conversion."""
+
+    _INTERVAL_S = 1
+
+    def __init__(self, total):
+        self._total = total
+        self._done = 0
+        self._failed = 0
+        self._bytes = 0
+        self._start = time.perf_counter()
+        self._last_report = self._start
+        self._lock = threading.Lock()
+
+    @property
+    def failed(self):
+        return self._failed
+
+    def add(self, size, failed=False):
+        with self._lock:
+            self._done += 1
+            self._bytes += size
+            if failed:
+                self._failed += 1
+            now = time.perf_counter()
+            if now - self._last_report >= self._INTERVAL_S:
+                self._last_report = now
+                self.report()
+
+    def report(self):
+        elapsed = max(time.perf_counter() - self._start, 1e-9)
+        logger.info(
+            'Converted %i/%i files (%i failed) in %.1f s. %.1f files/s, '
+            '%.2f MB/s.'
+            % (
+                self._done,
+                self._total,
+                self._failed,
+                elapsed,
+                self._done / elapsed,
+                self._bytes / elapsed / 1e6,
+            )
+        )
+
+
+def _convert_batch(
+    importer_name,
+    currency,
+    strict,
+    debug,
+    input_args,
+    jobs,
+    output_dir,
+    profile=False,
+    metrics_sink=None,
+    cache_size=None,
+    rules_filename=None,
+):
+    """Converts many files in parallel.
+
+    A failing file is logged and doesn't stop the other conversions.
+
+    :return: The number of failed files.
+    """
+    filenames = _expand_inputs(input_args, output_dir)
+    logger.info('Converting %i files…' % len(filenames))
+    if not filenames:
+        return 0
+    progress = _BatchProgress(len(filenames))
+
+    tmp_dir = None
+    if output_dir:
+        output_filenames = _get_output_filenames(filenames, output_dir)
+    else:
+        # Buffer the outputs on disk to write them to STDOUT in order.
+        tmp_dir = tempfile.mkdtemp(prefix='pybank-')
+        output_filenames = [
+            os.path.join(tmp_dir, '%i.qif' % i) for i in range(len(filenames))
+        ]
+
+    stats_by_filename = {}
+
+    def on_done(filename, future):
+        try:
+            size, stats, records = future.result()
+            if stats is not None:
+                stats_by_filename[filename] = stats
+            for record in records or ():
+                metrics_sink.emit(record)
+            progress.add(size)
+        except Exception as e:
+            logger.error('Error while converting file %s: %s' % (filename, e))
+            if metrics_sink is not None:
+                metrics_sink.emit(
+                    metrics.ImportMetrics(
+                        importer=importer_name,
+                        source=filename,
+                        parse_failures=1,
+                        timestamp=time.time(),
+                    )
+                )
+            progress.add(0, failed=True)
+
+    # Only needed in batch mode.
+    import concurrent.futures
+
+    try:
+        with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+            futures = []
+            for filename, output in zip(filenames, output_filenames):
+                future = executor.submit(
+                    _convert_batch_file,
+                    importer_name,
+                    currency,
+                    strict,
+                    debug,
+                    filename,
+                    output,
+                    profile,
+                    metrics_sink is not None,
+                    cache_size,
+                    rules_filename,
+                )
+                future.add_done_callback(
+                    lambda f, filename=filename: on_done(filename, f)
+                )
+                futures.append(future)
+
+            if tmp_dir:
+                for future, output in zip(futures, output_filenames):
+                    if future.exception() is not None:
+                        continue
+                    with open(output, 'r') as output_file:
+                        shutil.copyfileobj(output_file, sys.stdout)
+                    os.remove(output)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    progress.report()
+    if profile:
+        _log_batch_profile(stats_by_filename)
+    return progress.failed
+
+
+def _log_batch_profile(stats_by_filename):
+    logger.info(
+        'Profile of all files:\n%s'
+        % profiling.format_stats(
+            profiling.merge_stats(stats_by_filename.values())
+        )
+    )
+    wall_by_filename = {
+        filename: sum(wall for wall, cpu, calls in stats.values())
+        for filename, stats in stats_by_filename.items()
+    }
+    slowest = sorted(wall_by_filename, key=wall_by_filename.get, reverse=True)
+    logger.info('Slowest files:')
+    for filename in slowest[:SLOWEST_FILES]:
+        logger.info('%8.3f s %s' % (wall_by_filename[filename], filename))
 
 
 def main(argv: list[str] | None = None) -> int:
     if argv is None:
         argv = sys.argv
     try:
-        (importer_name, currency, debug, input_filename) = _parse_args(argv)
+        args = _parse_args(argv)
     except Usage as err:
         print(err, file=sys.stderr)
         return 2
+    if args is None:
+        # Printed the help.
+        return 0
+    (
+        importer_name,
+        currency,
+        strict,
+        debug,
+        input_args,
+        input_filename,
+        jobs,
+        output_dir,
+        profile,
+        profile_dump,
+        metrics_filename,
+        cache_size,
+        state_filename,
+        index_filename,
+        source,
+        rules_filename,
+    ) = args
 
     if debug:
         logging.basicConfig(format=LOG_FORMAT_DEBUG, level=logging.DEBUG)
     else:
         logging.basicConfig(format=LOG_FORMAT, level=logging.INFO)
 
+    categorizer = None
+    if rules_filename:
+        # Also in batch mode, to fail before converting any file.
+        try:
+            categorizer = _load_categorizer(rules_filename)
+        except (OSError, ValueError) as e:
+            logger.error('Failed to read the rules: %s' % e)
+            return 2
+
+    metrics_sink = None
+    if metrics_filename:
+        metrics_sink = metrics.open_sink(metrics_filename)
+    statement_cache = None
+    if cache_size is not None:
+        statement_cache = cache.StatementCache(max_size=cache_size)
+
+    if input_args is not None:
+        try:
+            failed = _convert_batch(
+                importer_name,
+                currency,
+                strict,
+                debug,
+                input_args,
+                jobs,
+                output_dir,
+                profile,
+                metrics_sink,
+                cache_size,
+                rules_filename,
+            )
+        finally:
+            if metrics_sink is not None:
+                metrics_sink.close()
+            if statement_cache is not None:
+                statement_cache.evict()
+        return 1 if failed else 0
+
+    filters = []
+    seen_filter = None
+    index = None
+    if index_filename:
+        # Imported here, only needed with --seen-index.
+        import sqlite3
+
+        from pybank import import_id
+
+        try:
+            index = import_id.ImportIdIndex(index_filename)
+        except sqlite3.Error as e:
+            logger.error('Failed to open the seen index: %s' % e)
+            return 2
+        # First, as the import ids count occurrences in the whole statement.
+        seen_filter = import_id.SeenFilter(index, source)
+        filters.append(seen_filter)
+    mark_filter = None
+    if state_filename:
+        try:
+            marks = incremental.load_marks(state_filename)
+        except (OSError, ValueError) as e:
+            logger.error('Failed to read the state file: %s' % e)
+            return 2
+        mark_filter = incremental.MarkFilter(marks.get(source))
+        filters.append(mark_filter)
+    if categorizer is not None:
+        filters.append(categorizer)
+
+    profiler = profiling.Profiler() if profile else None
     try:
-        _convert_file(importer_name, currency, debug, input_filename)
+        with (
+            profiling.dump(profile_dump)
+            if profile_dump
+            else contextlib.nullcontext()
+        ):
+            written = _convert_file(
+                importer_name,
+                currency,
+                strict,
+                debug,
+                input_filename,
+                profiler=profiler,
+                metrics_sink=metrics_sink,
+                statement_cache=statement_cache,
+                filters=filters,
+            )
     except (KeyboardInterrupt, SystemExit):
         raise
     except Exception as e:
@@ -168,7 +741,41 @@ def main(argv: list[str] | None = None) -> int:
 
             pdb.post_mortem()
         return 2
-
+    finally:
+        if profiler is not None:
+            logger.info(
+                'Profile:\n%s' % profiling.format_stats(profiler.get_stats())
+            )
+        if metrics_sink is not None:
+            metrics_sink.close()
+        if statement_cache is not None:
+            statement_cache.evict()
+
+    if seen_filter is not None:
+        if written:
+            logger.info(
+                'Skipped %i transactions already in the seen index of %s.'
+                % (seen_filter.skipped, source)
+            )
+            for transaction, similar_ids in seen_filter.similar:
+                logger.warning(
+                    'Possible duplicate: %s Similar to %s.'
+                    % (transaction, ', '.join(similar_ids))
+                )
+            seen_filter.commit()
+        index.close()
+    if mark_filter is not None and written:
+        logger.info(
+            'Skipped %i transactions up to the high-water mark of %s.'
+            % (mark_filter.skipped, source)
+        )
+        if mark_filter.stopped:
+            logger.info('The rest of the statement is older and was not read.')
+        if mark_filter.mark is not None:
+            # Reread the marks, another run might have advanced other sources.
+            marks = incremental.load_marks(state_filename)
+            marks[source] = mark_filter.mark
+            incremental.save_marks(state_filename, marks)
     return 0
 
 
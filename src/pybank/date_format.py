@@ -0,0 +1,78 @@
+"""Fast parsing of the dates in statement files.
+
+A statement uses the same date format throughout and usually has only a few
+hundred distinct dates, even if it has many rows. A `DateParser` settles the
+format on the first date it parses and memoizes the result for every distinct
+date string.
+"""
+
+import datetime
+
+
+# Formats that `datetime.fromisoformat` parses much faster than `strptime`.
+_ISO_FORMAT_LENGTHS = {
+    '%Y-%m-%d': 10,
+    '%Y-%m-%d %H:%M:%S': 19,
+}
+
+
+class DateParser:
+    """Parses the dates of one file.
+
+    Create a new parser for every file, so that each file can settle on its own
+    format.
+    """
+
+    def __init__(self, *formats: str):
+        """Create a new date parser.
+
+        :param formats: The candidate `strptime` formats, the preferred first.
+        """
+        self._formats = formats
+        self._format = None
+        self._cache: dict[str, datetime.datetime] = {}
+
+    def __call__(self, date_string: str) -> datetime.datetime:
+        """Parses a date string.
+
+        :param date_string: The date as a string.
+        :return: The parsed date.
+        :raises ValueError: If the string doesn't match any format.
+        """
+        try:
+            return self._cache[date_string]
+        except KeyError:
+            date = self._cache[date_string] = self._parse(date_string)
+            return date
+
+    def _parse(self, date_string: str) -> datetime.datetime:
+        if self._format is not None:
+            try:
+                return _parse_with_format(date_string, self._format)
+            except ValueError:
+                # Mixed formats. Try the others.
+                pass
+        for date_format in self._formats:
+            if date_format == self._format:
+                continue
+            try:
+                date = _parse_with_format(date_string, date_format)
+            except ValueError:
+                continue
+            self._format = date_format
+            return date
+        raise ValueError(
+            'Date %s does not match any format: %s.'
+            % (date_string, ', '.join(self._formats))
+        )
+
+
+def _parse_with_format(date_string: str, date_format: str) -> datetime.datetime:
+    iso_length = _ISO_FORMAT_LENGTHS.get(date_format)
+    if (
+        iso_length == len(date_string)
+        and date_string[4] == '-'
+        and date_string[7] == '-'
+    ):
+        return datetime.datetime.fromisoformat(date_string)
+    return datetime.datetime.strptime(date_string, date_format)
@@ -1,8 +1,4 @@
-import datetime
-import locale
 import logging
-import re
-import string
 import time
 from typing import Callable
 
@@ -10,7 +6,10 @@ from selenium.common import exceptions
 from selenium.webdriver.remote.webelement import WebElement
 
 
-WHITESPACE_PATTERN = re.compile(r' +')
+# The first sleep of a wait. Each following sleep is longer, by
+# BACKOFF_FACTOR, up to the sleep of the wait.
+MIN_SLEEP_S = 0.05
+BACKOFF_FACTOR = 1.5
 
 logger = logging.getLogger(__name__)
 
@@ -19,46 +18,6 @@ class FetchError(Exception):
     """An error while fetching the account data."""
 
 
-def normalize_text(text: str) -> str:
-    """Returns a normalized version of the input text.
-
-    Removes double spaces and "Capitalizes All Words" if they are "ALL CAPS".
-
-    :param text: The input text
-    :return: A normalized version of the input text
-    """
-    text = WHITESPACE_PATTERN.sub(' ', text)
-    lines = []
-    for line in text.splitlines():
-        line = line.strip()
-        if line.isupper():
-            line = string.capwords(line)
-        lines.append(line)
-    return '\n'.join(lines)
-
-
-def parse_decimal_number(number_string: str, lang: str) -> float:
-    """Parses a decimal number string into a float.
-
-    Can also handle thousands separators.
-
-    :param number_string: The decimal number as a string.
-    :param lang: The locale of the format.
-    :param: The parsed number.
-    :raises ValueError: If the string is not a valid decimal number.
-    """
-    orig_locale = locale.getlocale(locale.LC_ALL)
-    locale.setlocale(locale.LC_ALL, lang)
-    thousands_sep = locale.localeconv()['mon_thousands_sep']
-    if lang == 'de_CH':  # Buggy Swiss locale.
-        locale.setlocale(locale.LC_ALL, 'en_US')
-        thousands_sep = "'"
-    try:
-        return locale.atof(number_string.replace(thousands_sep, ''))
-    finally:
-        locale.setlocale(locale.LC_ALL, orig_locale)
-
-
 def format_iban(iban: str) -> str:
     return format_string_into_blocks(iban, 4)
 
@@ -200,13 +159,17 @@ def wait_until(
 ) -> None:
     """Waits for the condition to become true.
 
+    The condition is checked often at first, then backing off, so that short
+    waits end quickly and long ones don't keep the browser busy.
+
     :param condition: The condition to check periodically.
     :param timeout_s: The timeout.
-    :param sleep_s: The time to sleep between the tries.
+    :param sleep_s: The maximum time to sleep between the tries.
     :param raise_exceptions: Whether to raise any caught exceptions.
     """
-    end_time = datetime.datetime.now() + datetime.timedelta(seconds=timeout_s)
-    while datetime.datetime.now() < end_time:
+    end_time = time.monotonic() + timeout_s
+    sleep = min(MIN_SLEEP_S, sleep_s)
+    while time.monotonic() < end_time:
         try:
             if condition():
                 return
@@ -214,9 +177,11 @@ def wait_until(
             if raise_exceptions:
                 raise e
             else:
-                logger.info('Suppressing exception: ' + str(e))
-                pass
-        time.sleep(sleep_s)
+                # Common while a page is loading, so only logged when
+                # debugging, now that the checks are more frequent.
+                logger.debug('Suppressing exception: ' + str(e))
+        time.sleep(max(0, min(sleep, end_time - time.monotonic())))
+        sleep = min(sleep * BACKOFF_FACTOR, sleep_s)
 
     raise OperationTimeoutError('Operation timed out.')
 
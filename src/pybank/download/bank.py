@@ -1,18 +1,85 @@
+import bisect
 import logging
 import datetime
 import os
 import os.path
 import pickle
 import time
+from typing import Iterable
 
 
 import selenium.webdriver
 
 from .. import model
+from .. import prompt
 
 logger = logging.getLogger(__name__)
 
 
+class TransactionStore:
+    """The transactions of one account, sorted by date.
+
+    A date range is found with two binary searches, so repeated queries for
+    different windows, e.g. one per month, don't scan all transactions.
+    """
+
+    def __init__(self, transactions: Iterable[model.Transaction] = ()) -> None:
+        """Create a new store.
+
+        :param transactions: The initial transactions, in any order.
+        """
+        self._transactions: list[model.Transaction] = []
+        self._dates: list[datetime.datetime] = []
+        self.add(transactions)
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def add(self, transactions: Iterable[model.Transaction]) -> None:
+        """Adds transactions.
+
+        Transactions with the same date keep the order they were added in.
+
+        :param transactions: The transactions, in any order.
+        """
+        new = sorted(transactions, key=_get_date)
+        if not new:
+            return
+        if self._dates and new[0].date < self._dates[-1]:
+            # Sorting merges the two sorted runs in linear time.
+            self._transactions.extend(new)
+            self._transactions.sort(key=_get_date)
+            self._dates = [t.date for t in self._transactions]
+        else:
+            self._transactions.extend(new)
+            self._dates.extend(t.date for t in new)
+
+    def get_range(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        reverse: bool = False,
+    ) -> list[model.Transaction]:
+        """Returns the transactions within a date range.
+
+        :param start: Start date, inclusive.
+        :param end: End date, exclusive.
+        :param reverse: Whether to return the latest transactions first.
+        :return: The transactions, sorted by date.
+        """
+        first = bisect.bisect_left(self._dates, start)
+        last = bisect.bisect_left(self._dates, end, first)
+        transactions = self._transactions[first:last]
+        if reverse:
+            # Stable, so transactions with the same date keep their order.
+            transactions.sort(key=_get_date, reverse=True)
+        return transactions
+
+
+def _get_date(transaction: model.Transaction) -> datetime.datetime:
+    return transaction.date
+
+
 class Bank:
     """Base class for a fetcher that logs into a bank account website."""
 
@@ -22,6 +89,7 @@ class Bank:
         :param debug: Whether to run in debug mode.
         """
         self._debug = debug
+        self._stores: dict[str, TransactionStore] = {}
 
     def login(
         self,
@@ -108,7 +176,7 @@ class Bank:
             logger.info('Invalid cookies file. Deleting.')
             os.remove(cookies_filename)
             return False
-        restore = input(
+        restore = prompt.ask(
             'A previous session was found for this user. Restore? [Yn] '
         )
         if restore.lower() in ('y', ''):
@@ -1,10 +1,8 @@
 # coding: utf-8
 
 import datetime
-import getpass
 import logging
 import re
-import time
 
 from selenium import webdriver
 from selenium.common import exceptions
@@ -13,6 +11,10 @@ from selenium.webdriver.support import ui
 
 from .. import download
 from .. import model
+from .. import number_format
+from .. import prompt
+from .. import text_format
+from . import readiness
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,7 @@ class DeutscheKreditBank(download.bank.Bank):
     _DATE_FORMAT = '%d.%m.%Y'
     _DATE_FORMAT_SHORT = '%d.%m.%y'
     _WEBDRIVER_TIMEOUT = 10
+    _LOADING_INDICATORS = ('.ajax_loading',)
     _SESSION_TIMEOUT_S = 12 * 60
 
     def login(
@@ -57,7 +60,7 @@ class DeutscheKreditBank(download.bank.Bank):
         browser.get(self._BASE_URL)
 
         if not username:
-            username = input('User: ')
+            username = prompt.ask('User: ')
 
         if self.ask_and_restore_cookies(
             browser, username, self._SESSION_TIMEOUT_S
@@ -66,7 +69,7 @@ class DeutscheKreditBank(download.bank.Bank):
 
         if not self._is_logged_in():
             if not password:
-                password = getpass.getpass('PIN: ')
+                password = prompt.ask_password('PIN: ')
             try:
                 login_form = browser.find_element_by_id('login')
             except exceptions.NoSuchElementException:
@@ -95,8 +98,11 @@ class DeutscheKreditBank(download.bank.Bank):
         )
 
     def logout(self) -> None:
-        self._browser.find_element_by_id('logout').click()
-        self._browser.quit()
+        try:
+            self._browser.find_element_by_id('logout').click()
+        finally:
+            # Even if the page is broken, e.g. after an error.
+            self._browser.quit()
         self._logged_in = False
         self._accounts = None
         self.delete_cookies(self._username)
@@ -232,10 +238,13 @@ class DeutscheKreditBank(download.bank.Bank):
             account_text = account.name + ' / Kreditkarte'
         else:
             account_text = download.format_iban(account.name) + ' / Girokonto'
-        account_select.select_by_visible_text(account_text)
-        # Selecting an account will reload the page.
-        # Wait a little. Load the form again.
-        time.sleep(5)
+        # Selecting an account will reload the page. Load the form again.
+        readiness.wait_for_change(
+            browser,
+            lambda: account_select.select_by_visible_text(account_text),
+            self._LOADING_INDICATORS,
+            name='dkb.account',
+        )
         content = browser.find_element_by_class_name('content')
         form = content.find_element_by_tag_name('form')
         formatted_start = start.strftime(self._DATE_FORMAT)
@@ -276,7 +285,7 @@ class DeutscheKreditBank(download.bank.Bank):
                 date = self._parse_date(date_text)
 
                 # Payee and memo.
-                details_lines = download.normalize_text(cells[1].text).split(
+                details_lines = text_format.normalize_text(cells[1].text).split(
                     '\n'
                 )
                 unused_transaction_type = details_lines[0]
@@ -292,7 +301,9 @@ class DeutscheKreditBank(download.bank.Bank):
                     memo += '\nClearing: %s' % payee_clearing
 
                 # Amount
-                amount = download.parse_decimal_number(cells[3].text, 'de_DE')
+                amount = number_format.parse_decimal_number(
+                    cells[3].text, 'de_DE'
+                )
 
                 transactions.append(
                     model.Payment(
@@ -321,16 +332,16 @@ class DeutscheKreditBank(download.bank.Bank):
                 date = self._parse_date(date_text)
 
                 # Memo.
-                memo = download.normalize_text(cells[2].text)
+                memo = text_format.normalize_text(cells[2].text)
 
                 # Amount.
                 amounts = cells[3].text.split('\n')
-                amount = download.parse_decimal_number(amounts[0], 'de_DE')
+                amount = number_format.parse_decimal_number(amounts[0], 'de_DE')
 
                 # Currency.
                 currencies = cells[4].text.split('\n')
                 if len(currencies) > 1 and len(amounts) > 1:
-                    original_amount = download.parse_decimal_number(
+                    original_amount = number_format.parse_decimal_number(
                         amounts[1], 'de_DE'
                     )
                     original_currency = currencies[1]
@@ -368,7 +379,7 @@ class DeutscheKreditBank(download.bank.Bank):
         if balance.endswith('S'):  # Debit.
             balance = '-' + balance
         balance = balance.replace(' S', '').replace(' H', '')
-        return download.parse_decimal_number(balance, 'de_DE')
+        return number_format.parse_decimal_number(balance, 'de_DE')
 
     def _parse_date(self, date_string):
         try:
@@ -392,11 +403,6 @@ class DeutscheKreditBank(download.bank.Bank):
 
     def _wait_to_finish_loading(self):
         """Waits for the loading indicator to disappear on the current page."""
-        browser = self._browser
-        # The loading indicators should be there pretty fast.
-        browser.implicitly_wait(1)
-
-        overlay = lambda: browser.find_element_by_class_name('ajax_loading')
-        download.wait_for_element_to_appear_and_disappear(overlay)
-
-        browser.implicitly_wait(self._WEBDRIVER_TIMEOUT)
+        readiness.wait_until_ready(
+            self._browser, self._LOADING_INDICATORS, name='dkb.loading'
+        )
@@ -1,7 +1,5 @@
 import collections
-import csv
 import datetime
-import getpass
 import logging
 import os
 import os.path
@@ -15,6 +13,10 @@ from selenium.webdriver.support import ui
 from selenium.webdriver import chrome
 from .. import download
 from .. import model
+from .. import number_format
+from .. import prompt
+from ..importer import ib as ib_importer
+from . import readiness
 
 
 logger = logging.getLogger(__name__)
@@ -29,6 +31,8 @@ class InteractiveBrokers(download.bank.Bank):
     _DATE_TIME_FORMAT = '%Y-%m-%d, %H:%M:%S'
     _DATE_FORMAT = '%Y-%m-%d'
     _WEBDRIVER_TIMEOUT = 30
+    _LOADING_INDICATORS = ('loading-overlay', '.progress-bar')
+    _LOGIN_QUIET_MS = 1000
     _SESSION_TIMEOUT_S = 30 * 60
 
     def login(
@@ -65,7 +69,7 @@ class InteractiveBrokers(download.bank.Bank):
         browser.get(self._LOGIN_URL)
 
         if not username:
-            username = input('User name: ')
+            username = prompt.ask('User name: ')
 
         if self.ask_and_restore_cookies(
             browser, username, self._SESSION_TIMEOUT_S
@@ -74,7 +78,7 @@ class InteractiveBrokers(download.bank.Bank):
 
         if not self._is_logged_in():
             if not password:
-                password = getpass.getpass('Password: ')
+                password = prompt.ask_password('Password: ')
 
             # First login phase: User and password.
             try:
@@ -87,14 +91,19 @@ class InteractiveBrokers(download.bank.Bank):
             login_form.find_element_by_id('submitForm').click()
             login_form.find_element_by_id('submitForm').click()
 
-            input('Please follow the log-in instructions and press enter.')
+            prompt.ask('Please follow the log-in instructions and press enter.')
 
             if not self._is_logged_in():
                 raise download.FetchError('Login failed.')
 
-        # It is a bit silly to just sleep here, but other approaches failed, so
-        # this is a simple fix.
-        time.sleep(10)
+        # The portal keeps loading for a while after the login, and isn't
+        # usable before. So the DOM has to be quiet for longer.
+        readiness.wait_until_ready(
+            browser,
+            self._LOADING_INDICATORS,
+            quiet_ms=self._LOGIN_QUIET_MS,
+            name='ib.login',
+        )
 
         self.save_cookies(browser, username)
         self._logged_in = True
@@ -533,7 +542,7 @@ class InteractiveBrokers(download.bank.Bank):
             download.wait_until(csv_filename)
             filename = csv_filename()
             with open(filename, 'r') as csvfile:
-                csv_dict = self._parse_csv_into_dict(csvfile)
+                csv_dict = ib_importer.StatementIndex(csvfile)
                 os.remove(filename)
                 return csv_dict
         except download.OperationTimeoutError:
@@ -551,21 +560,6 @@ class InteractiveBrokers(download.bank.Bank):
                     return path
         return None
 
-    def _parse_csv_into_dict(self, csvfile):
-        reader = csv.reader(csvfile, delimiter=',', quotechar='"')
-        nested_default_dict = lambda: collections.defaultdict(
-            nested_default_dict
-        )
-        csv_dict = nested_default_dict()
-        for row in reader:
-            cur = csv_dict
-            for i, cell in enumerate(row):
-                cur = cur[cell]
-                if '__rows' not in cur:
-                    cur['__rows'] = []
-                cur['__rows'].append(row[i + 1 :])
-        return csv_dict
-
     def _select_date_in_activity_statement(self, input_name, date):
         assert input_name in ('fromDate', 'toDate')
         # The date picker is a bit tricky. It's a jQuery Bootstrap date picker
@@ -616,17 +610,9 @@ class InteractiveBrokers(download.bank.Bank):
 
     def _wait_to_finish_loading(self):
         """Waits for the loading indicator to disappear on the current page."""
-        browser = self._browser
-        # The loading indicators should be there pretty fast.
-        browser.implicitly_wait(1)
-
-        overlay = lambda: browser.find_element_by_tag_name('loading-overlay')
-        download.wait_for_element_to_appear_and_disappear(overlay)
-
-        progressbar = lambda: browser.find_element_by_class_name('progress-bar')
-        download.wait_for_element_to_appear_and_disappear(progressbar)
-
-        browser.implicitly_wait(self._WEBDRIVER_TIMEOUT)
+        readiness.wait_until_ready(
+            self._browser, self._LOADING_INDICATORS, name='ib.loading'
+        )
 
     def _is_element_displayed_now(self, lookup_callable):
         """Doesn't wait for an element but returns if it's displayed now."""
@@ -647,7 +633,7 @@ class InteractiveBrokers(download.bank.Bank):
         return account_name[:last_dot], account_name[last_dot + 1 :]
 
     def _parse_float(self, string):
-        return float(string.replace(',', ''))
+        return number_format.parse_decimal_number(string, 'en_US')
 
     def _parse_int(self, string):
         return int(string.replace(',', ''))
@@ -1,5 +1,4 @@
 import datetime
-import getpass
 import logging
 import re
 import urllib.parse
@@ -10,6 +9,10 @@ from selenium.webdriver.support import ui
 
 from .. import download
 from .. import model
+from .. import number_format
+from .. import prompt
+from .. import text_format
+from . import readiness
 
 
 logger = logging.getLogger(__name__)
@@ -33,6 +36,8 @@ class PostFinance(download.bank.Bank):
     _MINUS_PATTERN = re.compile('\u2212|-')
     _PLUS_PATTERN = re.compile('\+')
     _WEBDRIVER_TIMEOUT = 10
+    # The global overlay, the card overlays and the loading data in cards.
+    _LOADING_INDICATORS = ('.page_loader', '.widget--loading', '.is-loading')
     _SESSION_TIMEOUT_S = 60 * 60
 
     def login(
@@ -54,13 +59,16 @@ class PostFinance(download.bank.Bank):
         self._browser.set_window_size(800, 800)
         self._logged_in = False
         self._accounts = None
+        # The dates from which the credit card stores are complete.
+        self._cc_loaded_from = {}
+        self._stores.clear()
         browser = self._browser
 
         logger.info('Loading login page…')
         browser.get(self._LOGIN_URL)
 
         if not username:
-            username = input('E-Finance number: ')
+            username = prompt.ask('E-Finance number: ')
 
         if self.ask_and_restore_cookies(
             browser, username, self._SESSION_TIMEOUT_S
@@ -69,14 +77,16 @@ class PostFinance(download.bank.Bank):
 
         if not self._is_logged_in():
             if not password:
-                password = getpass.getpass('Password: ')
+                password = prompt.ask_password('Password: ')
 
             try:
                 login_form = browser.find_element_by_name('login')
             except exceptions.NoSuchElementException:
                 raise download.FetchError('Login form not found.')
 
-            use_mobile_login_input = input('Use mobile login? [Yn]: ').lower()
+            use_mobile_login_input = prompt.ask(
+                'Use mobile login? [Yn]: '
+            ).lower()
             use_mobile_login = use_mobile_login_input in ('y', '')
 
             # First login phase: User and password.
@@ -97,7 +107,7 @@ class PostFinance(download.bank.Bank):
                         raise download.FetchError('Login failed.')
                     except exceptions.NoSuchElementException:
                         raise download.FetchError('Mobile ID login error.')
-                print('Please confirm the login on your phone…')
+                prompt.tell('Please confirm the login on your phone…')
                 download.wait_for_element_to_appear_and_disappear(
                     lambda: browser.find_element_by_class_name('pf-spinner'),
                     timeout_s=60,
@@ -116,8 +126,10 @@ class PostFinance(download.bank.Bank):
                         raise download.FetchError(
                             'Security challenge not found.'
                         )
-                print('Challenge:', challenge_element.text)
-                token = input('Login token: ')
+                # One prompt, so that no other bank's prompt comes between.
+                token = prompt.ask(
+                    'Challenge: %s\nLogin token: ' % challenge_element.text
+                )
                 try:
                     login_form = browser.find_element_by_name('login')
                 except exceptions.NoSuchElementException:
@@ -148,10 +160,16 @@ class PostFinance(download.bank.Bank):
         )
 
     def logout(self) -> None:
-        self._browser.find_element_by_css_selector('a.logout').click()
-        self._browser.quit()
+        try:
+            self._browser.find_element_by_css_selector('a.logout').click()
+        finally:
+            # Even if the page is broken, e.g. after an error.
+            self._browser.quit()
         self._logged_in = False
         self._accounts = None
+        # The dates from which the credit card stores are complete.
+        self._cc_loaded_from = {}
+        self._stores.clear()
         self.delete_cookies(self._username)
         self._username = None
 
@@ -422,6 +440,16 @@ class PostFinance(download.bank.Bank):
         return transactions
 
     def _get_credit_card_transactions(self, account, start, end):
+        # Each call pages back from the current period, so later calls for
+        # the same card are answered from the transactions loaded before.
+        loaded_from = self._cc_loaded_from.get(account.name)
+        if loaded_from is not None and loaded_from <= start:
+            transactions = self._stores[account.name].get_range(
+                start, end, reverse=True
+            )
+            logger.info('Found %i loaded transactions.' % len(transactions))
+            return transactions
+
         browser = self._browser
 
         logger.info('Opening credit cards overview…')
@@ -515,11 +543,12 @@ class PostFinance(download.bank.Bank):
             'Found %i transactions before filtering for date range.'
             % len(transactions)
         )
-        transactions = [t for t in transactions if start <= t.date < end]
-
-        # They should be sorted in reverse chronological order already, but
-        # let's make this explicit.
-        transactions.sort(key=lambda t: t.date, reverse=True)
+        # The store keeps the page order of transactions with the same date,
+        # so that the markers stay behind the transactions of their page.
+        store = download.bank.TransactionStore(transactions)
+        self._stores[account.name] = store
+        self._cc_loaded_from[account.name] = start
+        transactions = store.get_range(start, end, reverse=True)
 
         logger.info('Found %i transactions.' % len(transactions))
 
@@ -591,9 +620,9 @@ class PostFinance(download.bank.Bank):
             logger.warning('Skipping transaction with invalid date %s.', date)
             return
 
-        memo = download.normalize_text(memo)
+        memo = text_format.normalize_text(memo)
         try:
-            amount = download.parse_decimal_number(amount, 'de_CH')
+            amount = number_format.parse_decimal_number(amount, 'de_CH')
         except ValueError:
             logger.warning(
                 'Skipping transaction with invalid amount %s.', amount
@@ -610,29 +639,17 @@ class PostFinance(download.bank.Bank):
         self._browser.find_element_by_link_text('Close').click()
 
     def _wait_to_finish_loading(self):
-        """Waits for the loading indicator to disappear on the current page."""
-        browser = self._browser
-        # The loading indicators should be there pretty fast.
-        browser.implicitly_wait(1)
-
-        # Wait for global loading overlay.
-        overlay = lambda: browser.find_element_by_class_name('page_loader')
-        download.wait_for_element_to_appear_and_disappear(overlay)
-        # Wait for any individual card overlays.
-        overlay = lambda: browser.find_element_by_class_name('widget--loading')
-        download.wait_for_element_to_appear_and_disappear(overlay)
-        # Wait for data loading inside cards.
-        overlay = lambda: browser.find_element_by_class_name('is-loading')
-        download.wait_for_element_to_appear_and_disappear(overlay)
-
-        browser.implicitly_wait(self._WEBDRIVER_TIMEOUT)
+        """Waits for the loading indicators to disappear on the current page."""
+        readiness.wait_until_ready(
+            self._browser, self._LOADING_INDICATORS, name='postfinance.loading'
+        )
 
     def _parse_balance(self, balance):
         # A Unicode minus might be used.
         balance = balance.replace('\u2212', '-')
         # Sign is at the end.
         balance = balance[-1] + balance[:-1]
-        return download.parse_decimal_number(balance, 'de_CH')
+        return number_format.parse_decimal_number(balance, 'de_CH')
 
     def _check_logged_in(self):
         if not self._logged_in:
@@ -0,0 +1,216 @@
+"""Waits for pages to be ready, based on signals from within the page.
+
+A script injected with `execute_script` observes the page: a
+MutationObserver notes changes to the DOM, and wrappers of `XMLHttpRequest`
+and `fetch` count the pending requests. A page is ready when it's loaded, no
+requests are pending, the DOM was quiet for a moment and no loading
+indicators are visible. So a wait ends as soon as the page is ready, instead
+of after a fixed sleep, and doesn't wait for indicators that never show up.
+
+The script installs itself on the first check of each page, so navigations
+need no special handling. The latency of each wait is recorded in `STATS`.
+"""
+
+import logging
+import statistics
+import threading
+import time
+from typing import Callable, Iterable
+
+from .. import download
+
+
+# How long the DOM has to be quiet, after the last change or request.
+DEFAULT_QUIET_MS = 250
+DEFAULT_TIMEOUT_S = 10
+
+# Returns the state of the page, installing the observers first if needed.
+# The argument is a list of CSS selectors of loading indicators.
+_STATE_SCRIPT = """
+var state = window.__pybankReadiness;
+if (!state) {
+  state = window.__pybankReadiness = {
+    id: Math.random(), pending: 0, changes: 0, last: performance.now()
+  };
+  var touch = function () { state.last = performance.now(); };
+  new MutationObserver(function () { state.changes++; touch(); }).observe(
+    document, {childList: true, subtree: true, characterData: true});
+  var send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    state.pending++;
+    touch();
+    this.addEventListener('loadend', function () { state.pending--; touch(); });
+    return send.apply(this, arguments);
+  };
+  if (window.fetch) {
+    var fetch = window.fetch;
+    window.fetch = function () {
+      state.pending++;
+      touch();
+      return fetch.apply(window, arguments).finally(
+        function () { state.pending--; touch(); });
+    };
+  }
+}
+var indicators = 0;
+arguments[0].forEach(function (selector) {
+  document.querySelectorAll(selector).forEach(function (element) {
+    if (element.getClientRects().length &&
+        getComputedStyle(element).visibility !== 'hidden') {
+      indicators++;
+    }
+  });
+});
+return {
+  id: state.id,
+  loaded: document.readyState === 'complete',
+  pending: state.pending,
+  changes: state.changes,
+  idle_ms: performance.now() - state.last,
+  indicators: indicators
+};
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class WaitStats:
+    """The latencies of waits, by name. Shared by the threads of a fetch."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: dict[str, list[float]] = {}
+        self._timeouts: dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, timed_out: bool = False):
+        """Records a wait.
+
+        :param name: What was waited for, e.g. "dkb.loading".
+        :param seconds: How long the wait took.
+        :param timed_out: Whether the wait timed out.
+        """
+        with self._lock:
+            self._latencies.setdefault(name, []).append(seconds)
+            if timed_out:
+                self._timeouts[name] = self._timeouts.get(name, 0) + 1
+
+    def get_summary(self) -> list[str]:
+        """Returns one line per name, with the count and latencies of waits.
+
+        :return: The lines, sorted by name.
+        """
+        lines = []
+        with self._lock:
+            for name, latencies in sorted(self._latencies.items()):
+                lines.append(
+                    '%s: %i waits, median %.2f s, max %.2f s, total %.1f s, '
+                    '%i timeouts'
+                    % (
+                        name,
+                        len(latencies),
+                        statistics.median(latencies),
+                        max(latencies),
+                        sum(latencies),
+                        self._timeouts.get(name, 0),
+                    )
+                )
+        return lines
+
+
+STATS = WaitStats()
+
+
+def get_state(browser, indicators: Iterable[str] = ()) -> dict:
+    """Returns the state of the current page.
+
+    :param browser: The browser instance.
+    :param indicators: CSS selectors of loading indicators.
+    :return: The id of the page, whether it's loaded, the number of pending
+    requests, of DOM changes and of visible indicators, and the milliseconds
+    since the last change or request.
+    """
+    return browser.execute_script(_STATE_SCRIPT, list(indicators))
+
+
+def wait_until_ready(
+    browser,
+    indicators: Iterable[str] = (),
+    quiet_ms: int = DEFAULT_QUIET_MS,
+    timeout_s: int = DEFAULT_TIMEOUT_S,
+    name: str = 'page',
+) -> bool:
+    """Waits for the current page to be ready.
+
+    :param browser: The browser instance.
+    :param indicators: CSS selectors of loading indicators.
+    :param quiet_ms: How long the DOM has to be quiet.
+    :param timeout_s: The timeout. The page is used as it is after it.
+    :param name: What is waited for, in `STATS`.
+    :return: Whether the page got ready before the timeout.
+    """
+    indicators = list(indicators)
+    return _wait(
+        lambda: _is_ready(get_state(browser, indicators), quiet_ms),
+        timeout_s,
+        name,
+    )
+
+
+def wait_for_change(
+    browser,
+    action: Callable[[], object],
+    indicators: Iterable[str] = (),
+    quiet_ms: int = DEFAULT_QUIET_MS,
+    timeout_s: int = DEFAULT_TIMEOUT_S,
+    name: str = 'change',
+) -> bool:
+    """Performs an action which changes the page and waits for the result.
+
+    The action may load a new page, or change the current one, e.g. with a
+    request. Either way, the wait ends when the page is ready again.
+
+    :param browser: The browser instance.
+    :param action: The action, e.g. selecting an option.
+    :param indicators: CSS selectors of loading indicators.
+    :param quiet_ms: How long the DOM has to be quiet.
+    :param timeout_s: The timeout. The page is used as it is after it.
+    :param name: What is waited for, in `STATS`.
+    :return: Whether the page got ready before the timeout.
+    """
+    indicators = list(indicators)
+    before = get_state(browser, indicators)
+    action()
+
+    def is_changed_and_ready():
+        state = get_state(browser, indicators)
+        changed = (
+            state['id'] != before['id'] or state['changes'] != before['changes']
+        )
+        return changed and _is_ready(state, quiet_ms)
+
+    return _wait(is_changed_and_ready, timeout_s, name)
+
+
+def _is_ready(state: dict, quiet_ms: int) -> bool:
+    return (
+        state['loaded']
+        and not state['pending']
+        and not state['indicators']
+        and state['idle_ms'] >= quiet_ms
+    )
+
+
+def _wait(condition: Callable[[], bool], timeout_s: int, name: str) -> bool:
+    start = time.monotonic()
+    try:
+        download.wait_until(condition, timeout_s=timeout_s)
+        timed_out = False
+    except download.OperationTimeoutError:
+        logger.info(
+            'Page not ready after %i s, continuing: %s.', timeout_s, name
+        )
+        timed_out = True
+    seconds = time.monotonic() - start
+    logger.debug('Waited %.2f s: %s.', seconds, name)
+    STATS.record(name, seconds, timed_out)
+    return not timed_out
@@ -4,33 +4,41 @@ import datetime
 import glob
 import itertools
 import logging
+import os
 import re
 
+from .. import date_format
 from .. import download
 from .. import model
-
+from .. import number_format
+from . import bank
+
+
+DATE_FORMAT = '%b %d, %Y'
+DATE_HEADER = 'Completed Date'
+DESCRIPTION_HEADER = 'Description'
+BALANCE_HEADER = 'Balance (%s)'
+PAID_OUT_HEADER = 'Paid Out (%s)'
+PAID_OUT_HEADER_REGEX = re.compile(r'Paid Out \((.+)\)')
+PAID_IN_HEADER = 'Paid In (%s)'
+EXCHANGE_OUT_HEADER = 'Exchange Out'
+EXCHANGE_IN_HEADER = 'Exchange In'
+NOTES_HEADER = 'Notes'
+# The only row of statements without transactions.
+NO_TRANSACTIONS = 'No Transactions'
 
 logger = logging.getLogger(__name__)
 
+_parse_float = number_format.get_parser('en_US')
+
 
-class Revolut(download.bank.Bank):
+class Revolut(bank.Bank):
     """Fetcher for Revolut (https://www.revolut.com/).
 
     Revolut doesn't have a Web interface, so we're just working with downloaded
     CSV files.
     """
 
-    _DATE_FORMAT = '%b %d, %Y'
-    _DATE_HEADER = 'Completed Date'
-    _DESCRIPTION_HEADER = 'Description'
-    _BALANCE_HEADER_PATTERN = 'Balance (%s)'
-    _PAID_OUT_HEADER = 'Paid Out (%s)'
-    _PAID_OUT_HEADER_REGEX = re.compile(r'Paid Out \((.+)\)')
-    _PAID_IN_HEADER = 'Paid In (%s)'
-    _EXCHANGE_OUT_HEADER = 'Exchange Out'
-    _EXCHANGE_IN_HEADER = 'Exchange In'
-    _NOTES_HEADER = 'Notes'
-
     def login(
         self,
         username: str | None = None,
@@ -44,12 +52,10 @@ class Revolut(download.bank.Bank):
         logger.info('Scanning statment files: %s.' % ', '.join(filenames))
         self._statement_file_names = []
         for filename in filenames:
-            try:
-                with open(filename, 'r') as f:
-                    self._statement_file_names.append(filename)
-            except (FileNotFoundError, OSError):
+            if os.access(filename, os.R_OK):
+                self._statement_file_names.append(filename)
+            else:
                 logger.error("Couln't read file: " + filename)
-                pass
         if len(self._statement_file_names) > 0:
             logger.info(
                 'Using statment files: %s.'
@@ -71,61 +77,48 @@ class Revolut(download.bank.Bank):
 
     def _fetch_accounts(self):
         logger.debug('Getting accounts from statement files…')
+        filenames = self._statement_file_names
+        jobs = min(len(filenames), os.cpu_count() or 1)
+        if jobs > 1:
+            # Parsing is CPU bound, so the files are read in a process pool.
+            import concurrent.futures
+            import multiprocessing
+
+            # Other banks' browser threads may be running, see fetch, and
+            # forking a process with threads can deadlock.
+            context = multiprocessing.get_context('spawn')
+            with concurrent.futures.ProcessPoolExecutor(
+                jobs, mp_context=context
+            ) as executor:
+                statements = list(executor.map(_read_statement, filenames))
+        else:
+            statements = [_read_statement(f) for f in filenames]
+        # The rows are already correctly typed, so only validated when
+        # debugging, like in the importers.
+        create = model.Payment if self._debug else model.Payment.model_construct
+
         transactions_by_currency = collections.defaultdict(list)
         balance_by_currency = {}
-        for statement_filename in self._statement_file_names:
-            # Get currency.
-            currency = None
-            with open(statement_filename, 'r') as csvfile:
-                reader = csv.reader(csvfile, delimiter=';', quotechar='"')
-                header_row = next(reader)
-                for cell in header_row:
-                    match = self._PAID_OUT_HEADER_REGEX.match(cell.strip())
-                    if match:
-                        currency = match.group(1)
-            if not currency:
-                logger.error(
-                    "Couldn't find currency in statement: " + statement_filename
-                )
+        for statement in statements:
+            if statement is None:
+                continue
+            currency, balance_date, balance, rows = statement
+            if not rows:
                 continue
-            # Get balance and all transactions.
-            balance = None
-            balance_date = None
-            transactions = []
-            with open(statement_filename, 'r') as csvfile:
-                reader = csv.DictReader(csvfile, delimiter=';', quotechar='"')
-                strip_or_none = lambda s: s.strip() if s is not None else None
-                rows = [
-                    {strip_or_none(k): strip_or_none(v) for k, v in row.items()}
-                    for row in reader
-                ]
-                if rows and not (
-                    len(rows) == 1
-                    and rows[0]['Description'] == 'No Transactions'
-                ):
-                    # Get balance.
-                    balance_str = rows[0][
-                        self._BALANCE_HEADER_PATTERN % currency
-                    ]
-                    balance = self._parse_float(balance_str)
-                    balance_date_str = rows[0][self._DATE_HEADER]
-                    balance_date = datetime.datetime.strptime(
-                        balance_date_str, self._DATE_FORMAT
-                    )
-                    if (
-                        currency not in balance_by_currency
-                        or balance_date > balance_by_currency[currency][0]
-                    ):
-                        balance_by_currency[currency] = balance_date, balance
-                    # Get all transactions.
-                    for row in rows:
-                        transactions_by_currency[currency].append(
-                            self._get_transaction_from_row(row, currency)
-                        )
+            transactions_by_currency[currency].extend(
+                create(date=date, amount=amount, memo=memo)
+                for date, amount, memo in rows
+            )
+            if (
+                currency not in balance_by_currency
+                or balance_date > balance_by_currency[currency][0]
+            ):
+                balance_by_currency[currency] = balance_date, balance
 
         accounts = []
         for currency, transactions in transactions_by_currency.items():
             balance_date, balance = balance_by_currency[currency]
+            self._stores[currency] = bank.TransactionStore(transactions)
             accounts.append(
                 model.CreditCard(
                     name=currency,
@@ -137,46 +130,90 @@ class Revolut(download.bank.Bank):
             )
         return accounts
 
-    def _get_transaction_from_row(self, row, currency):
-        date = datetime.datetime.strptime(
-            row[self._DATE_HEADER], self._DATE_FORMAT
-        )
-        description = row[self._DESCRIPTION_HEADER]
-        credit_str = row[self._PAID_IN_HEADER % currency]
-        debit_str = row[self._PAID_OUT_HEADER % currency]
-        exchange_in_str = row[self._EXCHANGE_IN_HEADER]
-        exchange_out_str = row[self._EXCHANGE_OUT_HEADER]
-        notes = row[self._NOTES_HEADER]
-        credit = self._parse_float(credit_str) if credit_str else None
-        debit = self._parse_float(debit_str) if debit_str else None
-        amount = credit if credit else -debit
-        memo = '. '.join(
-            (
-                v
-                for v in (description, exchange_in_str, exchange_out_str, notes)
-                if v
-            )
-        )
-        return model.Payment(date=date, amount=amount, memo=memo)
-
     def get_transactions(
         self,
         account: model.Account,
         start: datetime.datetime,
         end: datetime.datetime,
     ) -> list[model.Transaction]:
-        # Filter transactions in matching account for date range.
-        transactions = []
-        for acc in self.get_accounts():
-            if acc.name == account.name:
-                for transaction in acc.transactions:
-                    if transaction.date >= start and transaction.date < end:
-                        transactions.append(transaction)
+        # Loads the statements and the stores of their accounts.
+        self.get_accounts()
+        store = self._stores.get(account.name)
+        # Latest first, like the statements.
+        transactions = (
+            store.get_range(start, end, reverse=True) if store else []
+        )
         logger.info(
             'Found %i transactions for account %s.'
             % (len(transactions), account.name)
         )
         return transactions
 
-    def _parse_float(self, string):
-        return float(string.replace(',', ''))
+
+def _read_statement(filename):
+    """Reads a statement file in one pass.
+
+    A module function, so that it can run in a worker process.
+
+    :param filename: The statement file.
+    :return: The currency, the balance date and balance, and the date, amount
+    and memo of each transaction, or None if the currency is unknown. Plain
+    tuples, which are much cheaper to send back from a worker than models.
+    """
+    with open(filename, 'r', newline='') as csvfile:
+        reader = csv.reader(csvfile, delimiter=';', quotechar='"')
+        header_row = [cell.strip() for cell in next(reader, [])]
+        currency = None
+        for cell in header_row:
+            match = PAID_OUT_HEADER_REGEX.match(cell)
+            if match:
+                currency = match.group(1)
+        if not currency:
+            logger.error("Couldn't find currency in statement: " + filename)
+            return None
+
+        column = {header: i for i, header in enumerate(header_row)}
+        date_col = column[DATE_HEADER]
+        description_col = column[DESCRIPTION_HEADER]
+        paid_in_col = column[PAID_IN_HEADER % currency]
+        paid_out_col = column[PAID_OUT_HEADER % currency]
+        exchange_in_col = column[EXCHANGE_IN_HEADER]
+        exchange_out_col = column[EXCHANGE_OUT_HEADER]
+        notes_col = column[NOTES_HEADER]
+        balance_col = column[BALANCE_HEADER % currency]
+        width = len(header_row)
+        parse_date = date_format.DateParser(DATE_FORMAT)
+
+        balance = None
+        balance_date = None
+        transactions = []
+        for row in reader:
+            if len(row) < width:
+                row += [''] * (width - len(row))
+            description = row[description_col].strip()
+            if not transactions and description == NO_TRANSACTIONS:
+                continue
+            date = parse_date(row[date_col].strip())
+            if balance_date is None:
+                # The first row is the latest.
+                balance_date = date
+                balance_str = row[balance_col].strip()
+                balance = _parse_float(balance_str) if balance_str else None
+            credit_str = row[paid_in_col].strip()
+            credit = _parse_float(credit_str) if credit_str else None
+            if credit:
+                amount = credit
+            else:
+                amount = -_parse_float(row[paid_out_col].strip())
+            memo = '. '.join(
+                v
+                for v in (
+                    description,
+                    row[exchange_in_col].strip(),
+                    row[exchange_out_col].strip(),
+                    row[notes_col].strip(),
+                )
+                if v
+            )
+            transactions.append((date, amount, memo))
+    return currency, balance_date, balance, transactions
@@ -0,0 +1,149 @@
+"""Detection of the text encoding of statement files.
+
+Only a bounded sample from the start of a file is analyzed, so the detection
+costs the same for small and large files. The results are cached on disk, one
+entry per file, keyed by the path, size, modification time and a hash of the
+sample. Converting the same file again skips the detection.
+
+A file may contain characters after the sample which the encoding detected
+from the sample can't decode. So the rest of a large file is decoded once
+before the result is cached, and if that fails, the encoding is detected from
+the whole file instead.
+"""
+
+import codecs
+import hashlib
+import json
+import logging
+import os
+import os.path
+import tempfile
+
+
+SAMPLE_SIZE = 64 * 1024
+FALLBACK_ENCODING = 'utf-8-sig'
+# The size of the chunks in which the rest of a file is decoded.
+_CHUNK_SIZE = 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def get_cache_dir() -> str:
+    """Returns the directory for pybank's caches.
+
+    :return: The directory under `$XDG_CACHE_HOME`, or `~/.cache`.
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(
+        os.path.expanduser('~'), '.cache'
+    )
+    return os.path.join(cache_home, 'pybank')
+
+
+def detect_encoding(
+    filename: str, hint: str | None = None, use_cache: bool = True
+) -> str:
+    """Returns the encoding of a text file.
+
+    :param filename: The file to inspect.
+    :param hint: The known encoding of the format, if any. Skips the detection.
+    :param use_cache: Whether to use the on-disk cache.
+    :return: The encoding, usable with `open`.
+    """
+    if hint:
+        logger.debug('Using encoding hint: %s.' % hint)
+        return hint
+
+    with open(filename, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        sample = file.read(SAMPLE_SIZE)
+    key = {
+        'path': os.path.abspath(filename),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sample_hash': hashlib.blake2b(sample, digest_size=16).hexdigest(),
+    }
+
+    cache_filename = _get_cache_filename(key['path'])
+    if use_cache:
+        encoding = _read_cache(cache_filename, key)
+        if encoding:
+            logger.debug('Cached encoding: %s.' % encoding)
+            return encoding
+
+    truncated = len(sample) == SAMPLE_SIZE
+    encoding = _detect_sample(sample, truncated)
+    if truncated and not _can_decode(filename, encoding):
+        logger.info(
+            'The encoding %s of the start of %s does not fit the rest. '
+            'Detecting the encoding of the whole file.' % (encoding, filename)
+        )
+        with open(filename, 'rb') as file:
+            encoding = _detect_sample(file.read(), truncated=False)
+    if use_cache:
+        _write_cache(cache_filename, dict(key, encoding=encoding))
+    return encoding
+
+
+def _detect_sample(sample: bytes, truncated: bool) -> str:
+    # Imported on first use, as it is slow to import and cached or hinted
+    # encodings don't need it.
+    import charset_normalizer
+
+    if truncated:
+        # Don't cut a multi-byte character in half.
+        sample = sample[: sample.rfind(b'\n') + 1] or sample
+    encoding_guess = charset_normalizer.from_bytes(sample).best()
+    if not encoding_guess:
+        logger.warning('Failed to detect encoding. Falling back to utf-8.')
+        return FALLBACK_ENCODING
+    logger.debug('Detected encoding: %s.' % encoding_guess.encoding)
+    encoding = encoding_guess.encoding
+    if truncated and encoding.lower() == 'ascii':
+        # The rest of the file may have other characters, e.g. names with
+        # umlauts. UTF-8 decodes ASCII the same.
+        encoding = 'utf_8'
+    # Strip the BOM from UTF-8 files.
+    if encoding.lower() == 'utf_8':
+        encoding = 'utf-8-sig'
+    return encoding
+
+
+def _can_decode(filename: str, encoding: str) -> bool:
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        with open(filename, 'rb') as file:
+            while chunk := file.read(_CHUNK_SIZE):
+                decoder.decode(chunk)
+        decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _get_cache_filename(path: str) -> str:
+    name = hashlib.blake2b(path.encode('utf-8'), digest_size=16).hexdigest()
+    return os.path.join(get_cache_dir(), 'encodings', name + '.json')
+
+
+def _read_cache(cache_filename: str, key: dict) -> str | None:
+    try:
+        with open(cache_filename, 'r', encoding='utf-8') as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if any(entry.get(k) != v for k, v in key.items()):
+        return None
+    return entry.get('encoding')
+
+
+def _write_cache(cache_filename: str, entry: dict) -> None:
+    # Write atomically, other processes might read the entry concurrently.
+    cache_dir = os.path.dirname(cache_filename)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_filename = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(entry, file)
+        os.replace(tmp_filename, cache_filename)
+    except OSError as e:
+        logger.debug('Failed to cache encoding: %s.' % e)
@@ -7,6 +7,22 @@ Supported banks:
 * PostFinance http://www.postfinance.ch/
 * Interactive Brokers http://www.interactivebrokers.com/
 
+Several banks can be fetched at the same time, with a config file:
+
+    [[banks]]
+    bank = "dkb"
+    username = "me"
+    accounts = ["DE12500105170648489890"]
+
+    [[banks]]
+    bank = "revolut"
+    statements = ["statements/revolut-*.csv"]
+
+Each entry can have a `name`, which defaults to the bank, `username`,
+`password`, `accounts`, `statements` and `outfile`. Each bank gets its own
+session in a thread, and the prompts, e.g. for login tokens, are shown one at
+a time.
+
 With inspiration from Jens Herrmann's web_bank.py (http://qoli.de).
 
 For more information see http://github.com/thowi/pybank.
@@ -17,31 +33,56 @@ import logging
 import getopt
 import re
 import sys
+import threading
+from typing import NamedTuple
+
+from pybank import prompt
+from pybank import registry
 
-import pybank.download.dkb
-import pybank.download.ib
-import pybank.download.postfinance
-import pybank.download.revolut
-from pybank import qif
-
-BANK_BY_NAME = {
-    'dkb': pybank.download.dkb.DeutscheKreditBank,
-    'interactivebrokers': pybank.download.ib.InteractiveBrokers,
-    'postfinance': pybank.download.postfinance.PostFinance,
-    'revolut': pybank.download.revolut.Revolut,
-}
+# Bank classes by name. Only the selected bank, and selenium with it, is
+# imported.
+BANK_BY_NAME = registry.BANKS
 DATE_FORMAT = '%Y-%m-%d'
+# Each bank runs a browser, so only a few at a time.
+DEFAULT_JOBS = 4
 INVALID_FILENAME_CHARACTERS_PATTERN = re.compile(r'[^a-zA-Z0-9-_.]')
 LOG_FORMAT = '%(message)s'
 LOG_FORMAT_DEBUG = '%(levelname)s %(name)s: %(message)s'
+# With a config, the log lines are prefixed with the bank, see _run_job.
+LOG_FORMAT_CONFIG = '%(threadName)s: %(message)s'
 
 logger = logging.getLogger(__name__)
 
 
+class Job(NamedTuple):
+    """A bank to fetch, from a config file.
+
+    :param name: The name of the job, unique within the config.
+    :param bank_name: The bank, see `BANK_BY_NAME`.
+    :param username: The user name, if any.
+    :param password: The password, if any.
+    :param accounts: The account names. Default: All accounts.
+    :param statements: The statement files to read, if any.
+    :param output_filename: The output file, if not the default.
+    """
+
+    name: str
+    bank_name: str
+    username: str | None = None
+    password: str | None = None
+    accounts: tuple[str, ...] = ()
+    statements: tuple[str, ...] = ()
+    output_filename: str | None = None
+
+
 class Usage(Exception):
     """Usage: bank.py
     [-h|--help]
     [-b bank|--bank=bank]
+    [-c config|--config=config]        Fetches the banks of a config file at
+        the same time, instead of one --bank.
+    [-j jobs|--jobs=jobs]              Banks fetched at the same time with a
+        config. Default: 4.
     [-u username|--username=username]
     [-p password|--password=password]
     [-a account|--account=account]     Can be repeated. Default: All accounts.
@@ -69,12 +110,16 @@ def _parse_args(argv):
     from_date = None
     till_date = None
     output_filename = None
+    config_filename = None
+    jobs = DEFAULT_JOBS
     debug = False
 
-    options = 'hb:u:a:p:s:f:t:o:d'
+    options = 'hb:c:j:u:a:p:s:f:t:o:d'
     options_long = [
         'help',
         'bank=',
+        'config=',
+        'jobs=',
         'username=',
         'password=',
         'account=',
@@ -91,9 +136,18 @@ def _parse_args(argv):
     for opt, arg in opts:
         if opt in ('-h', '--help'):
             print(Usage())
-            return 0
+            return None
         if opt in ('-b', '--bank'):
             bank_name = arg
+        if opt in ('-c', '--config'):
+            config_filename = arg
+        if opt in ('-j', '--jobs'):
+            try:
+                jobs = int(arg)
+            except ValueError:
+                jobs = 0
+            if jobs < 1:
+                raise Usage('Invalid number of jobs: %s.' % arg)
         if opt in ('-u', '--username'):
             username = arg
         if opt in ('-p', '--password'):
@@ -111,16 +165,19 @@ def _parse_args(argv):
         if opt in ('-d', '--debug'):
             debug = True
 
-    if not bank_name:
-        raise Usage('Must specify a bank.')
-    if bank_name not in BANK_BY_NAME:
-        raise Usage('Unknown bank: %s.', bank_name)
+    if config_filename:
+        if bank_name or username or password or accounts or statements:
+            raise Usage('The banks and their options are in the config.')
+    elif not bank_name:
+        raise Usage('Must specify a bank or a config.')
+    elif bank_name not in BANK_BY_NAME:
+        raise Usage('Unknown bank: %s.' % bank_name)
 
     if from_date:
         try:
             from_date = datetime.datetime.strptime(from_date, DATE_FORMAT)
         except ValueError:
-            raise Usage('Invalid from date: %s.', from_date)
+            raise Usage('Invalid from date: %s.' % from_date)
     else:
         # Beginning of last month.
         now = datetime.datetime.now()
@@ -134,7 +191,7 @@ def _parse_args(argv):
         try:
             till_date = datetime.datetime.strptime(till_date, DATE_FORMAT)
         except ValueError:
-            raise Usage('Invalid until date: %s.', till_date)
+            raise Usage('Invalid until date: %s.' % till_date)
     else:
         # Beginning of this month.
         now = datetime.datetime.now()
@@ -149,10 +206,76 @@ def _parse_args(argv):
         from_date,
         till_date,
         output_filename,
+        config_filename,
+        jobs,
         debug,
     )
 
 
+def load_config(filename: str) -> list[Job]:
+    """Reads the banks to fetch from a config file.
+
+    :param filename: The config file.
+    :return: The jobs, in file order.
+    :raises ValueError: If the file isn't a valid config file.
+    """
+    # Imported here, as it's only needed with a config.
+    import tomllib
+
+    try:
+        with open(filename, 'rb') as file:
+            document = tomllib.load(file)
+    except tomllib.TOMLDecodeError as e:
+        raise ValueError('Invalid config file %s: %s.' % (filename, e))
+    jobs = []
+    names = set()
+    for index, values in enumerate(document.get('banks', [])):
+        if not isinstance(values, dict):
+            raise ValueError('Invalid bank %i: %r.' % (index + 1, values))
+        bank_name = values.get('bank')
+        if bank_name not in BANK_BY_NAME:
+            raise ValueError('Unknown bank %i: %s.' % (index + 1, bank_name))
+        name = _get_string(values, 'name', index) or bank_name
+        if name in names:
+            raise ValueError(
+                'Bank %i needs a unique name: %s.' % (index + 1, name)
+            )
+        names.add(name)
+        jobs.append(
+            Job(
+                name=name,
+                bank_name=bank_name,
+                username=_get_string(values, 'username', index),
+                password=_get_string(values, 'password', index),
+                accounts=_get_strings(values, 'accounts', index),
+                statements=_get_strings(values, 'statements', index),
+                output_filename=_get_string(values, 'outfile', index),
+            )
+        )
+    if not jobs:
+        raise ValueError('No banks in config file %s.' % filename)
+    return jobs
+
+
+def _get_string(values, key, index):
+    value = values.get(key)
+    if value is not None and not isinstance(value, str):
+        raise ValueError('Invalid %s of bank %i: %r.' % (key, index + 1, value))
+    return value
+
+
+def _get_strings(values, key, index):
+    # A string or a list of strings, like the patterns of categorize rules.
+    value = values.get(key, [])
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(
+        isinstance(v, str) for v in value
+    ):
+        raise ValueError('Invalid %s of bank %i: %r.' % (key, index + 1, value))
+    return tuple(value)
+
+
 def _fetch_accounts(
     bank_name,
     username,
@@ -164,11 +287,115 @@ def _fetch_accounts(
     output_filename,
     debug,
 ):
+    bank = _login(bank_name, username, password, statements, debug)
+    writers = {}
+    try:
+        for account in _get_transactions(
+            bank, account_names, from_date, till_date
+        ):
+            filename = _get_filename(
+                output_filename, bank_name, account.name, from_date, till_date
+            )
+            _write_account(writers, filename, account)
+    finally:
+        _close_writers(writers)
+
+    logout = prompt.ask('Logout? [yN] ')
+    if logout == 'y':
+        bank.logout()
+
+
+def _fetch_all(jobs, max_workers, from_date, till_date, output_filename, debug):
+    """Fetches the banks of a config, in a pool of threads.
+
+    The outputs are written in config order, as soon as each bank is done.
+
+    :return: The number of banks which failed.
+    """
+    import concurrent.futures
+
+    failed = 0
+    banks = []
+    writers = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        futures = [
+            executor.submit(_run_job, job, from_date, till_date, debug)
+            for job in jobs
+        ]
+        try:
+            for job, future in zip(jobs, futures):
+                try:
+                    bank, accounts = future.result()
+                except Exception as e:
+                    logger.error(
+                        'Error while fetching %s: %s',
+                        job.name,
+                        e,
+                        exc_info=debug,
+                    )
+                    failed += 1
+                    continue
+                banks.append(bank)
+                for account in accounts:
+                    filename = _get_filename(
+                        job.output_filename or output_filename,
+                        job.bank_name,
+                        account.name,
+                        from_date,
+                        till_date,
+                    )
+                    _write_account(writers, filename, account)
+        except BaseException:
+            # E.g. on Ctrl-C, don't start the waiting banks.
+            executor.shutdown(cancel_futures=True)
+            raise
+        finally:
+            _close_writers(writers)
+
+    if banks:
+        logout = prompt.ask('Logout of all banks? [yN] ')
+        if logout == 'y':
+            for bank in banks:
+                bank.logout()
+    return failed
+
+
+def _run_job(job, from_date, till_date, debug):
+    # Named after the job, for the prompts and the log.
+    threading.current_thread().name = job.name
+    bank = _login(
+        job.bank_name, job.username, job.password, list(job.statements), debug
+    )
+    try:
+        accounts = list(
+            _get_transactions(bank, job.accounts, from_date, till_date)
+        )
+    except BaseException:
+        # Failed banks aren't offered a logout, so close their session now,
+        # before other banks open more browsers.
+        _logout_failed(bank, debug)
+        raise
+    logger.info('Done.')
+    return bank, accounts
+
+
+def _logout_failed(bank, debug):
+    try:
+        bank.logout()
+    except Exception as e:
+        logger.warning('Error while logging out: %s', e, exc_info=debug)
+
+
+def _login(bank_name, username, password, statements, debug):
     bank_class = BANK_BY_NAME[bank_name]
+    # Each bank has its own session, i.e. browser and cookies.
     bank = bank_class(debug)
-
     bank.login(username=username, password=password, statements=statements)
+    return bank
 
+
+def _get_transactions(bank, account_names, from_date, till_date):
+    """Yields the selected accounts of a bank, with their transactions."""
     available_accounts = bank.get_accounts()
     if not available_accounts:
         logger.warning('No accounts found.')
@@ -197,22 +424,40 @@ def _fetch_accounts(
         account.transactions = bank.get_transactions(
             account, from_date, till_date
         )
-        output = _open_file(
-            output_filename, bank_name, account.name, from_date, till_date
-        )
-        try:
-            print(qif.serialize_account(account), file=output)
-        except qif.SerializationError as e:
-            logger.error('Serialization error: %s.', e)
+        yield account
 
-    logout = input('Logout? [yN] ')
-    if logout == 'y':
-        bank.logout()
+
+def _write_account(writers, filename, account):
+    # Imported here, as it loads the model and pydantic with it.
+    from pybank import qif
+
+    # Accounts sharing an output file are written to it one after another.
+    writer = writers.get(filename)
+    if writer is None:
+        output = _open_file(filename)
+        if output is None:
+            return
+        writer = writers[filename] = qif.Writer(output)
+    try:
+        writer.write_account(account)
+    except qif.SerializationError as e:
+        logger.error('Serialization error: %s.', e)
+    writer.flush()
+
+
+def _close_writers(writers):
+    for filename, writer in writers.items():
+        if filename:
+            writer.close()
+        else:
+            writer.flush()
 
 
-def _open_file(output_filename, bank_name, account_name, from_date, till_date):
+def _get_filename(
+    output_filename, bank_name, account_name, from_date, till_date
+):
     if not output_filename:
-        return sys.stdout
+        return None
     filename_vars = {
         'bank': bank_name,
         'account': account_name,
@@ -220,40 +465,64 @@ def _open_file(output_filename, bank_name, account_name, from_date, till_date):
         'till': till_date.strftime(DATE_FORMAT),
     }
     formatted_filename = output_filename % filename_vars
-    escaped_filename = INVALID_FILENAME_CHARACTERS_PATTERN.sub(
-        '_', formatted_filename
-    )
+    return INVALID_FILENAME_CHARACTERS_PATTERN.sub('_', formatted_filename)
+
+
+def _open_file(filename):
+    if not filename:
+        return sys.stdout
     try:
-        logger.info('Writing to file: %s.', escaped_filename)
-        return open(escaped_filename, 'w')
+        logger.info('Writing to file: %s.', filename)
+        return open(filename, 'w')
     except IOError as err:
-        print(err.msg, file=sys.stderr)
+        print(err, file=sys.stderr)
 
 
 def main(argv=None) -> int:
     if argv is None:
         argv = sys.argv
     try:
-        (
-            bank_name,
-            username,
-            password,
-            accounts,
-            statements,
-            from_date,
-            till_date,
-            output_filename,
-            debug,
-        ) = _parse_args(argv)
+        args = _parse_args(argv)
     except Usage as err:
         print(err, file=sys.stderr)
         return 2
+    if args is None:
+        # Printed the help.
+        return 0
+    (
+        bank_name,
+        username,
+        password,
+        accounts,
+        statements,
+        from_date,
+        till_date,
+        output_filename,
+        config_filename,
+        jobs,
+        debug,
+    ) = args
 
     if debug:
         logging.basicConfig(format=LOG_FORMAT_DEBUG, level=logging.DEBUG)
+    elif config_filename:
+        logging.basicConfig(format=LOG_FORMAT_CONFIG, level=logging.INFO)
     else:
         logging.basicConfig(format=LOG_FORMAT, level=logging.INFO)
 
+    if config_filename:
+        try:
+            config = load_config(config_filename)
+        except (OSError, ValueError) as e:
+            logger.error('Error while reading the config: %s', e)
+            return 2
+        failed = _fetch_all(
+            config, jobs, from_date, till_date, output_filename, debug
+        )
+        _log_wait_stats()
+        # Like a batch conversion, some banks may have succeeded.
+        return 1 if failed else 0
+
     try:
         _fetch_accounts(
             bank_name,
@@ -276,8 +545,18 @@ def main(argv=None) -> int:
             pdb.post_mortem()
         return 2
 
+    _log_wait_stats()
     return 0
 
 
+def _log_wait_stats():
+    # Only loaded if a scraper waited for pages, see pybank.download.
+    readiness = sys.modules.get('pybank.download.readiness')
+    if readiness is None:
+        return
+    for line in readiness.STATS.get_summary():
+        logger.debug('Page waits: %s', line)
+
+
 if __name__ == '__main__':
     sys.exit(main())
@@ -0,0 +1,358 @@
+"""Import ids, which identify the source rows of imported transactions.
+
+An import id has three parts, see `docs/importing.md`:
+
+    v1:3f2a9c0d8e7b6a51:0
+
+A version, a hash of normalized source fields and an occurrence index. The
+occurrence index tells apart identical rows of one statement, e.g. two coffees
+on the same day.
+
+New ids are computed with the current version. Matching checks the ids of every
+version, so improving the normalization doesn't strand the ids already written.
+
+`ImportIdIndex` keeps all known ids in an SQLite database, so checking whether
+a row has been seen before is an index lookup instead of a scan of the ledger.
+It also keeps the amount and date of each row for the similarity check, see
+`similarity`.
+"""
+
+import functools
+import hashlib
+import re
+import sqlite3
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
+
+from . import similarity
+
+if TYPE_CHECKING:
+    from . import model
+
+
+CURRENT_VERSION = 'v1'
+# Hex digits of the hash. 64 bits keep collisions unlikely in millions of rows.
+HASH_LENGTH = 16
+# The maximum number of parameters of an SQLite query.
+_QUERY_BATCH_SIZE = 500
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+# The source fields of each transaction type, in hashing order.
+_TEXT_FIELDS = ('payer', 'payee', 'memo', 'symbol')
+_NUMBER_FIELDS = ('quantity', 'price', 'commissions')
+
+
+def _normalize_v1(text: str | None) -> str:
+    if not text:
+        return ''
+    return _WHITESPACE_PATTERN.sub(' ', text).strip().casefold()
+
+
+def _get_fields_v1(transaction: 'model.Transaction') -> str:
+    cls = type(transaction)
+    text_fields, number_fields = _get_model_fields(cls)
+    fields = [
+        cls.__name__,
+        transaction.date.date().isoformat(),
+        '%.4f' % transaction.amount,
+    ]
+    # Fields the type doesn't have are hashed as empty.
+    for field in _TEXT_FIELDS:
+        fields.append(
+            _normalize_v1(getattr(transaction, field))
+            if field in text_fields
+            else ''
+        )
+    for field in _NUMBER_FIELDS:
+        value = getattr(transaction, field) if field in number_fields else None
+        fields.append('' if value is None else '%.6g' % value)
+    return '\x1f'.join(fields)
+
+
+@functools.cache
+def _get_model_fields(cls: type) -> tuple[frozenset[str], frozenset[str]]:
+    # Looking up missing attributes of pydantic models is slow.
+    return (
+        frozenset(f for f in _TEXT_FIELDS if f in cls.model_fields),
+        frozenset(f for f in _NUMBER_FIELDS if f in cls.model_fields),
+    )
+
+
+# The source fields of each version. Add a new version instead of changing one.
+_FIELDS_BY_VERSION: dict[str, Callable[['model.Transaction'], str]] = {
+    'v1': _get_fields_v1,
+}
+VERSIONS = tuple(_FIELDS_BY_VERSION)
+
+
+class IdGenerator:
+    """Computes the import ids of the transactions of one statement.
+
+    The transactions must be passed in file order, for the occurrence index.
+    """
+
+    def __init__(self, version: str = CURRENT_VERSION):
+        """Create a new generator.
+
+        :param version: The version of the ids.
+        :raises ValueError: For unknown versions.
+        """
+        try:
+            self._get_fields = _FIELDS_BY_VERSION[version]
+        except KeyError:
+            raise ValueError('Unknown import id version: %s.' % version)
+        self._version = version
+        self._occurrences: dict[str, int] = {}
+
+    def get_id(self, transaction: 'model.Transaction') -> str:
+        """Returns the import id of the next transaction of the statement.
+
+        :param transaction: The transaction.
+        :return: The import id.
+        """
+        fields = self._get_fields(transaction).encode('utf-8')
+        digest = hashlib.blake2b(fields, digest_size=HASH_LENGTH // 2)
+        key_hash = digest.hexdigest()
+        occurrence = self._occurrences.get(key_hash, 0)
+        self._occurrences[key_hash] = occurrence + 1
+        return '%s:%s:%i' % (self._version, key_hash, occurrence)
+
+
+def compute_ids(
+    transactions: Iterable['model.Transaction'],
+    version: str = CURRENT_VERSION,
+) -> list[str]:
+    """Returns the import ids of the transactions of a statement.
+
+    :param transactions: The transactions, in file order.
+    :param version: The version of the ids.
+    :return: The import ids, in the order of the transactions.
+    """
+    generator = IdGenerator(version)
+    return [generator.get_id(t) for t in transactions]
+
+
+class ImportIdIndex:
+    """A persistent set of the import ids seen per source.
+
+    Ids are scoped by source, e.g. an account, since identical rows of two
+    accounts are different transactions.
+    """
+
+    def __init__(self, filename: str):
+        """Open an index, creating it if needed.
+
+        :param filename: The SQLite database file, or ':memory:'.
+        """
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS import_ids ('
+            ' source TEXT NOT NULL,'
+            ' id TEXT NOT NULL,'
+            ' PRIMARY KEY (source, id)'
+            ') WITHOUT ROWID'
+        )
+        # Ordered like the buckets of the similarity index.
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS rows ('
+            ' source TEXT NOT NULL,'
+            ' amount INTEGER NOT NULL,'
+            ' day INTEGER NOT NULL,'
+            ' id TEXT NOT NULL,'
+            ' PRIMARY KEY (source, amount, day, id)'
+            ') WITHOUT ROWID'
+        )
+        self._connection.commit()
+
+    def __enter__(self) -> 'ImportIdIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Commits pending changes and closes the index."""
+        self._connection.commit()
+        self._connection.close()
+
+    def contains(self, source: str, import_id: str) -> bool:
+        """Returns whether an import id is known.
+
+        :param source: The source of the id.
+        :param import_id: The import id.
+        :return: Whether the id is known.
+        """
+        cursor = self._connection.execute(
+            'SELECT 1 FROM import_ids WHERE source = ? AND id = ?',
+            (source, import_id),
+        )
+        return cursor.fetchone() is not None
+
+    def find_known(self, source: str, import_ids: Iterable[str]) -> set[str]:
+        """Returns which of many import ids are known.
+
+        :param source: The source of the ids.
+        :param import_ids: The import ids.
+        :return: The known ids.
+        """
+        known = set()
+        for chunk in _chunks(list(import_ids), _QUERY_BATCH_SIZE):
+            cursor = self._connection.execute(
+                'SELECT id FROM import_ids WHERE source = ? AND id IN (%s)'
+                % ','.join('?' * len(chunk)),
+                (source, *chunk),
+            )
+            known.update(row[0] for row in cursor)
+        return known
+
+    def add(self, source: str, import_ids: Iterable[str]) -> None:
+        """Adds import ids to the index.
+
+        :param source: The source of the ids.
+        :param import_ids: The import ids.
+        """
+        self._connection.executemany(
+            'INSERT OR IGNORE INTO import_ids (source, id) VALUES (?, ?)',
+            ((source, i) for i in import_ids),
+        )
+        self._connection.commit()
+
+    def add_rows(
+        self, source: str, rows: Iterable[tuple[str, int, int]]
+    ) -> None:
+        """Adds the amounts and dates of rows to the index.
+
+        :param source: The source of the rows.
+        :param rows: The import id, amount key and day number of each row, see
+        `similarity.get_amount_key` and `similarity.get_day`.
+        """
+        self._connection.executemany(
+            'INSERT OR IGNORE INTO rows (source, amount, day, id)'
+            ' VALUES (?, ?, ?, ?)',
+            ((source, a, d, i) for i, a, d in rows),
+        )
+        self._connection.commit()
+
+    def find_rows(
+        self,
+        source: str,
+        amount_keys: Iterable[int],
+        first_day: int,
+        last_day: int,
+    ) -> Iterator[tuple[str, int, int]]:
+        """Yields the rows with some amounts within a date range.
+
+        :param source: The source of the rows.
+        :param amount_keys: The amount keys.
+        :param first_day: The first day number.
+        :param last_day: The last day number.
+        :return: The import id, amount key and day number of each row.
+        """
+        for chunk in _chunks(sorted(set(amount_keys)), _QUERY_BATCH_SIZE):
+            yield from self._connection.execute(
+                'SELECT id, amount, day FROM rows WHERE source = ?'
+                ' AND amount IN (%s) AND day BETWEEN ? AND ?'
+                % ','.join('?' * len(chunk)),
+                (source, *chunk, first_day, last_day),
+            )
+
+
+class SeenFilter:
+    """Filters out the transactions of a statement seen before.
+
+    New transactions similar to known ones are collected in `similar`, with
+    the import ids of the known ones. The new transactions are added to the
+    index by `commit`, once they have been written.
+    """
+
+    def __init__(
+        self,
+        index: ImportIdIndex,
+        source: str,
+        window_days: int = similarity.DEFAULT_WINDOW_DAYS,
+    ):
+        """Create a new filter.
+
+        :param index: The index of the known ids.
+        :param source: The source of the statement.
+        :param window_days: The maximum distance in days of similar rows.
+        """
+        self._index = index
+        self._source = source
+        self._window_days = window_days
+        self._new_rows: list[tuple[str, int, int]] = []
+        self.skipped = 0
+        self.similar: list[tuple['model.Transaction', list[str]]] = []
+
+    def filter(
+        self, transactions: Iterable['model.Transaction']
+    ) -> Iterator['model.Transaction']:
+        """Yields the transactions not seen before.
+
+        Reads the whole statement first, to look up its ids in bulk.
+
+        :param transactions: The transactions of a statement, in file order.
+        :return: The new transactions.
+        """
+        transactions = list(transactions)
+        seen = [False] * len(transactions)
+        for version in VERSIONS:
+            ids = compute_ids(transactions, version)
+            known = self._index.find_known(self._source, ids)
+            for i, import_id in enumerate(ids):
+                if import_id in known:
+                    seen[i] = True
+            if version == CURRENT_VERSION:
+                current_ids = ids
+        new_rows = []
+        new_transactions = []
+        for transaction, import_id, is_seen in zip(
+            transactions, current_ids, seen
+        ):
+            if is_seen:
+                self.skipped += 1
+                continue
+            new_rows.append(
+                (
+                    import_id,
+                    similarity.get_amount_key(transaction.amount),
+                    similarity.get_day(transaction.date),
+                )
+            )
+            new_transactions.append(transaction)
+        self._find_similar(new_transactions, new_rows)
+        self._new_rows.extend(new_rows)
+        yield from new_transactions
+
+    def commit(self) -> None:
+        """Adds the new transactions to the index."""
+        self._index.add(self._source, (i for i, _, _ in self._new_rows))
+        self._index.add_rows(self._source, self._new_rows)
+        self._new_rows = []
+
+    def _find_similar(
+        self,
+        transactions: list['model.Transaction'],
+        rows: list[tuple[str, int, int]],
+    ) -> None:
+        if not rows:
+            return
+        # Only the known rows near the statement, which are few.
+        known = similarity.SimilarityIndex(self._window_days)
+        for import_id, amount_key, day in self._index.find_rows(
+            self._source,
+            (a for _, a, _ in rows),
+            min(d for _, _, d in rows) - self._window_days,
+            max(d for _, _, d in rows) + self._window_days,
+        ):
+            known.add(None, amount_key, day, import_id)
+        # The new rows aren't compared with each other, identical rows of a
+        # statement are told apart by the import id.
+        for transaction, (_, amount_key, day) in zip(transactions, rows):
+            similar = known.find_similar(None, amount_key, day)
+            if similar:
+                self.similar.append((transaction, similar))
+
+
+def _chunks(items: list[str], size: int) -> Iterator[list[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
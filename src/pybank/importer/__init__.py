@@ -1,27 +1,135 @@
 import csv
-import locale
+import dataclasses
+import functools
+import io
 import logging
-import re
-import string
-from typing import TextIO
+import time
+from typing import Callable, Iterator, TextIO, TypeVar
 
+from .. import batch
+from .. import metrics
 from .. import model
+from .. import profiling
 
 
-WHITESPACE_PATTERN = re.compile(r' +')
+# Enough for the metadata and column names of all supported formats.
+PREFIX_SIZE = 16 * 1024
+
+_ModelT = TypeVar('_ModelT', bound=model.Transaction)
+
+# Reasons for skipped rows in the import metrics.
+SKIP_SHORT_ROW = 'short row'
+SKIP_TOTAL_ROW = 'total row'
+SKIP_OTHER_CURRENCY = 'other currency'
+
+# The profiler stages reported as phases in the import metrics.
+_IMPORT_PHASES = (
+    profiling.FORMAT_DETECTION,
+    profiling.PARSING,
+    profiling.MODEL_CONSTRUCTION,
+)
 
 logger = logging.getLogger(__name__)
 
 
+@dataclasses.dataclass(frozen=True)
+class Signature:
+    """Describes how to recognize a file format from the start of the file.
+
+    :param delimiter: The CSV delimiter.
+    :param metadata: Metadata keys and the accepted prefixes of their values,
+    for CSV files with a key/value header (see `read_csv_with_header`). No
+    prefixes accept any value.
+    :param columns: The required column names. Each entry lists alternative
+    names, one of which must be present.
+    :param skip_rows: The number of rows before the column names, if the file
+    has no metadata.
+    """
+
+    delimiter: str = ','
+    metadata: tuple[tuple[str, tuple[str, ...]], ...] = ()
+    columns: tuple[tuple[str, ...], ...] = ()
+    skip_rows: int = 0
+
+    def matches(self, prefix: str) -> bool:
+        """Returns whether the start of a file matches this signature.
+
+        :param prefix: The start of the file, see `read_prefix`.
+        :return: Whether the file matches.
+        """
+        reader = csv.reader(
+            io.StringIO(prefix), delimiter=self.delimiter, quotechar='"'
+        )
+        if self.metadata:
+            metadata, col_names = _read_csv_header(reader)
+            for key, value_prefixes in self.metadata:
+                value = metadata.get(key)
+                if value is None:
+                    return False
+                if value_prefixes and not value.startswith(value_prefixes):
+                    return False
+        else:
+            col_names = None
+            for i, row in enumerate(reader):
+                if i == self.skip_rows:
+                    col_names = row
+                    break
+        if col_names is None:
+            return False
+        col_names = {col.strip() for col in col_names}
+        return all(
+            any(col in col_names for col in alternatives)
+            for alternatives in self.columns
+        )
+
+
 class Importer:
-    """Base class for an importer for financial transactions."""
+    """Base class for an importer for financial transactions.
+
+    Importers supporting auto detection declare a `signature`. Importers for
+    formats with a fixed text encoding declare it as `encoding`.
+
+    Bump the `version` of an importer whenever it imports a file differently,
+    so that cached imports of the old version aren't used anymore.
+    """
 
-    def __init__(self, debug: bool = False):
+    signature: Signature | None = None
+    encoding: str | None = None
+    version: int | str = 1
+
+    @classmethod
+    def get_encoding(cls, filename: str) -> str | None:
+        """Returns the known encoding of a file in this format, if any.
+
+        :param filename: The file.
+        :return: The encoding, or None if it has to be detected.
+        """
+        return cls.encoding
+
+    def __init__(
+        self,
+        debug: bool = False,
+        strict: bool | None = None,
+        profiler: profiling.Profiler | None = None,
+        metrics_sink: metrics.MetricsSink | None = None,
+    ):
         """Create a new importer.
 
         :param debug: Whether to run in debug mode
+        :param strict: Whether to validate the imported transactions. Defaults
+        to the debug mode.
+        :param profiler: Measures the stages of the import, if set.
+        :param metrics_sink: Receives the metrics of each import, if set.
         """
         self._debug = debug
+        self._strict = debug if strict is None else strict
+        if metrics_sink is not None and profiler is None:
+            # The phase times of the metrics come from the profiler.
+            profiler = profiling.Profiler()
+        self._profiler = profiler
+        self._metrics_sink = metrics_sink
+        # The metrics of the current import.
+        self._metrics: metrics.ImportMetrics | None = None
 
     def import_transactions(
         self, file: TextIO, currency: str | None = None
@@ -33,57 +141,173 @@ class Importer:
         :return: The imported transactions
         :raises Exception: If any import error occurs
         """
+        return list(self.iter_transactions(file, currency))
+
+    def import_batch(
+        self, file: TextIO, currency: str | None = None
+    ) -> batch.TransactionBatch:
+        """Imports transactions from a file into a columnar batch.
+
+        :param file: The file object to read from
+        :param currency: Optionally filter the transactions for a currency
+        :return: The imported transactions
+        :raises Exception: If any import error occurs
+        """
+        return batch.TransactionBatch.from_transactions(
+            self.iter_transactions(file, currency), currency
+        )
+
+    def iter_transactions(
+        self, file: TextIO, currency: str | None = None
+    ) -> Iterator[model.Transaction]:
+        """Imports transactions from a file and yields them one by one.
+
+        Importers only read as much of the file as needed for the next
+        transaction, if the format allows it.
+
+        :param file: The file object to read from
+        :param currency: Optionally filter the transactions for a currency
+        :return: An iterator over the imported transactions
+        :raises Exception: If any import error occurs
+        """
+        if self._profiler is None:
+            return self._iter_transactions(file, currency)
+        return self._iter_measured(file, currency)
+
+    def _iter_transactions(
+        self, file: TextIO, currency: str | None = None
+    ) -> Iterator[model.Transaction]:
+        """Imports transactions from a file, see `iter_transactions`.
+
+        Implemented by the importers. Importers report skipped rows with
+        `_skip` and create the transactions with `_create`.
+        """
         raise NotImplementedError()
 
+    def _iter_measured(
+        self, file: TextIO, currency: str | None
+    ) -> Iterator[model.Transaction]:
+        """Like `_iter_transactions`, but profiles and collects metrics."""
+        profiler = self._profiler
+        import_metrics = None
+        if self._metrics_sink is not None:
+            import_metrics = self._metrics = metrics.ImportMetrics(
+                importer=type(self).__name__,
+                source=getattr(file, 'name', None),
+            )
+            file = metrics.CountingFile(file)
+            stats_before = profiler.get_stats()
+        try:
+            with profiler.stage(profiling.PARSING):
+                transactions = self._iter_transactions(file, currency)
+            for transaction in profiler.iterate(
+                profiling.PARSING, transactions
+            ):
+                if import_metrics is not None:
+                    import_metrics.transactions += 1
+                yield transaction
+        except Exception:
+            if import_metrics is not None:
+                import_metrics.parse_failures += 1
+            raise
+        finally:
+            if import_metrics is not None:
+                self._metrics = None
+                import_metrics.rows_read = file.rows
+                import_metrics.bytes_read = file.bytes
+                import_metrics.phase_times = _get_phase_times(
+                    stats_before, profiler.get_stats()
+                )
+                import_metrics.timestamp = time.time()
+                self._metrics_sink.emit(import_metrics)
+
+    def _skip(self, reason: str) -> None:
+        """Counts a row that doesn't result in a transaction.
+
+        :param reason: Why the row was skipped, e.g. "total row".
+        """
+        if self._metrics is not None:
+            self._metrics.skip(reason)
+
+    def _create(self, model_class: type[_ModelT], **values: object) -> _ModelT:
+        """Creates a model instance from the parsed values of a row.
+
+        The importers already produce correctly typed values, so the pydantic
+        validation is skipped unless the importer is strict. Missing required
+        values, e.g. an empty amount, are still rejected.
+
+        :param model_class: The model class, e.g. `model.Payment`.
+        :param values: The field values.
+        :return: The model instance.
+        :raises pydantic.ValidationError: For invalid values in strict mode,
+        and for missing required values.
+        """
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.start(profiling.MODEL_CONSTRUCTION)
+        try:
+            if self._strict or any(
+                values.get(f) is None for f in _get_required_fields(model_class)
+            ):
+                return model_class(**values)
+            return model_class.model_construct(**values)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+
     def can_import(self, file: TextIO) -> bool:
         """Returns whether the importer can import the given file.
 
+        Only looks at the start of the file, see `read_prefix`.
+
         :param file: The file object to read from
         :return: Whether the importer can import the given file
         """
-        raise NotImplementedError()
+        if self.signature is None:
+            return False
+        return self.signature.matches(read_prefix(file))
 
 
-def normalize_text(text: str | None) -> str | None:
-    """Returns a normalized version of the input text.
+def _get_phase_times(
+    stats_before: dict[str, tuple[float, float, int]],
+    stats_after: dict[str, tuple[float, float, int]],
+) -> dict[str, float]:
+    phase_times = {}
+    for phase, (wall, cpu, calls) in stats_after.items():
+        wall_before = stats_before.get(phase, (0.0, 0.0, 0))[0]
+        if phase in _IMPORT_PHASES and wall > wall_before:
+            phase_times[phase] = wall - wall_before
+    return phase_times
 
-    Removes double spaces and "Capitalizes All Words" if they are "ALL CAPS".
 
-    :param text: The input text.
-    :return: A normalized version of the input text.
-    """
-    if text is None:
-        return None
-    text = WHITESPACE_PATTERN.sub(' ', text)
-    lines = []
-    for line in text.splitlines():
-        line = line.strip()
-        if line.isupper():
-            line = string.capwords(line)
-        lines.append(line)
-    return '\n'.join(lines)
-
-
-def parse_decimal_number(number_string: str, lang: str) -> float:
-    """Parses a decimal number string into a float.
-
-    Can also handle thousands separators.
-
-    :param number_string: The decimal number as a string.
-    :param lang: The locale of the format.
-    :return: The parsed number.
-    :raises ValueError: If the string is not a valid decimal number.
+@functools.cache
+def _get_required_fields(
+    model_class: type[model.Transaction],
+) -> tuple[str, ...]:
+    return tuple(
+        name
+        for name, field in model_class.model_fields.items()
+        if field.is_required()
+    )
+
+
+def read_prefix(file: TextIO, size: int = PREFIX_SIZE) -> str:
+    """Returns the complete lines at the start of a file.
+
+    Reads at most `size` characters, so the cost doesn't depend on the file
+    size. Rewinds the file afterwards.
+
+    :param file: The file object to read from.
+    :param size: The maximum number of characters to read.
+    :return: The start of the file.
     """
-    orig_locale = locale.getlocale(locale.LC_ALL)
-    locale.setlocale(locale.LC_ALL, lang)
-    thousands_sep = locale.localeconv()['mon_thousands_sep']
-    if lang == 'de_CH':  # Buggy Swiss locale.
-        locale.setlocale(locale.LC_ALL, 'en_US')
-        thousands_sep = "'"
-    try:
-        return locale.atof(number_string.replace(thousands_sep, ''))
-    finally:
-        locale.setlocale(locale.LC_ALL, orig_locale)
+    file.seek(0)
+    prefix = file.read(size)
+    file.seek(0)
+    if len(prefix) == size:
+        # The last line is probably cut off.
+        prefix = prefix[: prefix.rfind('\n') + 1]
+    return prefix
 
 
 def read_csv_with_header(
@@ -101,45 +325,85 @@ def read_csv_with_header(
     :return: The metadata as a dict and the rows as a list of dicts, each
     mapping from the columen name to the value (similar to `DictReader`).
     """
+    metadata, rows = iter_csv_with_header(file)
+    return metadata, list(rows)
+
+
+def iter_csv_with_header(
+    file: TextIO, skip: Callable[[str], None] | None = None
+) -> tuple[dict[str, str], Iterator[dict[str, str]]]:
+    """Like `read_csv_with_header`, but reads the rows lazily.
+
+    The metadata and column names are read right away. The rows are only read
+    from the file while iterating, so the file must stay open until then.
+
+    :param file: The file object to read from.
+    :param skip: Called with the reason for each skipped row after the column
+    names, e.g. `Importer._skip`.
+    :return: The metadata as a dict and an iterator over the rows as dicts.
+    """
     # In case the file was read before, e.g. in the can_import pass.
     file.seek(0)
     reader = csv.reader(file, delimiter=';', quotechar='"')
-    # Read metadata.
+    metadata, col_names = _read_csv_header(reader)
+    return metadata, _iter_csv_rows(reader, col_names, skip)
+
+
+def _read_csv_header(
+    reader: Iterator[list[str]],
+) -> tuple[dict[str, str], list[str] | None]:
+    """Reads the metadata and column names of a CSV file with a header.
+
+    :param reader: The CSV reader, positioned at the start of the file.
+    :return: The metadata as a dict and the column names, if any.
+    """
     metadata = {}
-    col_names = None
-    rows = []
     for row in reader:
-        # Clean up the row.
-        # Some CSVs wrap the values in a formula syntax.
-        clean_row = []
-        for col in row:
-            if col.startswith('="') and col.endswith('"'):
-                col = col[2:-1]  # strip ="
-            clean_row.append(col)
-        row = clean_row
-
         # Remove empty metadata columns.
-        if not col_names:
-            row = [col for col in row if col]
+        row = [col for col in _clean_csv_row(row) if col]
 
         # Skip empty/irrelevant rows.
         if len(row) < 2:
             continue
 
         # Read metadata.
-        if len(row) == 2 and not col_names:
+        if len(row) == 2:
             metadata[row[0]] = row[1]
             continue
 
         # Read column names.
-        if not col_names:
-            col_names = row
+        return metadata, row
+    return metadata, None
+
+
+def _iter_csv_rows(
+    reader: Iterator[list[str]],
+    col_names: list[str] | None,
+    skip: Callable[[str], None] | None,
+) -> Iterator[dict[str, str]]:
+    if not col_names:
+        return
+    for row in reader:
+        row = _clean_csv_row(row)
+
+        # Skip empty/irrelevant rows.
+        if len(row) < 2:
+            if skip is not None:
+                skip(SKIP_SHORT_ROW)
             continue
 
         # Read transaction rows.
-        rows.append(dict(zip(col_names, row)))
+        yield dict(zip(col_names, row))
+
 
-    return metadata, rows
+def _clean_csv_row(row: list[str]) -> list[str]:
+    # Some CSVs wrap the values in a formula syntax.
+    clean_row = []
+    for col in row:
+        if col.startswith('="') and col.endswith('"'):
+            col = col[2:-1]  # strip ="
+        clean_row.append(col)
+    return clean_row
 
 
 def get_value(row: dict[str, str], keys: list[str]) -> str | None:
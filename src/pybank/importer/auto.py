@@ -1,18 +1,27 @@
 import logging
-from typing import TextIO
+from typing import Iterator, TextIO
 
 from .. import importer
 from .. import model
+from .. import profiling
 from . import dkb
+from . import ib
 from . import postfinance
+from . import revolut
+from . import schwab
+from . import wise
 
 
-# TODO: Add more importers.
+# Importers with a signature, in the order they are tried.
 IMPORTERS = (
     dkb.DkbCheckingImporter,
     dkb.DkbCreditCardImporter,
     postfinance.PostFinanceCheckingImporter,
     postfinance.PostFinanceCreditCardImporter,
+    ib.InteractiveBrokersImporter,
+    wise.WiseImporter,
+    revolut.RevolutImporter,
+    schwab.SchwabBrokerageImporter,
 )
 
 
@@ -22,25 +31,50 @@ logger = logging.getLogger(__name__)
 class AutoImporter(importer.Importer):
     """Automatically detects the importer.
 
-    Note that not all importers support auto detection yet.
+    Only the start of the file is read for the detection, once for all
+    importers. Note that not all importers support auto detection yet.
     """
 
+    # Changes with the version of any of the detected importers.
+    version = ','.join('%s:%s' % (c.__name__, c.version) for c in IMPORTERS)
+
+    @classmethod
+    def get_encoding(cls, filename: str) -> str | None:
+        # The prefix is decoded as Latin-1, which decodes any bytes. The
+        # importers declaring an encoding use single-byte ones close to it,
+        # so their signatures still match.
+        with open(filename, 'r', encoding='latin-1', newline='') as file:
+            prefix = importer.read_prefix(file)
+        for importer_class in IMPORTERS:
+            if importer_class.signature.matches(prefix):
+                return importer_class.encoding
+        return None
+
     def can_import(self, file: TextIO) -> bool:
         return self._detect(file) is not None
 
-    def import_transactions(
+    def _iter_transactions(
         self, file: TextIO, currency: str | None = None
-    ) -> list[model.Transaction]:
-        importer = self._detect(file)
-        if importer is None:
+    ) -> Iterator[model.Transaction]:
+        if self._profiler is not None:
+            with self._profiler.stage(profiling.FORMAT_DETECTION):
+                detected = self._detect(file)
+        else:
+            detected = self._detect(file)
+        if detected is None:
             raise ValueError('No importer found for input')
-        return importer.import_transactions(file=file, currency=currency)
+        if self._metrics is not None:
+            # Report the metrics of the detected importer as this import's.
+            self._metrics.importer = type(detected).__name__
+            detected._metrics = self._metrics
+        return detected._iter_transactions(file=file, currency=currency)
 
-    def _detect(self, file: TextIO) -> importer.Importer:
+    def _detect(self, file: TextIO) -> importer.Importer | None:
+        prefix = importer.read_prefix(file)
         for importer_class in IMPORTERS:
-            importer = importer_class(self._debug)
-            if importer.can_import(file):
+            if importer_class.signature.matches(prefix):
                 logger.info(
                     f'Auto-detected importer: {importer_class.__name__}.'
                 )
-                return importer
+                return importer_class(self._debug, self._strict, self._profiler)
+        return None
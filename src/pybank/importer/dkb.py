@@ -1,9 +1,11 @@
-import datetime
 import logging
-from typing import TextIO
+from typing import Iterator, TextIO
 
+from .. import date_format
 from .. import importer
 from .. import model
+from .. import number_format
+from .. import text_format
 
 
 DATE_FORMAT_LONG = '%d.%m.%Y'
@@ -29,55 +31,43 @@ CC_PREFIXES = '4748', '4917', '499811'
 
 logger = logging.getLogger(__name__)
 
-
-def _parse_date(date_str: str) -> datetime.datetime:
-    """Parse date from string in DKB format"""
-    try:
-        return datetime.datetime.strptime(date_str, DATE_FORMAT_LONG)
-    except ValueError:
-        return datetime.datetime.strptime(date_str, DATE_FORMAT_SHORT)
-
-
-def _has_minimal_columns(rows: list[dict[str, str]]) -> bool:
-    return (
-        importer.get_value(rows[0], DATE_COLS) is not None
-        and importer.get_value(rows[0], AMOUNT_COLS) is not None
-        and importer.get_value(rows[0], MEMO_COLS) is not None
-    )
+_parse_amount = number_format.get_parser('de_DE')
 
 
 class _DkbImporter(importer.Importer):
     # This base method is generic enough for both checking and credit card.
-    def import_transactions(
+    def _iter_transactions(
         self, file: TextIO, currency: str | None = None
-    ) -> list[model.Payment]:
+    ) -> Iterator[model.Payment]:
         """Import transactions from DKB CSV file"""
-        metadata, rows = importer.read_csv_with_header(file)
+        metadata, rows = importer.iter_csv_with_header(file, self._skip)
+        parse_date = date_format.DateParser(DATE_FORMAT_LONG, DATE_FORMAT_SHORT)
         # TODO: Support different currencies.
 
         # Get transactions.
-        transactions = []
+        count = 0
         for row in rows:
             date_str = importer.get_value(row, DATE_COLS)
-            date = _parse_date(date_str)
+            date = parse_date(date_str)
 
             amount_str = importer.get_value(row, AMOUNT_COLS)
-            amount = importer.parse_decimal_number(amount_str, 'de_DE')
+            amount = _parse_amount(amount_str)
 
             # Older DKB CSVs have a single column for payee and payer.
             payer_payee_str = row.get(PAYEE_PAYER_COL)
+            payer = payee = None
             if payer_payee_str:
-                payer_payee = importer.normalize_text(payer_payee_str)
+                payer_payee = text_format.normalize_text(payer_payee_str)
                 if amount < 0:
                     payee = payer_payee
                 else:
                     payer = payer_payee
             else:
-                payer = importer.normalize_text(row.get(PAYER_COL))
-                payee = importer.normalize_text(row.get(PAYEE_COL))
+                payer = text_format.normalize_text(row.get(PAYER_COL))
+                payee = text_format.normalize_text(row.get(PAYEE_COL))
 
             memo_str = importer.get_value(row, MEMO_COLS)
-            memo = importer.normalize_text(memo_str)
+            memo = text_format.normalize_text(memo_str)
 
             acc = 'Account: ' + row[ACC_COL] if row.get(ACC_COL) else None
             routing = (
@@ -92,34 +82,29 @@ class _DkbImporter(importer.Importer):
             memo_parts = memo, orig_amount, acc, routing
             memo = '. '.join(filter(bool, memo_parts))
 
-            transactions.append(
-                model.Payment(
-                    date=date,
-                    amount=amount,
-                    payer=payer,
-                    payee=payee,
-                    memo=memo,
-                )
+            yield self._create(
+                model.Payment,
+                date=date,
+                amount=amount,
+                payer=payer,
+                payee=payee,
+                memo=memo,
             )
-        logger.info('Imported %d transactions.' % len(transactions))
-        return transactions
+            count += 1
+        logger.info('Imported %d transactions.' % count)
 
 
 class DkbCheckingImporter(_DkbImporter):
-    def can_import(self, file: TextIO) -> bool:
-        metadata, rows = importer.read_csv_with_header(file)
-        return (
-            'Girokonto' in metadata
-            and metadata['Girokonto'].startswith('DE6412030000')
-            and _has_minimal_columns(rows)
-        )
+    signature = importer.Signature(
+        delimiter=';',
+        metadata=(('Girokonto', ('DE6412030000',)),),
+        columns=(DATE_COLS, AMOUNT_COLS, MEMO_COLS),
+    )
 
 
 class DkbCreditCardImporter(_DkbImporter):
-    def can_import(self, file: TextIO) -> bool:
-        metadata, rows = importer.read_csv_with_header(file)
-        return (
-            'Kreditkarte:' in metadata
-            and any(metadata['Kreditkarte:'].startswith(p) for p in CC_PREFIXES)
-            and _has_minimal_columns(rows)
-        )
+    signature = importer.Signature(
+        delimiter=';',
+        metadata=(('Kreditkarte:', CC_PREFIXES),),
+        columns=(DATE_COLS, AMOUNT_COLS, MEMO_COLS),
+    )
@@ -1,28 +1,67 @@
 import collections
 import csv
-import datetime
 import logging
 import re
-from typing import Any, TextIO
+from typing import Iterator, TextIO
 
+from .. import batch
+from .. import date_format
 from .. import importer
 from .. import model
+from .. import number_format
 
 
 DATE_TIME_FORMAT = '%Y-%m-%d, %H:%M:%S'
 DATE_FORMAT = '%Y-%m-%d'
 
+# Key for the remaining cells of the rows in a `StatementIndex` node.
+ROWS_KEY = '__rows'
+
 logger = logging.getLogger(__name__)
 
 
 class InteractiveBrokersImporter(importer.Importer):
     """Importer for Interactive Brokers (https://www.interactivebrokers.com/)."""
 
-    def import_transactions(
+    # Activity statements start with a "Statement,Header,..." row.
+    signature = importer.Signature(columns=(('Statement',), ('Header',)))
+
+    def _iter_transactions(
         self, file: TextIO, currency: str | None = None
-    ) -> list[model.Transaction]:
+    ) -> Iterator[model.Transaction]:
         """Import transactions from IB statement file"""
-        csv_dict = self._parse_csv_into_dict(file)
+        transactions_by_currency = self._import_by_currency(file)
+        transactions = transactions_by_currency.get(currency, [])
+        logger.info(
+            'Found %i transactions for currency %s.'
+            % (len(transactions), currency)
+        )
+        return iter(transactions)
+
+    def import_batch(
+        self, file: TextIO, currency: str | None = None
+    ) -> batch.TransactionBatch:
+        """Imports transactions from a file into a columnar batch.
+
+        A statement covers several currencies. Without a currency, the batch
+        has the transactions of all currencies.
+        """
+        if currency is not None:
+            return super().import_batch(file, currency)
+        transactions = batch.TransactionBatch()
+        transactions_by_currency = self._import_by_currency(file)
+        for category_currency, category in transactions_by_currency.items():
+            for transaction in category:
+                transactions.append(transaction, category_currency)
+        logger.info('Found %i transactions.' % len(transactions))
+        return transactions
+
+    def _import_by_currency(
+        self, file: TextIO
+    ) -> dict[str, list[model.Transaction]]:
+        self._parse_date = date_format.DateParser(DATE_FORMAT)
+        self._parse_date_time = date_format.DateParser(DATE_TIME_FORMAT)
+        csv_dict = StatementIndex(file)
 
         transfers = self._get_transfers(csv_dict)
         trades = self._get_trades(csv_dict)
@@ -31,7 +70,7 @@ class InteractiveBrokersImporter(importer.Importer):
         interest = self._get_interest(csv_dict)
         other_fees = self._get_other_fees(csv_dict)
 
-        # Collect transactions for all currencies. Later filter by currency.
+        # Collect transactions for all currencies.
         transactions_by_currency = collections.defaultdict(list)
         for category in (
             transfers,
@@ -43,31 +82,7 @@ class InteractiveBrokersImporter(importer.Importer):
         ):
             for category_currency, transactions in list(category.items()):
                 transactions_by_currency[category_currency] += transactions
-
-        transactions = []
-        if currency in transactions_by_currency:
-            transactions = transactions_by_currency[currency]
-        logger.info(
-            'Found %i transactions for currency %s.'
-            % (len(transactions), currency)
-        )
-        return transactions
-
-    def _parse_csv_into_dict(self, csvfile: TextIO) -> dict[str, Any]:
-        """Parse CSV file into nested dictionary structure"""
-        reader = csv.reader(csvfile, delimiter=',', quotechar='"')
-        nested_default_dict = lambda: collections.defaultdict(
-            nested_default_dict
-        )
-        csv_dict = nested_default_dict()
-        for row in reader:
-            cur = csv_dict
-            for i, cell in enumerate(row):
-                cur = cur[cell]
-                if '__rows' not in cur:
-                    cur['__rows'] = []
-                cur['__rows'].append(row[i + 1 :])
-        return csv_dict
+        return transactions_by_currency
 
     def _get_transfers(self, csv_dict):
         logger.debug('Extracting transfers…')
@@ -76,11 +91,12 @@ class InteractiveBrokersImporter(importer.Importer):
         for row in csv_dict['Deposits & Withdrawals']['Data']['__rows']:
             currency = row[0]
             if currency.startswith('Total'):
+                self._skip(importer.SKIP_TOTAL_ROW)
                 continue
-            date = datetime.datetime.strptime(row[1], DATE_FORMAT)
+            date = self._parse_date(row[1])
             kind = row[2]
             amount = _parse_float(row[3])
-            transaction = model.Payment(date=date, amount=amount)
+            transaction = self._create(model.Payment, date=date, amount=amount)
             transactions_by_currency[currency].append(transaction)
 
         return transactions_by_currency
@@ -98,7 +114,7 @@ class InteractiveBrokersImporter(importer.Importer):
         for row in st + ot:
             currency = row[0]
             symbol = row[1]
-            date = datetime.datetime.strptime(row[2], DATE_TIME_FORMAT)
+            date = self._parse_date_time(row[2])
             quantity = _parse_float(row[3])
             price = _parse_float(row[4])
             proceeds = _parse_float(row[6])
@@ -106,7 +122,8 @@ class InteractiveBrokersImporter(importer.Importer):
             commissions = -_parse_float(row[7])
             amount = proceeds - commissions
             if quantity >= 0:
-                transaction = model.InvestmentSecurityPurchase(
+                transaction = self._create(
+                    model.InvestmentSecurityPurchase,
                     date=date,
                     symbol=symbol,
                     quantity=quantity,
@@ -115,7 +132,8 @@ class InteractiveBrokersImporter(importer.Importer):
                     amount=amount,
                 )
             else:
-                transaction = model.InvestmentSecuritySale(
+                transaction = self._create(
+                    model.InvestmentSecuritySale,
                     date=date,
                     symbol=symbol,
                     quantity=-quantity,
@@ -132,7 +150,7 @@ class InteractiveBrokersImporter(importer.Importer):
             symbol = row[1]
             to_currency, from_currency = symbol.split('.')
             assert currency == from_currency
-            date = datetime.datetime.strptime(row[2], DATE_TIME_FORMAT)
+            date = self._parse_date_time(row[2])
             quantity = _parse_float(row[3])
             price = _parse_float(row[4])
             proceeds = _parse_float(row[6])
@@ -153,7 +171,8 @@ class InteractiveBrokersImporter(importer.Importer):
             )
             quantity = abs(quantity)
             transactions_by_currency[buy_currency].append(
-                model.InvestmentSecuritySale(
+                self._create(
+                    model.InvestmentSecuritySale,
                     date=date,
                     symbol=symbol,
                     quantity=quantity,
@@ -164,7 +183,8 @@ class InteractiveBrokersImporter(importer.Importer):
                 )
             )
             transactions_by_currency[sell_currency].append(
-                model.InvestmentSecurityPurchase(
+                self._create(
+                    model.InvestmentSecurityPurchase,
                     date=date,
                     symbol=symbol,
                     quantity=quantity,
@@ -179,7 +199,8 @@ class InteractiveBrokersImporter(importer.Importer):
             # TODO: Find out the main currency/account. Don't just hardcode
             # CHF.
             transactions_by_currency['CHF'].append(
-                model.InvestmentMiscExpense(
+                self._create(
+                    model.InvestmentMiscExpense,
                     date=date,
                     amount=commissions,
                     symbol=symbol,
@@ -196,20 +217,29 @@ class InteractiveBrokersImporter(importer.Importer):
         for row in csv_dict['Withholding Tax']['Data']['__rows']:
             currency = row[0]
             if currency.startswith('Total'):
+                self._skip(importer.SKIP_TOTAL_ROW)
                 continue
-            date = datetime.datetime.strptime(row[1], DATE_FORMAT)
+            date = self._parse_date(row[1])
             description = row[2]
             amount = _parse_float(row[3])
             symbol = re.split('[ (]', description)[0]
             memo = description
             if amount < 0:
-                transaction = model.InvestmentMiscExpense(
-                    date=date, amount=amount, symbol=symbol, memo=memo
+                transaction = self._create(
+                    model.InvestmentMiscExpense,
+                    date=date,
+                    amount=amount,
+                    symbol=symbol,
+                    memo=memo,
                 )
             else:
                 # Possibly a correction for previous withholding tax.
-                transaction = model.InvestmentMiscIncome(
-                    date=date, amount=amount, symbol=symbol, memo=memo
+                transaction = self._create(
+                    model.InvestmentMiscIncome,
+                    date=date,
+                    amount=amount,
+                    symbol=symbol,
+                    memo=memo,
                 )
             transactions_by_currency[currency].append(transaction)
 
@@ -222,14 +252,19 @@ class InteractiveBrokersImporter(importer.Importer):
         for row in csv_dict['Dividends']['Data']['__rows']:
             currency = row[0]
             if currency.startswith('Total'):
+                self._skip(importer.SKIP_TOTAL_ROW)
                 continue
-            date = datetime.datetime.strptime(row[1], DATE_FORMAT)
+            date = self._parse_date(row[1])
             description = row[2]
             amount = _parse_float(row[3])
             symbol = re.split('[ (]', description)[0]
             memo = description
-            transaction = model.InvestmentDividend(
-                date=date, symbol=symbol, amount=amount, memo=memo
+            transaction = self._create(
+                model.InvestmentDividend,
+                date=date,
+                symbol=symbol,
+                amount=amount,
+                memo=memo,
             )
             transactions_by_currency[currency].append(transaction)
 
@@ -242,18 +277,25 @@ class InteractiveBrokersImporter(importer.Importer):
         for row in csv_dict['Interest']['Data']['__rows']:
             currency = row[0]
             if currency.startswith('Total'):
+                self._skip(importer.SKIP_TOTAL_ROW)
                 continue
-            date = datetime.datetime.strptime(row[1], DATE_FORMAT)
+            date = self._parse_date(row[1])
             description = row[2]
             amount = _parse_float(row[3])
             memo = description
             if amount < 0:
-                transaction = model.InvestmentInterestExpense(
-                    date=date, amount=amount, memo=memo
+                transaction = self._create(
+                    model.InvestmentInterestExpense,
+                    date=date,
+                    amount=amount,
+                    memo=memo,
                 )
             else:
-                transaction = model.InvestmentInterestIncome(
-                    date=date, amount=amount, memo=memo
+                transaction = self._create(
+                    model.InvestmentInterestIncome,
+                    date=date,
+                    amount=amount,
+                    memo=memo,
                 )
             transactions_by_currency[currency].append(transaction)
 
@@ -265,19 +307,143 @@ class InteractiveBrokersImporter(importer.Importer):
         transactions_by_currency = collections.defaultdict(list)
         for row in csv_dict['Fees']['Data']['Other Fees']['__rows']:
             currency = row[0]
-            date = datetime.datetime.strptime(row[1], DATE_FORMAT)
+            date = self._parse_date(row[1])
             description = row[2]
             amount = _parse_float(row[3])
             memo = description
             symbol = ''
-            transaction = model.InvestmentMiscExpense(
-                date=date, amount=amount, symbol=symbol, memo=memo
+            transaction = self._create(
+                model.InvestmentMiscExpense,
+                date=date,
+                amount=amount,
+                symbol=symbol,
+                memo=memo,
             )
             transactions_by_currency[currency].append(transaction)
 
         return transactions_by_currency
 
 
-def _parse_float(string: str) -> float:
-    """Parse float value from string"""
-    return importer.parse_decimal_number(string, 'en_US')
+class StatementIndex:
+    """Index over the rows of an IB activity statement.
+
+    Statements are CSV files made of many sections, each row starting with the
+    section name, the row type and often a discriminator, e.g.
+    `Trades,Data,Order,Stocks,...`. Lookups work like on a nested dict keyed by
+    the leading cells: `index['Trades']['Data']['Order']['Stocks']['__rows']`
+    returns the remaining cells of all matching rows.
+
+    The file is read in a single pass, keeping the raw lines of every section.
+    A section is only parsed on first access, and its deeper levels are only
+    grouped when they are looked up. Every row is held exactly once.
+    """
+
+    def __init__(self, file: TextIO):
+        """Read a statement.
+
+        :param file: The statement file.
+        """
+        self._lines_by_section: dict[str, list[str]] = {}
+        self._sections: dict[str, _IndexNode] = {}
+        for record in _iter_records(file):
+            section = _get_first_cell(record)
+            lines = self._lines_by_section.get(section)
+            if lines is None:
+                lines = self._lines_by_section[section] = []
+            lines.append(record)
+
+    def __getitem__(self, section: str) -> '_IndexNode':
+        node = self._sections.get(section)
+        if node is None:
+            lines = self._lines_by_section.pop(section, [])
+            rows = list(csv.reader(lines, delimiter=',', quotechar='"'))
+            node = self._sections[section] = _IndexNode(rows, 1)
+        return node
+
+    def __contains__(self, section: str) -> bool:
+        return section in self._lines_by_section or section in self._sections
+
+    def keys(self) -> list[str]:
+        return list(self._sections) + list(self._lines_by_section)
+
+
+class _IndexNode:
+    """The rows of a statement sharing their first `depth` cells."""
+
+    __slots__ = ('_children', '_depth', '_rows')
+
+    def __init__(self, rows: list[list[str]], depth: int):
+        self._rows = rows
+        self._depth = depth
+        self._children: dict[str, _IndexNode] | None = None
+
+    def __getitem__(self, key: str):
+        if key == ROWS_KEY:
+            return self._get_rows()
+        node = self._get_children().get(key)
+        if node is None:
+            node = _IndexNode([], self._depth + 1)
+        return node
+
+    def __contains__(self, key: str) -> bool:
+        if key == ROWS_KEY:
+            return bool(self._rows)
+        return key in self._get_children()
+
+    def get(self, key: str, default=None):
+        if key not in self:
+            return default
+        return self[key]
+
+    def keys(self) -> list[str]:
+        keys = list(self._get_children())
+        if self._rows:
+            keys.append(ROWS_KEY)
+        return keys
+
+    def _get_rows(self) -> list[list[str]]:
+        depth = self._depth
+        return [row[depth:] for row in self._rows]
+
+    def _get_children(self) -> dict[str, '_IndexNode']:
+        if self._children is None:
+            depth = self._depth
+            rows_by_cell: dict[str, list[list[str]]] = {}
+            for row in self._rows:
+                if len(row) > depth:
+                    rows = rows_by_cell.get(row[depth])
+                    if rows is None:
+                        rows = rows_by_cell[row[depth]] = []
+                    rows.append(row)
+            self._children = {
+                cell: _IndexNode(rows, depth + 1)
+                for cell, rows in rows_by_cell.items()
+            }
+        return self._children
+
+
+def _iter_records(file: TextIO) -> Iterator[str]:
+    """Yields the CSV records of a file, joining quoted multi-line cells."""
+    record = ''
+    for line in file:
+        record += line
+        # A record is complete once all quotes are closed.
+        if record.count('"') % 2:
+            continue
+        if record.strip():
+            yield record
+        record = ''
+    if record.strip():
+        yield record
+
+
+def _get_first_cell(record: str) -> str:
+    if record.startswith('"'):
+        return next(csv.reader([record], delimiter=',', quotechar='"'))[0]
+    end = record.find(',')
+    if end < 0:
+        return record.rstrip('\r\n')
+    return record[:end]
+
+
+_parse_float = number_format.get_parser('en_US')
@@ -1,10 +1,12 @@
-import datetime
 import io
 import logging
-from typing import TextIO
+from typing import Iterator, TextIO
 
+from .. import date_format
 from .. import importer
 from .. import model
+from .. import number_format
+from .. import text_format
 
 
 DATE_FORMAT_ISO = '%Y-%m-%d'
@@ -21,38 +23,25 @@ CATEGORY_COL = 'Kategorie'
 logger = logging.getLogger(__name__)
 
 
-def _parse_date(date_str: str) -> datetime.datetime:
-    try:
-        return datetime.datetime.strptime(date_str, DATE_FORMAT_ISO)
-    except ValueError:
-        return datetime.datetime.strptime(date_str, DATE_FORMAT_DE)
-
-
-def _parse_float(string: str) -> float:
-    return importer.parse_decimal_number(string, 'de_CH')
-
-
-def _has_minimal_columns(rows: list[dict[str, str]]) -> bool:
-    return (
-        importer.get_value(rows[0], DATE_COLS) is not None
-        and importer.get_value(rows[0], AMOUNT_COLS) is not None
-        and importer.get_value(rows[0], MEMO_COLS) is not None
-    )
+_parse_float = number_format.get_parser('de_CH')
 
 
 class _PostFinanceImporter(importer.Importer):
+    encoding = 'windows-1252'
+
     # This base method is generic enough for both checking and credit card.
-    def import_transactions(
+    def _iter_transactions(
         self, file: TextIO, currency: str | None = None
-    ) -> list[model.Payment]:
-        metadata, rows = importer.read_csv_with_header(file)
+    ) -> Iterator[model.Payment]:
+        metadata, rows = importer.iter_csv_with_header(file, self._skip)
+        parse_date = date_format.DateParser(DATE_FORMAT_ISO, DATE_FORMAT_DE)
         # TODO: Support different currencies.
 
         # Get transactions.
-        transactions = []
+        count = 0
         for row in rows:
             date_str = importer.get_value(row, DATE_COLS)
-            date = _parse_date(date_str)
+            date = parse_date(date_str)
 
             credit = (
                 _parse_float(row[CREDIT_COL]) if row.get(CREDIT_COL) else None
@@ -65,43 +54,41 @@ class _PostFinanceImporter(importer.Importer):
             amount = credit if credit else debit
 
             memo_str = importer.get_value(row, MEMO_COLS)
-            memo = importer.normalize_text(memo_str)
+            memo = text_format.normalize_text(memo_str)
 
             category = row.get(CATEGORY_COL)
 
             # Skip "Total" row.
             if memo == 'Total' and not amount:
+                self._skip(importer.SKIP_TOTAL_ROW)
                 continue
 
-            transactions.append(
-                model.Payment(
-                    date=date, amount=amount, memo=memo, category=category
-                )
+            yield self._create(
+                model.Payment,
+                date=date,
+                amount=amount,
+                memo=memo,
+                category=category,
             )
-        logger.info('Imported %d transactions.' % len(transactions))
-        return transactions
+            count += 1
+        logger.info('Imported %d transactions.' % count)
 
 
 class PostFinanceCheckingImporter(_PostFinanceImporter):
     """Importer for PostFinance checking accounts (http://www.postfincance.ch/)."""
 
-    def can_import(self, file: TextIO) -> bool:
-        metadata, rows = importer.read_csv_with_header(file)
-        return (
-            'Konto:' in metadata
-            and metadata['Konto:'].startswith('CH')
-            and _has_minimal_columns(rows)
-        )
+    signature = importer.Signature(
+        delimiter=';',
+        metadata=(('Konto:', ('CH',)),),
+        columns=(DATE_COLS, AMOUNT_COLS, MEMO_COLS),
+    )
 
 
 class PostFinanceCreditCardImporter(_PostFinanceImporter):
     """Importer for PostFinance credit cards (http://www.postfincance.ch/)."""
 
-    def can_import(self, file: TextIO) -> bool:
-        metadata, rows = importer.read_csv_with_header(file)
-        return (
-            'Kartenkonto:' in metadata
-            and 'Karte:' in metadata
-            and metadata['Karte:'].startswith('XXXX')
-            and _has_minimal_columns(rows)
-        )
+    signature = importer.Signature(
+        delimiter=';',
+        metadata=(('Kartenkonto:', ()), ('Karte:', ('XXXX',))),
+        columns=(DATE_COLS, AMOUNT_COLS, MEMO_COLS),
+    )
@@ -1,66 +1,72 @@
 import csv
-import datetime
 import logging
-from typing import TextIO
+from typing import Iterator, TextIO
 
+from .. import date_format
 from .. import importer
 from .. import model
+from .. import number_format
 
 
 DATE_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 
 logger = logging.getLogger(__name__)
 
+_parse_float = number_format.get_parser('en_GB')
+
 
 class RevolutImporter(importer.Importer):
     """Importer for Revolut (http://www.revolut.com/)."""
 
-    def import_transactions(
+    signature = importer.Signature(
+        columns=(
+            ('Type',),
+            ('Completed Date',),
+            ('Description',),
+            ('Amount',),
+            ('Fee',),
+            ('Currency',),
+            ('State',),
+        )
+    )
+
+    def _iter_transactions(
         self, file: TextIO, currency: str | None = None
-    ) -> list[model.Payment]:
+    ) -> Iterator[model.Payment]:
         reader = csv.reader(file, delimiter=',', quotechar='"')
 
         # Read header.
         headers_row = next(reader)
 
         # Get transactions.
-        transactions = []
+        parse_date = date_format.DateParser(DATE_TIME_FORMAT)
+        count = 0
         for row in reader:
             if len(row) < 10:
+                self._skip(importer.SKIP_SHORT_ROW)
                 continue
             row = [c.strip() if c is not None else None for c in row]
-            date = datetime.datetime.strptime(row[3], DATE_TIME_FORMAT)
+            date = parse_date(row[3])
             description = row[4]
-            amount = (
-                importer.parse_decimal_number(row[5], 'en_GB')
-                if row[5]
-                else None
-            )
-            fee = (
-                importer.parse_decimal_number(row[6], 'en_GB')
-                if row[6]
-                else None
-            )
+            amount = _parse_float(row[5]) if row[5] else None
+            fee = _parse_float(row[6]) if row[6] else None
             curr = row[7]
             if currency != None and currency != curr:
                 logger.debug(
                     'Skipping transaction with wrong currency: ' + str(row)
                 )
+                self._skip(importer.SKIP_OTHER_CURRENCY)
                 continue
             state = row[8]
-            balance = (
-                importer.parse_decimal_number(row[9], 'en_GB')
-                if row[9]
-                else None
-            )
+            balance = _parse_float(row[9]) if row[9] else None
             if state != 'COMPLETED':
                 logger.debug('Skipping incomplete transaction: ' + str(row))
 
             memo_parts = (description, 'Fee: %.2f' % fee if fee else None)
             memo = '. '.join(filter(bool, memo_parts))
 
-            transactions.append(
-                model.Payment(date=date, amount=amount, memo=memo)
+            yield self._create(
+                model.Payment, date=date, amount=amount, memo=memo
             )
-        logger.debug('Imported %d transactions.' % len(transactions))
-        return transactions
+            count += 1
+        logger.debug('Imported %d transactions.' % count)
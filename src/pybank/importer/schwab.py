@@ -1,23 +1,40 @@
 import csv
-import datetime
 import logging
-from typing import TextIO
+from typing import Iterator, TextIO
 
+from .. import date_format
 from .. import importer
 from .. import model
+from .. import number_format
+from .. import text_format
 
 
 DATE_FORMAT = '%m/%d/%Y'
 
 logger = logging.getLogger(__name__)
 
+_parse_float = number_format.get_parser('en_US')
+
 
 class SchwabBrokerageImporter(importer.Importer):
     """Importer for Schwab brokerage accounts (http://www.schwab.com/)."""
 
-    def import_transactions(
+    # The column names follow a title row.
+    signature = importer.Signature(
+        columns=(
+            ('Date',),
+            ('Action',),
+            ('Symbol',),
+            ('Description',),
+            ('Fees & Comm',),
+            ('Amount',),
+        ),
+        skip_rows=1,
+    )
+
+    def _iter_transactions(
         self, file: TextIO, currency: str | None = None
-    ) -> list[model.Transaction]:
+    ) -> Iterator[model.Transaction]:
         reader = csv.reader(file, delimiter=',', quotechar='"')
 
         # Read header.
@@ -25,14 +42,19 @@ class SchwabBrokerageImporter(importer.Importer):
         headers_row = next(reader)
 
         # Get transactions.
-        transactions = []
+        parse_date = date_format.DateParser(DATE_FORMAT)
+        count = 0
         for row in reader:
-            if len(row) < 8 or row[0] == 'Transactions Total':
+            if len(row) < 8:
+                self._skip(importer.SKIP_SHORT_ROW)
+                continue
+            if row[0] == 'Transactions Total':
+                self._skip(importer.SKIP_TOTAL_ROW)
                 continue
-            date = datetime.datetime.strptime(row[0], DATE_FORMAT)
+            date = parse_date(row[0])
             action = row[1]
             symbol = row[2]
-            description = importer.normalize_text(row[3])
+            description = text_format.normalize_text(row[3])
             quantity = row[4]
             price = row[5]
             fees = row[6]
@@ -46,21 +68,29 @@ class SchwabBrokerageImporter(importer.Importer):
                 'Wire Funds Adj',
                 'Wire Funds Received',
             ):
-                transaction = model.Payment(date=date, amount=amount, memo=memo)
+                transaction = self._create(
+                    model.Payment, date=date, amount=amount, memo=memo
+                )
             elif action == 'Credit Interest':
-                transaction = model.InvestmentInterestIncome(
-                    date=date, amount=amount, memo=memo
+                transaction = self._create(
+                    model.InvestmentInterestIncome,
+                    date=date,
+                    amount=amount,
+                    memo=memo,
                 )
             elif action == 'Service Fee':
-                transaction = model.InvestmentMiscExpense(
-                    date=date, amount=amount, memo=memo
+                transaction = self._create(
+                    model.InvestmentMiscExpense,
+                    date=date,
+                    amount=amount,
+                    memo=memo,
                 )
             else:
                 # TODO: Add support for purchases, sales, dividends etc.
                 raise Exception('Unknown action: ' + action)
-            transactions.append(transaction)
-        logger.debug('Imported %d transactions.' % len(transactions))
-        return transactions
+            yield transaction
+            count += 1
+        logger.debug('Imported %d transactions.' % count)
 
 
 class SchwabEacImporter(importer.Importer):
@@ -68,9 +98,9 @@ class SchwabEacImporter(importer.Importer):
     (http://www.schwab.com/).
     """
 
-    def import_transactions(
+    def _iter_transactions(
         self, file: TextIO, currency: str | None = None
-    ) -> list[model.Transaction]:
+    ) -> Iterator[model.Transaction]:
         reader = csv.reader(file, delimiter=',', quotechar='"')
 
         # Read header.
@@ -83,8 +113,8 @@ class SchwabEacImporter(importer.Importer):
             # TODO. Add support for these reports. They're a little complex.
             pass
         logger.debug('Imported %d transactions.' % len(transactions))
-        return transactions
+        return iter(transactions)
 
 
 def parse_dollar_amount(string: str) -> float:
-    return importer.parse_decimal_number(string.replace('$', ''), 'en_US')
+    return _parse_float(string.replace('$', ''))
@@ -1,38 +1,46 @@
 import csv
-import datetime
 import io
 import logging
-from typing import TextIO
+from typing import Iterator, TextIO
 
+from .. import date_format
 from .. import importer
 from .. import model
+from .. import number_format
 
 
 DATE_FORMAT = '%d-%m-%Y'
 
 logger = logging.getLogger(__name__)
 
+_parse_float = number_format.get_parser('en_GB')
+
 
 class WiseImporter(importer.Importer):
     """Importer for Wise accounts (http://www.wise.com/)."""
 
-    def import_transactions(
+    signature = importer.Signature(
+        columns=(('TransferWise ID',), ('Date',), ('Amount',), ('Currency',))
+    )
+
+    def _iter_transactions(
         self, file: TextIO, currency: str | None = None
-    ) -> list[model.Payment]:
+    ) -> Iterator[model.Payment]:
         reader = csv.reader(file, delimiter=',', quotechar='"')
 
         # Read header.
         headers_row = next(reader)
 
         # Get transactions.
-        transactions = []
+        parse_date = date_format.DateParser(DATE_FORMAT)
+        count = 0
         for row in reader:
-            print(len(row))
             if len(row) < 15:
+                self._skip(importer.SKIP_SHORT_ROW)
                 continue
             wise_id = row[0]
-            date = datetime.datetime.strptime(row[1], DATE_FORMAT)
-            amount = importer.parse_decimal_number(row[2], 'en_GB')
+            date = parse_date(row[1])
+            amount = _parse_float(row[2])
             currency = row[3]
             description = row[4]
             payment_reference = row[5]
@@ -44,7 +52,7 @@ class WiseImporter(importer.Importer):
             payee_name = row[11]
             payee_acc = row[12]
             merchant = row[13]
-            fees = importer.parse_decimal_number(row[14], 'en_GB')
+            fees = _parse_float(row[14])
 
             memo_parts = [description]
             if exchange_rate:
@@ -58,14 +66,13 @@ class WiseImporter(importer.Importer):
 
             payee = ', '.join(filter(bool, (payee_name, payee_acc)))
 
-            transactions.append(
-                model.Payment(
-                    date=date,
-                    amount=amount,
-                    payer=payer_name,
-                    payee=payee,
-                    memo=memo,
-                )
+            yield self._create(
+                model.Payment,
+                date=date,
+                amount=amount,
+                payer=payer_name,
+                payee=payee,
+                memo=memo,
             )
-        logger.debug('Imported %d transactions.' % len(transactions))
-        return transactions
+            count += 1
+        logger.debug('Imported %d transactions.' % count)
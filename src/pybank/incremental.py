@@ -0,0 +1,246 @@
+"""Incremental imports with high-water marks per source.
+
+Monthly and rolling exports of the same account overlap. A high-water mark
+records, per source, the latest imported date and the import ids of the
+transactions imported on that date, see `import_id`. Later imports of the same
+source only yield the transactions past the mark:
+
+* Transactions before the date of the mark are skipped.
+* Transactions on the date of the mark are skipped if their import id is in
+  the mark. So a second coffee on the same day, which only appears in the next
+  export, is still imported, wherever the export lists it.
+* Later transactions are imported and advance the mark.
+
+The statement is filtered while it is imported. Exports listing the newest
+transactions first, e.g. of DKB and PostFinance, are only read up to the first
+transaction before the mark, as the rest is older still.
+
+Marks of version 1 state files only have the number of transactions imported
+on their date. Those are skipped from the oldest end of the statement, which
+is the end of newest-first exports. So for them, the whole statement is read
+first.
+
+This assumes that exports don't add transactions before the mark afterwards,
+e.g. pending transactions booked with an earlier date.
+
+The marks of all sources are stored in one JSON state file.
+"""
+
+import dataclasses
+import datetime
+import json
+import os
+import os.path
+import tempfile
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from . import model
+
+
+STATE_VERSION = 2
+# State files of these versions can be read.
+_READABLE_VERSIONS = (1, 2)
+
+
+@dataclasses.dataclass(frozen=True)
+class HighWaterMark:
+    """The position of the last imported transaction of a source.
+
+    :param date: The latest imported date.
+    :param occurrences: The number of imported transactions on that date.
+    :param ids: The import ids of the imported transactions on that date.
+    Empty for marks of version 1 state files.
+    """
+
+    date: datetime.datetime
+    occurrences: int
+    ids: frozenset[str] = frozenset()
+
+
+class MarkFilter:
+    """Filters transactions past a high-water mark and advances the mark."""
+
+    def __init__(self, mark: HighWaterMark | None = None):
+        """Create a new filter.
+
+        :param mark: The mark of the previous imports, if any.
+        """
+        # Imported here, as it loads sqlite3, which only the ids need.
+        from . import import_id
+
+        self._old_mark = mark
+        self._id_generator = import_id.IdGenerator()
+        self._latest_date: datetime.datetime | None = None
+        self._latest_ids: set[str] = set()
+        self.skipped = 0
+        # Whether the rest of the statement wasn't read, as it is older.
+        self.stopped = False
+
+    def filter(
+        self, transactions: Iterable['model.Transaction']
+    ) -> Iterator['model.Transaction']:
+        """Yields the transactions past the mark.
+
+        :param transactions: The transactions of a statement, in file order.
+        Can be a lazy iterable, which is only read as far as needed.
+        :return: The new transactions.
+        """
+        old_mark = self._old_mark
+        if old_mark is not None and not old_mark.ids:
+            yield from self._filter_counted(list(transactions), old_mark)
+            return
+        first_date = previous_date = None
+        newest_first = True
+        for transaction in transactions:
+            date = transaction.date
+            if first_date is None:
+                first_date = date
+            elif date > previous_date:
+                newest_first = False
+            previous_date = date
+
+            transaction_id = self._track(transaction)
+            if old_mark is not None:
+                if date < old_mark.date:
+                    self.skipped += 1
+                    if newest_first and date < first_date:
+                        self.stopped = True
+                        return
+                    continue
+                if date == old_mark.date and transaction_id in old_mark.ids:
+                    self.skipped += 1
+                    continue
+            yield transaction
+
+    def _filter_counted(
+        self, transactions: list['model.Transaction'], old_mark: HighWaterMark
+    ) -> Iterator['model.Transaction']:
+        """Like `filter`, for marks without ids, of version 1 state files."""
+        skipped_indices = _get_oldest_on_date(
+            transactions, old_mark.date, old_mark.occurrences
+        )
+        for index, transaction in enumerate(transactions):
+            self._track(transaction)
+            date = transaction.date
+            if date < old_mark.date or (
+                date == old_mark.date and index in skipped_indices
+            ):
+                self.skipped += 1
+                continue
+            yield transaction
+
+    def _track(self, transaction: 'model.Transaction') -> str | None:
+        """Advances the latest date and returns the import id, if needed.
+
+        :return: The import id, for transactions on the latest date so far or
+        on the date of the old mark, else None.
+        """
+        date = transaction.date
+        if self._latest_date is None or date > self._latest_date:
+            self._latest_date = date
+            self._latest_ids = set()
+        old_mark = self._old_mark
+        if date != self._latest_date and (
+            old_mark is None or date != old_mark.date
+        ):
+            return None
+        # Identical rows have the same date, so the occurrence indices of the
+        # ids don't need the rows on other dates.
+        transaction_id = self._id_generator.get_id(transaction)
+        if date == self._latest_date:
+            self._latest_ids.add(transaction_id)
+        return transaction_id
+
+    @property
+    def mark(self) -> HighWaterMark | None:
+        """The advanced mark, after filtering."""
+        old_mark = self._old_mark
+        latest_date = self._latest_date
+        if latest_date is None:
+            return old_mark
+        if old_mark is None or latest_date > old_mark.date:
+            return HighWaterMark(
+                latest_date, len(self._latest_ids), frozenset(self._latest_ids)
+            )
+        if latest_date == old_mark.date:
+            ids = old_mark.ids | self._latest_ids
+            return HighWaterMark(
+                latest_date,
+                max(old_mark.occurrences, len(self._latest_ids)),
+                frozenset(ids),
+            )
+        return old_mark
+
+
+def _get_oldest_on_date(
+    transactions: list['model.Transaction'],
+    date: datetime.datetime,
+    count: int,
+) -> set[int]:
+    """Returns the indices of the oldest transactions on a date."""
+    indices = [i for i, t in enumerate(transactions) if t.date == date]
+    # Exports list their transactions oldest or newest first.
+    if transactions and transactions[0].date > transactions[-1].date:
+        indices.reverse()
+    return set(indices[:count])
+
+
+def load_marks(filename: str) -> dict[str, HighWaterMark]:
+    """Reads the marks of all sources from a state file.
+
+    :param filename: The state file. A missing file has no marks.
+    :return: The marks by source.
+    :raises ValueError: If the file isn't a valid state file.
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        return {}
+    if (
+        not isinstance(state, dict)
+        or state.get('version') not in _READABLE_VERSIONS
+    ):
+        raise ValueError('Unsupported state file: %s.' % filename)
+    try:
+        return {
+            source: HighWaterMark(
+                datetime.datetime.fromisoformat(mark['date']),
+                int(mark['occurrences']),
+                frozenset(mark.get('ids', ())),
+            )
+            for source, mark in state['sources'].items()
+        }
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError('Invalid state file: %s.' % e)
+
+
+def save_marks(filename: str, marks: dict[str, HighWaterMark]) -> None:
+    """Writes the marks of all sources to a state file.
+
+    The file is replaced atomically, so an interrupted run keeps the old marks.
+
+    :param filename: The state file.
+    :param marks: The marks by source.
+    """
+    state = {
+        'version': STATE_VERSION,
+        'sources': {
+            source: {
+                'date': mark.date.isoformat(),
+                'occurrences': mark.occurrences,
+                'ids': sorted(mark.ids),
+            }
+            for source, mark in sorted(marks.items())
+        },
+    }
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_filename = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(state, file, indent=2)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        os.remove(tmp_filename)
+        raise
@@ -0,0 +1,256 @@
+"""Metrics of imports, e.g. for tracking nightly import jobs.
+
+Importers fill an `ImportMetrics` record for every imported file and emit it
+to a sink when the import is done:
+
+* `MemorySink` keeps the records in memory.
+* `JsonLinesSink` appends one JSON object per import to a file.
+* `PrometheusSink` writes totals per importer to a file for the node exporter
+  textfile collector.
+"""
+
+import dataclasses
+import json
+import os
+import os.path
+import tempfile
+import time
+from typing import Iterator, TextIO
+
+# File extension selecting the Prometheus format in `open_sink`.
+PROMETHEUS_EXTENSION = '.prom'
+METRIC_PREFIX = 'pybank_import_'
+
+
+@dataclasses.dataclass
+class ImportMetrics:
+    """The metrics of importing one file.
+
+    :param importer: The name of the importer class.
+    :param source: The name of the imported file, if known.
+    :param rows_read: The number of CSV rows read from the file. Quoted
+    values spanning several lines count as one row.
+    :param bytes_read: The number of bytes read from the file.
+    :param transactions: The number of imported transactions.
+    :param skipped: The number of skipped rows by reason.
+    :param parse_failures: 1 if the import failed, else 0. The first error
+    ends an import, so summed over imports, e.g. in the Prometheus totals, this
+    is the number of failed imports.
+    :param phase_times: The wall time in seconds by phase, e.g. parsing.
+    :param timestamp: The end of the import in seconds since the epoch.
+    """
+
+    importer: str
+    source: str | None = None
+    rows_read: int = 0
+    bytes_read: int = 0
+    transactions: int = 0
+    skipped: dict[str, int] = dataclasses.field(default_factory=dict)
+    parse_failures: int = 0
+    phase_times: dict[str, float] = dataclasses.field(default_factory=dict)
+    timestamp: float = 0.0
+
+    def skip(self, reason: str) -> None:
+        """Counts a skipped row.
+
+        :param reason: Why the row was skipped, e.g. "total row".
+        """
+        self.skipped[reason] = self.skipped.get(reason, 0) + 1
+
+
+class MetricsSink:
+    """Receives the metrics of each import."""
+
+    def emit(self, metrics: ImportMetrics) -> None:
+        """Receives the metrics of an import.
+
+        :param metrics: The metrics.
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        """Writes pending metrics, if any."""
+
+
+class MemorySink(MetricsSink):
+    """Keeps the metrics in memory."""
+
+    def __init__(self):
+        self.records: list[ImportMetrics] = []
+
+    def emit(self, metrics: ImportMetrics) -> None:
+        self.records.append(metrics)
+
+
+class JsonLinesSink(MetricsSink):
+    """Appends the metrics of each import as a line of JSON to a file."""
+
+    def __init__(self, filename: str):
+        """Create a new sink.
+
+        :param filename: The file to append to.
+        """
+        self._filename = filename
+
+    def emit(self, metrics: ImportMetrics) -> None:
+        line = json.dumps(dataclasses.asdict(metrics), sort_keys=True)
+        with open(self._filename, 'a') as file:
+            file.write(line + '\n')
+
+
+class PrometheusSink(MetricsSink):
+    """Writes totals per importer in the Prometheus text format.
+
+    The file is replaced atomically on `close`, as the node exporter textfile
+    collector expects.
+    """
+
+    def __init__(self, filename: str):
+        """Create a new sink.
+
+        :param filename: The file to write, usually ending in `.prom`.
+        """
+        self._filename = filename
+        self._records: list[ImportMetrics] = []
+
+    def emit(self, metrics: ImportMetrics) -> None:
+        self._records.append(metrics)
+
+    def close(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self._filename))
+        fd, tmp_filename = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                _write_prometheus(self._records, file)
+            os.replace(tmp_filename, self._filename)
+        except BaseException:
+            os.remove(tmp_filename)
+            raise
+
+
+def open_sink(filename: str) -> MetricsSink:
+    """Returns a sink writing to a file, in a format chosen by its extension.
+
+    :param filename: The file. Files ending in `.prom` get the Prometheus
+    text format, all others JSON lines.
+    :return: The sink.
+    """
+    if filename.endswith(PROMETHEUS_EXTENSION):
+        return PrometheusSink(filename)
+    return JsonLinesSink(filename)
+
+
+class CountingFile:
+    """Wraps a text file and counts the CSV rows and bytes read from it.
+
+    A newline within a quoted value doesn't end a row, as in the `csv` module.
+    All supported formats quote with double quotes.
+
+    Rewinding the file restarts the counts, since importers may read the start
+    of a file twice, e.g. for the format detection.
+    """
+
+    def __init__(self, file: TextIO):
+        self._file = file
+        encoding = getattr(file, 'encoding', None) or 'utf-8'
+        # Encoding with the BOM codec would count the BOM for every line.
+        self._encoding = 'utf-8' if encoding == 'utf-8-sig' else encoding
+        self.bytes = 0
+        self._complete_rows = 0
+        # Whether the text read so far ends within a quoted value.
+        self._in_quotes = False
+        # Whether the text read so far ends within a row.
+        self._in_row = False
+
+    @property
+    def rows(self) -> int:
+        """The number of rows read, including a row which is read partly."""
+        return self._complete_rows + self._in_row
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        line = next(self._file)
+        self._count(line)
+        return line
+
+    def read(self, size: int = -1) -> str:
+        text = self._file.read(size)
+        self._count(text)
+        return text
+
+    def readline(self, size: int = -1) -> str:
+        line = self._file.readline(size)
+        self._count(line)
+        return line
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if offset == 0 and whence == os.SEEK_SET:
+            self.bytes = 0
+            self._complete_rows = 0
+            self._in_quotes = self._in_row = False
+        return self._file.seek(offset, whence)
+
+    def __getattr__(self, name: str):
+        return getattr(self._file, name)
+
+    def _count(self, text: str) -> None:
+        if not text:
+            return
+        if text.isascii():
+            self.bytes += len(text)
+        else:
+            self.bytes += len(text.encode(self._encoding, errors='replace'))
+        lines = text.split('\n')
+        for line in lines[:-1]:
+            if line.count('"') % 2:
+                self._in_quotes = not self._in_quotes
+            if not self._in_quotes:
+                self._complete_rows += 1
+        if lines[-1].count('"') % 2:
+            self._in_quotes = not self._in_quotes
+        self._in_row = bool(lines[-1]) or self._in_quotes
+
+
+def _write_prometheus(records: list[ImportMetrics], file: TextIO) -> None:
+    totals: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+
+    def add(name, value, **labels):
+        key = name, tuple(sorted(labels.items()))
+        totals[key] = totals.get(key, 0) + value
+
+    for metrics in records:
+        importer = metrics.importer
+        add('imports_total', 1, importer=importer)
+        add('rows_read_total', metrics.rows_read, importer=importer)
+        add('bytes_read_total', metrics.bytes_read, importer=importer)
+        add('transactions_total', metrics.transactions, importer=importer)
+        add('parse_failures_total', metrics.parse_failures, importer=importer)
+        for reason, count in metrics.skipped.items():
+            add('rows_skipped_total', count, importer=importer, reason=reason)
+        for phase, seconds in metrics.phase_times.items():
+            add('phase_seconds_total', seconds, importer=importer, phase=phase)
+    add('last_run_timestamp_seconds', time.time())
+
+    written_types = set()
+    # Samples of the same metric must be written together.
+    for (name, labels), value in sorted(totals.items(), key=lambda i: i[0][0]):
+        metric = METRIC_PREFIX + name
+        if metric not in written_types:
+            metric_type = 'counter' if name.endswith('_total') else 'gauge'
+            print('# TYPE %s %s' % (metric, metric_type), file=file)
+            written_types.add(metric)
+        label_str = ','.join(
+            '%s="%s"' % (k, v.replace('\\', '\\\\').replace('"', '\\"'))
+            for k, v in labels
+        )
+        if label_str:
+            metric += '{%s}' % label_str
+        print('%s %s' % (metric, _format_value(value)), file=file)
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int) or value.is_integer():
+        return '%i' % value
+    return repr(value)
@@ -0,0 +1,74 @@
+"""Locale-independent parsing of decimal numbers.
+
+Banks format amounts by the conventions of their country, e.g. `1.234,56` in
+Germany or `1'234.56` in Switzerland. Instead of switching the process-wide
+locale for every number, each format is compiled once into a parser that only
+uses string operations. The parsers don't share any mutable state, so they can
+be used from multiple threads.
+"""
+
+import dataclasses
+from typing import Callable
+
+
+@dataclasses.dataclass(frozen=True)
+class NumberFormat:
+    """The separators of a number format.
+
+    :param decimal_sep: The decimal separator.
+    :param thousands_seps: The accepted thousands separators.
+    """
+
+    decimal_sep: str
+    thousands_seps: tuple[str, ...]
+
+
+_parsers: dict[str, Callable[[str], float]] = {}
+
+
+def register_format(lang: str, number_format: NumberFormat) -> None:
+    """Registers a number format and compiles its parser.
+
+    :param lang: The name of the format, usually a locale name like `de_DE`.
+    :param number_format: The separators of the format.
+    """
+    table = {ord(sep): None for sep in number_format.thousands_seps}
+    table[ord(number_format.decimal_sep)] = '.'
+
+    def parse(number_string: str) -> float:
+        return float(number_string.translate(table))
+
+    _parsers[lang] = parse
+
+
+register_format('de_DE', NumberFormat(',', ('.',)))
+# The apostrophe is sometimes typeset as a right single quotation mark.
+register_format('de_CH', NumberFormat('.', ("'", '’')))
+register_format('en_US', NumberFormat('.', (',',)))
+register_format('en_GB', NumberFormat('.', (',',)))
+
+
+def get_parser(lang: str) -> Callable[[str], float]:
+    """Returns the compiled parser for a number format.
+
+    :param lang: The name of the format, e.g. `de_DE`.
+    :return: A function parsing a number string into a float.
+    :raises ValueError: If the format is unknown.
+    """
+    try:
+        return _parsers[lang]
+    except KeyError:
+        raise ValueError('Unknown number format: %s.' % lang)
+
+
+def parse_decimal_number(number_string: str, lang: str) -> float:
+    """Parses a decimal number string into a float.
+
+    Can also handle thousands separators.
+
+    :param number_string: The decimal number as a string.
+    :param lang: The name of the format, e.g. `de_DE`.
+    :return: The parsed number.
+    :raises ValueError: If the string is not a valid decimal number.
+    """
+    return get_parser(lang)(number_string)
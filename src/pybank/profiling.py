@@ -0,0 +1,183 @@
+"""Profiling of the stages of a conversion.
+
+A `Profiler` measures the wall and CPU time spent in each stage. Stages can be
+nested, e.g. model construction happens while parsing. The time of a nested
+stage only counts for the nested stage, so the times of all stages add up to
+the total time.
+
+`dump` additionally records a cProfile profile and the memory allocations for
+a closer look.
+"""
+
+import contextlib
+import cProfile
+import logging
+import time
+import tracemalloc
+from typing import Iterable, Iterator, TypeVar
+
+ENCODING_DETECTION = 'encoding detection'
+FORMAT_DETECTION = 'format detection'
+PARSING = 'parsing'
+MODEL_CONSTRUCTION = 'model construction'
+SERIALIZATION = 'serialization'
+
+# The number of allocation sites in the tracemalloc report.
+TOP_ALLOCATIONS = 25
+
+_T = TypeVar('_T')
+
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """Measures the wall and CPU time of the stages of a conversion."""
+
+    def __init__(self):
+        # Stage name -> [wall time, CPU time, calls].
+        self._stats: dict[str, list[float]] = {}
+        self._stack: list[str] = []
+        self._wall = 0.0
+        self._cpu = 0.0
+
+    def start(self, name: str) -> None:
+        """Starts a stage, pausing the current stage until `stop`.
+
+        :param name: The name of the stage.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        if self._stack:
+            self._add(self._stack[-1], wall - self._wall, cpu - self._cpu, 0)
+        self._stack.append(name)
+        self._wall, self._cpu = wall, cpu
+
+    def stop(self) -> None:
+        """Stops the current stage and resumes the outer stage, if any."""
+        wall, cpu = time.perf_counter(), time.process_time()
+        name = self._stack.pop()
+        self._add(name, wall - self._wall, cpu - self._cpu, 1)
+        self._wall, self._cpu = wall, cpu
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measures a block of code as a stage.
+
+        :param name: The name of the stage.
+        """
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    def iterate(self, name: str, iterable: Iterable[_T]) -> Iterator[_T]:
+        """Measures the time spent producing the items of an iterable.
+
+        Useful for lazy iterables, where the work happens in between the items
+        being consumed.
+
+        :param name: The name of the stage.
+        :param iterable: The iterable.
+        :return: An iterator over the items.
+        """
+        iterator = iter(iterable)
+        while True:
+            self.start(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.stop()
+            yield item
+
+    def get_stats(self) -> dict[str, tuple[float, float, int]]:
+        """Returns the wall time, CPU time and calls of each stage.
+
+        :return: The stats by stage name, in order of the first call.
+        """
+        return {
+            name: (wall, cpu, int(calls))
+            for name, (wall, cpu, calls) in self._stats.items()
+        }
+
+    def _add(self, name: str, wall: float, cpu: float, calls: int) -> None:
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = [0.0, 0.0, 0]
+        stats[0] += wall
+        stats[1] += cpu
+        stats[2] += calls
+
+
+def merge_stats(
+    all_stats: Iterable[dict[str, tuple[float, float, int]]],
+) -> dict[str, tuple[float, float, int]]:
+    """Adds up the stats of several profilers, see `Profiler.get_stats`."""
+    merged: dict[str, tuple[float, float, int]] = {}
+    for stats in all_stats:
+        for name, (wall, cpu, calls) in stats.items():
+            total_wall, total_cpu, total_calls = merged.get(name, (0.0, 0.0, 0))
+            merged[name] = (
+                total_wall + wall,
+                total_cpu + cpu,
+                total_calls + calls,
+            )
+    return merged
+
+
+def format_stats(stats: dict[str, tuple[float, float, int]]) -> str:
+    """Formats the stats of a profiler as a table.
+
+    :param stats: The stats, see `Profiler.get_stats`.
+    :return: The table.
+    """
+    total_wall = sum(wall for wall, cpu, calls in stats.values())
+    total_cpu = sum(cpu for wall, cpu, calls in stats.values())
+    lines = [
+        '%-20s %10s %10s %10s %7s' % ('Stage', 'Calls', 'Wall s', 'CPU s', '%')
+    ]
+    for name, (wall, cpu, calls) in stats.items():
+        lines.append(
+            '%-20s %10i %10.3f %10.3f %6.1f%%'
+            % (name, calls, wall, cpu, 100 * wall / max(total_wall, 1e-9))
+        )
+    lines.append(
+        '%-20s %10s %10.3f %10.3f %6.1f%%'
+        % ('Total', '', total_wall, total_cpu, 100)
+    )
+    return '\n'.join(lines)
+
+
+@contextlib.contextmanager
+def dump(prefix: str) -> Iterator[None]:
+    """Records a cProfile profile and the memory allocations of a block.
+
+    Writes the profile to `<prefix>.prof`, e.g. for `python -m pstats` or
+    snakeviz. Writes the peak memory usage and the top allocation sites to
+    `<prefix>.tracemalloc.txt`.
+
+    :param prefix: The prefix of the output files.
+    """
+    tracemalloc.start()
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profile.dump_stats(prefix + '.prof')
+        with open(prefix + '.tracemalloc.txt', 'w') as file:
+            print('Peak: %.1f MB' % (peak / 1e6), file=file)
+            print('Current: %.1f MB' % (current / 1e6), file=file)
+            print('Top %i allocations:' % TOP_ALLOCATIONS, file=file)
+            for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+                print(stat, file=file)
+        logger.info(
+            'Wrote profile to %s.prof and %s.tracemalloc.txt.'
+            % (prefix, prefix)
+        )
@@ -0,0 +1,50 @@
+"""Prompts for the user, e.g. for passwords and login tokens.
+
+Several banks can be fetched at the same time, see `pybank.fetch`. Their
+prompts are serialized, so that only one prompt is shown at a time, in the
+order they were asked. Prompts from other threads than the main thread are
+prefixed with the name of the thread, i.e. the bank being fetched.
+"""
+
+import getpass
+import threading
+
+
+# Held while a prompt is shown. Fair enough for a handful of banks.
+_LOCK = threading.Lock()
+
+
+def ask(text: str) -> str:
+    """Prompts the user for a line of input.
+
+    :param text: The prompt.
+    :return: The input, without the trailing newline.
+    """
+    with _LOCK:
+        return input(_format(text))
+
+
+def ask_password(text: str) -> str:
+    """Prompts the user for a secret, without echoing it.
+
+    :param text: The prompt.
+    :return: The input.
+    """
+    with _LOCK:
+        return getpass.getpass(_format(text))
+
+
+def tell(text: str) -> None:
+    """Shows a message to the user, e.g. to confirm a login on the phone.
+
+    :param text: The message.
+    """
+    with _LOCK:
+        print(_format(text))
+
+
+def _format(text: str) -> str:
+    thread = threading.current_thread()
+    if thread is threading.main_thread():
+        return text
+    return '[%s] %s' % (thread.name, text)
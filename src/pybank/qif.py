@@ -5,6 +5,8 @@ Not complete.
 See http://www.respmech.com/mym2qifw/qif_new.htm for the spec.
 """
 
+from typing import Iterable, TextIO
+
 from . import model
 
 DATE_FORMAT = '%x'
@@ -85,17 +87,105 @@ ACCOUNT_INFO = {
 
 END_OF_ENTRY = '^'
 
+# Number of characters collected before they are written to the output.
+BUFFER_SIZE = 64 * 1024
+
 
 class SerializationError(Exception):
     """An error while serializing the data."""
 
 
+class Writer:
+    """Writes accounts and transactions to a file-like object.
+
+    Entries are serialized one at a time and collected in a buffer, which is
+    written to the output whenever it is full. The output therefore grows while
+    the transactions are still being imported and memory use stays flat.
+
+    Several accounts can be written to the same output. Call `flush` or use the
+    writer as a context manager to write the remaining buffer.
+    """
+
+    def __init__(self, output: TextIO, buffer_size: int = BUFFER_SIZE):
+        """Create a new writer.
+
+        :param output: The file-like object to write to.
+        :param buffer_size: The number of characters to collect before writing.
+        """
+        self._output = output
+        self._buffer_size = buffer_size
+        self._buffer: list[str] = []
+        self._buffered = 0
+
+    def __enter__(self) -> 'Writer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
+
+    def write_account(
+        self,
+        account: model.Account,
+        transactions: Iterable[model.Transaction] | None = None,
+    ) -> None:
+        """Writes an account followed by its transactions.
+
+        :param account: The account to write.
+        :param transactions: The transactions to write. Can be a lazy iterable.
+            Defaults to the transactions of the account.
+        :raises SerializationError: For unknown transaction types.
+        """
+        self._write(serialize_account_header(account))
+        if transactions is None:
+            transactions = account.transactions
+        for transaction in transactions:
+            self.write_transaction(transaction)
+
+    def write_transaction(self, transaction: model.Transaction) -> None:
+        """Writes a transaction.
+
+        :param transaction: The transaction to write.
+        :raises SerializationError: For unknown transaction types.
+        """
+        self._write(serialize_transaction(transaction))
+
+    def flush(self) -> None:
+        """Writes the buffer to the output and flushes the output."""
+        if self._buffer:
+            self._output.write(''.join(self._buffer))
+            self._buffer.clear()
+            self._buffered = 0
+        self._output.flush()
+
+    def close(self) -> None:
+        """Writes the buffer to the output and closes the output."""
+        self.flush()
+        self._output.close()
+
+    def _write(self, entry: str) -> None:
+        self._buffer.append(entry)
+        self._buffer.append('\n')
+        self._buffered += len(entry) + 1
+        if self._buffered >= self._buffer_size:
+            self.flush()
+
+
 def serialize_account(account: model.Account) -> str:
     """Serializes an account to the QIF format.
 
     :param account: The account to serialize
     :return: The QIF serialization of the account.
     """
+    txns = '\n'.join(serialize_transaction(t) for t in account.transactions)
+    return serialize_account_header(account) + '\n' + txns
+
+
+def serialize_account_header(account: model.Account) -> str:
+    """Serializes the header of an account to the QIF format.
+
+    :param account: The account to serialize
+    :return: The QIF serialization of the account without its transactions.
+    """
     account_fields = []
 
     account_fields.append(ACCOUNT_HEADER)
@@ -123,9 +213,6 @@ def serialize_account(account: model.Account) -> str:
     account_fields.append(END_OF_ENTRY)
     account_fields.append(ACCOUNT_TYPE + acc_type)
 
-    txns = '\n'.join(serialize_transaction(t) for t in account.transactions)
-    account_fields.append(txns)
-
     return '\n'.join(account_fields)
 
 
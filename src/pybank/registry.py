@@ -0,0 +1,108 @@
+"""Registries of the importers and banks, loaded on first use.
+
+The command line tools only import the module of the selected importer or
+bank, so that they start quickly and the heavy dependencies, e.g. selenium,
+are only loaded when needed.
+
+Besides the built-in entries, other packages can register importers and banks
+as entry points in the groups `pybank.importers` and `pybank.banks`, e.g. in
+their `pyproject.toml`:
+
+    [project.entry-points."pybank.importers"]
+    mybank = "mybank.importer:MyBankImporter"
+"""
+
+import collections.abc
+import importlib
+from typing import Iterator
+
+
+IMPORTERS_GROUP = 'pybank.importers'
+BANKS_GROUP = 'pybank.banks'
+
+
+class Registry(collections.abc.Mapping):
+    """A mapping from names to classes, which imports each class on access.
+
+    The classes are referenced as `module:attribute` strings.
+    """
+
+    def __init__(self, group: str, builtins: dict[str, str]):
+        """Create a new registry.
+
+        :param group: The entry point group of additional entries.
+        :param builtins: The built-in entries, by name.
+        """
+        self._group = group
+        self._builtins = builtins
+        self._entry_points: dict[str, str] | None = None
+        self._loaded: dict[str, type] = {}
+
+    def __getitem__(self, name: str) -> type:
+        cls = self._loaded.get(name)
+        if cls is None:
+            reference = self._builtins.get(name)
+            if reference is None:
+                reference = self._get_entry_points()[name]
+            cls = self._loaded[name] = _load(reference)
+        return cls
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._builtins or name in self._get_entry_points()
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._builtins
+        for name in self._get_entry_points():
+            if name not in self._builtins:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def _get_entry_points(self) -> dict[str, str]:
+        if self._entry_points is None:
+            # Reading the installed distributions is comparatively slow, so
+            # only done when a name isn't built in.
+            from importlib import metadata
+
+            self._entry_points = {
+                e.name: e.value
+                for e in metadata.entry_points(group=self._group)
+            }
+        return self._entry_points
+
+
+def _load(reference: str) -> type:
+    module_name, _, attribute = reference.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute)
+
+
+IMPORTERS = Registry(
+    IMPORTERS_GROUP,
+    {
+        'auto': 'pybank.importer.auto:AutoImporter',
+        'dkb-checking': 'pybank.importer.dkb:DkbCheckingImporter',
+        'dkb-credit-card': 'pybank.importer.dkb:DkbCreditCardImporter',
+        'interactive-brokers': 'pybank.importer.ib:InteractiveBrokersImporter',
+        'postfinance-checking': (
+            'pybank.importer.postfinance:PostFinanceCheckingImporter'
+        ),
+        'postfinance-credit-card': (
+            'pybank.importer.postfinance:PostFinanceCreditCardImporter'
+        ),
+        'revolut': 'pybank.importer.revolut:RevolutImporter',
+        'schwab-brokerage': 'pybank.importer.schwab:SchwabBrokerageImporter',
+        'wise': 'pybank.importer.wise:WiseImporter',
+    },
+)
+
+BANKS = Registry(
+    BANKS_GROUP,
+    {
+        'dkb': 'pybank.download.dkb:DeutscheKreditBank',
+        'interactivebrokers': 'pybank.download.ib:InteractiveBrokers',
+        'postfinance': 'pybank.download.postfinance:PostFinance',
+        'revolut': 'pybank.download.revolut:Revolut',
+    },
+)
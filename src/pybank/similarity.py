@@ -0,0 +1,103 @@
+"""Similarity check of imported transactions, see `docs/importing.md`.
+
+The import id can't recognize a re-issued statement whose rows have enriched
+descriptions. So new rows of the same account with the same amount within a
+few days of a known row are reported as possible duplicates. The check only
+warns, since such rows are often legitimate, e.g. a monthly fee.
+
+`SimilarityIndex` buckets the rows by account and amount, and keeps each
+bucket sorted by date. A probe is a binary search for the date window in one
+bucket, so checking a row doesn't depend on the size of the history.
+"""
+
+import bisect
+import datetime
+from typing import Hashable
+
+
+# The maximum distance in days of similar transactions.
+DEFAULT_WINDOW_DAYS = 3
+
+
+def get_amount_key(amount: float) -> int:
+    """Returns the bucket key of an amount, in hundredths.
+
+    :param amount: The amount.
+    :return: The key.
+    """
+    return round(amount * 100)
+
+
+def get_day(date: datetime.date) -> int:
+    """Returns the day number of a date, see `datetime.date.toordinal`.
+
+    :param date: The date, or a datetime.
+    :return: The day number.
+    """
+    return date.toordinal()
+
+
+class SimilarityIndex:
+    """An in-memory index of transactions by account, amount and date.
+
+    Rows can be added in any order. Adding them in date order, e.g. during a
+    backfill, appends to the buckets.
+    """
+
+    def __init__(self, window_days: int = DEFAULT_WINDOW_DAYS):
+        """Create a new index.
+
+        :param window_days: The maximum distance in days of similar rows.
+        """
+        self._window_days = window_days
+        # Day numbers and labels by account and amount key, sorted by day.
+        self._buckets: dict[
+            tuple[Hashable, int], tuple[list[int], list[Hashable]]
+        ] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(
+        self, account: Hashable, amount_key: int, day: int, label: Hashable
+    ) -> None:
+        """Adds a row.
+
+        :param account: The account of the row.
+        :param amount_key: The amount of the row, see `get_amount_key`.
+        :param day: The date of the row, see `get_day`.
+        :param label: Identifies the row in the results, e.g. its import id.
+        """
+        bucket = self._buckets.get((account, amount_key))
+        if bucket is None:
+            self._buckets[account, amount_key] = ([day], [label])
+        else:
+            days, labels = bucket
+            if day >= days[-1]:
+                days.append(day)
+                labels.append(label)
+            else:
+                index = bisect.bisect_right(days, day)
+                days.insert(index, day)
+                labels.insert(index, label)
+        self._size += 1
+
+    def find_similar(
+        self, account: Hashable, amount_key: int, day: int
+    ) -> list[Hashable]:
+        """Returns the rows of an account with the same amount and a date
+        within the window.
+
+        :param account: The account.
+        :param amount_key: The amount, see `get_amount_key`.
+        :param day: The date, see `get_day`.
+        :return: The labels of the similar rows, by date.
+        """
+        bucket = self._buckets.get((account, amount_key))
+        if bucket is None:
+            return []
+        days, labels = bucket
+        start = bisect.bisect_left(days, day - self._window_days)
+        end = bisect.bisect_right(days, day + self._window_days, start)
+        return labels[start:end]
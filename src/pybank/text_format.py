@@ -0,0 +1,44 @@
+"""Normalization of the texts of transactions, e.g. payees and memos.
+
+The same merchant names repeat in thousands of rows, so the results are cached
+by the raw text and interned. The cost of normalizing a statement then scales
+with the number of distinct texts, not rows, and repeated texts share one
+string in memory. The cache is bounded, so a long backfill can't grow it
+without limit.
+"""
+
+import functools
+import re
+import string
+import sys
+
+
+# The number of distinct texts whose normalized form is cached.
+CACHE_SIZE = 64 * 1024
+
+_WHITESPACE_PATTERN = re.compile(r' +')
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _normalize(text: str) -> str:
+    text = _WHITESPACE_PATTERN.sub(' ', text)
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line.isupper():
+            line = string.capwords(line)
+        lines.append(line)
+    return sys.intern('\n'.join(lines))
+
+
+def normalize_text(text: str | None) -> str | None:
+    """Returns a normalized version of the input text.
+
+    Removes double spaces and "Capitalizes All Words" if they are "ALL CAPS".
+
+    :param text: The input text.
+    :return: A normalized version of the input text.
+    """
+    if text is None:
+        return None
+    return _normalize(text)
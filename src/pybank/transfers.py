@@ -0,0 +1,211 @@
+"""Matching of the two legs of transfers between own accounts.
+
+Both legs of a transfer post to `Assets:Transfers:InTransit`, see
+`docs/accounting.md`. Matching pairs a debit of one account with a credit of
+the same size and currency on another account a few days later. The pairs
+can be linked for audit, and the unmatched legs explain a nonzero clearing
+balance.
+
+`TransferMatcher` partitions the legs by currency and absolute amount, so only
+legs that can match are ever compared. Each partition is swept in date order:
+every debit takes the best free credit within its date window. Adding legs
+only marks their partitions for matching again, so new statements don't
+rematch the whole history.
+"""
+
+import dataclasses
+import datetime
+from typing import Callable, Hashable, Iterable
+
+from . import similarity
+
+
+# How many days a credit may be booked after its debit.
+DEFAULT_MAX_DAYS_AFTER = 5
+# How many days a credit may be booked before its debit, e.g. because the
+# banks use the value date and the booking date.
+DEFAULT_MAX_DAYS_BEFORE = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class Leg:
+    """One side of a possible transfer.
+
+    :param account: The account of the leg.
+    :param date: The date of the leg.
+    :param amount: The amount, negative for debits.
+    :param currency: The currency of the amount.
+    :param label: Identifies the leg, e.g. its import id.
+    :param hints: Accounts the other leg is likely in, e.g. from the memo.
+    """
+
+    account: str
+    date: datetime.date
+    amount: float
+    currency: str
+    label: Hashable
+    hints: frozenset[str] = frozenset()
+
+
+@dataclasses.dataclass(frozen=True)
+class Match:
+    """A matched transfer.
+
+    :param debit: The leg leaving an account.
+    :param credit: The leg arriving in another account.
+    """
+
+    debit: Leg
+    credit: Leg
+
+    @property
+    def days(self) -> int:
+        """The days from the debit to the credit, negative if before."""
+        return (self.credit.date - self.debit.date).days
+
+
+# Ranks the candidate credits of a debit. The lowest rank wins.
+TieBreaker = Callable[[Leg, Leg], tuple]
+
+
+def rank_by_hints_and_days(debit: Leg, credit: Leg) -> tuple:
+    """The default tie-breaker.
+
+    Prefers credits hinted at by the debit or hinting at it, then the fewest
+    days apart, then credits after the debit over ones before it.
+
+    :param debit: The debit.
+    :param credit: A candidate credit.
+    :return: The rank.
+    """
+    hinted = credit.account in debit.hints or debit.account in credit.hints
+    days = (credit.date - debit.date).days
+    return (not hinted, abs(days), days < 0)
+
+
+@dataclasses.dataclass
+class MatchResult:
+    """The result of matching.
+
+    :param matches: The matched transfers, by debit date.
+    :param unmatched: The unmatched legs, by date.
+    """
+
+    matches: list[Match]
+    unmatched: list[Leg]
+
+    def get_clearing_balance(self) -> dict[str, float]:
+        """Returns the balance of the unmatched legs by currency.
+
+        This is the part of the clearing account balance that matching can't
+        explain. Currencies with a zero balance are omitted.
+
+        :return: The balances.
+        """
+        balance: dict[str, int] = {}
+        for leg in self.unmatched:
+            # In hundredths, so that the sum has no rounding errors.
+            key = similarity.get_amount_key(leg.amount)
+            balance[leg.currency] = balance.get(leg.currency, 0) + key
+        return {c: b / 100 for c, b in sorted(balance.items()) if b}
+
+
+class TransferMatcher:
+    """Matches debits and credits of own accounts, incrementally."""
+
+    def __init__(
+        self,
+        max_days_after: int = DEFAULT_MAX_DAYS_AFTER,
+        max_days_before: int = DEFAULT_MAX_DAYS_BEFORE,
+        tie_breaker: TieBreaker = rank_by_hints_and_days,
+    ):
+        """Create a new matcher.
+
+        :param max_days_after: How many days a credit may be after its debit.
+        :param max_days_before: How many days a credit may be before its
+        debit.
+        :param tie_breaker: Ranks the candidate credits of a debit, see
+        `rank_by_hints_and_days`.
+        """
+        self._max_days_after = max_days_after
+        self._max_days_before = max_days_before
+        self._tie_breaker = tie_breaker
+        # Legs by currency and absolute amount in hundredths.
+        self._partitions: dict[tuple[str, int], list[Leg]] = {}
+        self._results: dict[tuple[str, int], MatchResult] = {}
+        self._changed: set[tuple[str, int]] = set()
+
+    def add(self, legs: Iterable[Leg]) -> None:
+        """Adds legs, e.g. of a new statement.
+
+        :param legs: The legs.
+        """
+        for leg in legs:
+            key = (leg.currency, abs(similarity.get_amount_key(leg.amount)))
+            self._partitions.setdefault(key, []).append(leg)
+            self._changed.add(key)
+
+    def match(self) -> MatchResult:
+        """Matches the legs.
+
+        Only the partitions with new legs are matched again.
+
+        :return: The result of all legs.
+        """
+        for key in self._changed:
+            self._results[key] = self._match_partition(self._partitions[key])
+        self._changed.clear()
+        matches = []
+        unmatched = []
+        for result in self._results.values():
+            matches.extend(result.matches)
+            unmatched.extend(result.unmatched)
+        matches.sort(key=lambda m: m.debit.date)
+        unmatched.sort(key=_get_order)
+        return MatchResult(matches, unmatched)
+
+    def _match_partition(self, legs: list[Leg]) -> MatchResult:
+        debits = sorted((leg for leg in legs if leg.amount < 0), key=_get_date)
+        credits = sorted((leg for leg in legs if leg.amount > 0), key=_get_date)
+        if not debits or not credits:
+            return MatchResult([], sorted(legs, key=_get_order))
+
+        before = datetime.timedelta(days=self._max_days_before)
+        after = datetime.timedelta(days=self._max_days_after)
+        matched = [False] * len(credits)
+        matches = []
+        unmatched = [leg for leg in legs if leg.amount == 0]
+        # The first credit not too early for the current debit. It only moves
+        # forward, since the debits are sorted by date.
+        start = 0
+        for debit in debits:
+            first_date = debit.date - before
+            last_date = debit.date + after
+            while start < len(credits) and credits[start].date < first_date:
+                start += 1
+            best = None
+            best_rank = None
+            index = start
+            while index < len(credits) and credits[index].date <= last_date:
+                credit = credits[index]
+                if not matched[index] and credit.account != debit.account:
+                    rank = self._tie_breaker(debit, credit)
+                    if best_rank is None or rank < best_rank:
+                        best, best_rank = index, rank
+                index += 1
+            if best is None:
+                unmatched.append(debit)
+            else:
+                matched[best] = True
+                matches.append(Match(debit, credits[best]))
+        unmatched.extend(c for c, m in zip(credits, matched) if not m)
+        unmatched.sort(key=_get_order)
+        return MatchResult(matches, unmatched)
+
+
+def _get_date(leg: Leg) -> datetime.date:
+    return leg.date
+
+
+def _get_order(leg: Leg) -> tuple[datetime.date, str]:
+    return leg.date, leg.account
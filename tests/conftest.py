@@ -0,0 +1,8 @@
+import os.path
+import sys
+
+
+# The tests of the statement generators import them from the benchmarks.
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), os.pardir, 'benchmarks')
+)
@@ -0,0 +1,24 @@
+"""Statements shared by the tests of several modules."""
+
+DKB_CHECKING_CSV = """\
+"Girokonto";"DE64120300001234567890"
+""
+"Kontostand vom 31.12.2023:";"1.234,56 €"
+""
+"Buchungsdatum";"Wertstellung";"Status";"Zahlungspflichtige*r";"Zahlungsempfänger*in";"Verwendungszweck";"Umsatztyp";"IBAN";"Betrag (€)"
+"29.12.23";"29.12.23";"Gebucht";"Max Muster";"SUPERMARKT GMBH";"Einkauf";"Ausgang";"DE123";"-1.012,34"
+"28.12.23";"28.12.23";"Gebucht";"Arbeitgeber AG";"Max Muster";"Gehalt";"Eingang";"DE456";"2.500,00"
+"""
+
+
+IB_STATEMENT_CSV = """\
+Statement,Header,Field Name,Field Value
+Statement,Data,BrokerName,Interactive Brokers
+Notes,Data,"Multi-line
+note, with a comma"
+Trades,Header,DataDiscriminator,Asset Category,Currency,Symbol,Date/Time,Quantity,T. Price,C. Price,Proceeds,Comm/Fee
+Trades,Data,Order,Stocks,USD,AAPL,"2024-01-02, 10:00:00",10,150,151,-1500,-1
+Dividends,Header,Currency,Date,Description,Amount
+Dividends,Data,USD,2024-02-01,AAPL(US0378331005) Cash Dividend,2.4
+Dividends,Data,Total,,,2.4
+"""
@@ -0,0 +1,71 @@
+import datetime
+import io
+
+import pytest
+
+from pybank import batch
+from pybank import model
+from pybank.importer import ib
+
+from sample_statements import IB_STATEMENT_CSV
+
+
+def _payment(day, amount, memo=None):
+    return model.Payment(
+        date=datetime.datetime(2024, 1, day), amount=amount, memo=memo
+    )
+
+
+def test_transaction_batch():
+    transactions = batch.TransactionBatch()
+    transactions.append(_payment(3, 0.1, 'Coffee'), 'EUR')
+    transactions.append(_payment(1, 0.2, 'Coffee'), 'EUR')
+    transactions.append(_payment(2, -5, 'Fee'), 'USD')
+
+    assert len(transactions) == 3
+    assert transactions[0] == _payment(3, 0.1, 'Coffee')
+    assert transactions.currencies == ['EUR', 'USD']
+    assert transactions.sum() == -4.7
+
+    eur = transactions.filter(currency='EUR')
+    assert eur.sum() == 0.3
+    sorted_eur = eur.sort()
+    assert [t.date.day for t in sorted_eur] == [1, 3]
+    in_range = sorted_eur.filter(
+        start=datetime.datetime(2024, 1, 2), end=datetime.datetime(2024, 1, 4)
+    )
+    assert list(in_range) == [_payment(3, 0.1, 'Coffee')]
+    # Unsorted batches are filtered without a range query.
+    assert len(transactions.filter(end=datetime.datetime(2024, 1, 3))) == 2
+
+    by_currency = transactions.group_by_currency()
+    assert list(by_currency) == ['EUR', 'USD']
+    assert list(by_currency['USD']) == [_payment(2, -5, 'Fee')]
+
+
+def test_ib_import_batch():
+    transactions = ib.InteractiveBrokersImporter().import_batch(
+        io.StringIO(IB_STATEMENT_CSV)
+    )
+    assert transactions.currencies == ['USD']
+    purchase = transactions[0]
+    assert isinstance(purchase, model.InvestmentSecurityPurchase)
+    assert purchase.symbol == 'AAPL'
+    assert purchase.quantity == 10
+    assert purchase.date == datetime.datetime(2024, 1, 2, 10)
+
+
+def test_to_bytes():
+    transactions = ib.InteractiveBrokersImporter().import_batch(
+        io.StringIO(IB_STATEMENT_CSV)
+    )
+    transactions.append(_payment(1, -4.5, 'Café'))
+
+    restored = batch.TransactionBatch.from_bytes(transactions.to_bytes())
+
+    assert list(restored) == list(transactions)
+    assert restored.currencies == transactions.currencies
+    with pytest.raises(ValueError):
+        batch.TransactionBatch.from_bytes(b'garbage')
+    with pytest.raises(ValueError):
+        batch.TransactionBatch.from_bytes(transactions.to_bytes()[:-1])
@@ -0,0 +1,60 @@
+import datetime
+import os
+
+from pybank import batch
+from pybank import cache
+from pybank import model
+
+
+def _batch(count):
+    transactions = batch.TransactionBatch()
+    for i in range(count):
+        transactions.append(
+            model.Payment(
+                date=datetime.datetime(2024, 1, 1), amount=i, memo=str(i)
+            )
+        )
+    return transactions
+
+
+def test_statement_cache(tmp_path):
+    statement = tmp_path / 'statement.csv'
+    statement.write_text('a,b\n1,2\n')
+    statement_cache = cache.StatementCache(str(tmp_path / 'cache'))
+    key = statement_cache.get_key(str(statement), 'dkb-checking', 1)
+
+    assert statement_cache.get(key) is None
+    statement_cache.put(key, _batch(3))
+    assert [t.memo for t in statement_cache.get(key)] == ['0', '1', '2']
+
+    # The key depends on the content, the importer and the currency.
+    assert key != statement_cache.get_key(str(statement), 'dkb-checking', 2)
+    assert key != statement_cache.get_key(str(statement), 'wise', 1)
+    assert key != statement_cache.get_key(
+        str(statement), 'dkb-checking', 1, 'EUR'
+    )
+    statement.write_text('a,b\n1,3\n')
+    assert key != statement_cache.get_key(str(statement), 'dkb-checking', 1)
+
+    # Corrupt entries are misses.
+    (tmp_path / 'cache' / (key + cache.ENTRY_EXTENSION)).write_bytes(b'x')
+    assert statement_cache.get(key) is None
+
+
+def test_statement_cache_evicts_least_recently_used(tmp_path):
+    directory = tmp_path / 'cache'
+    statement_cache = cache.StatementCache(str(directory))
+    for i, key in enumerate(('old', 'used', 'new')):
+        statement_cache.put(key, _batch(1000))
+        os.utime(directory / (key + cache.ENTRY_EXTENSION), (i, i))
+    statement_cache.get('used')
+    entry_size = os.path.getsize(directory / ('new' + cache.ENTRY_EXTENSION))
+
+    statement_cache = cache.StatementCache(
+        str(directory), max_size=2 * entry_size + entry_size // 2
+    )
+    assert statement_cache.evict() == 1
+
+    assert statement_cache.get('old') is None
+    assert statement_cache.get('used') is not None
+    assert statement_cache.get('new') is not None
@@ -0,0 +1,128 @@
+import datetime
+
+import pytest
+
+from pybank import categorize
+from pybank import convert
+from pybank import model
+
+from sample_statements import DKB_CHECKING_CSV
+
+
+RULES = """
+[[rules]]
+category = "Income:Salary"
+exact = "acme corp salary"
+
+[[rules]]
+category = "Expenses:Transport"
+regex = ['^sbb\\b', 'ticket \\d+']
+
+[[rules]]
+category = "Expenses:Living:Groceries"
+contains = ["Migros", "coop"]
+
+[[rules]]
+category = "Expenses:Shopping"
+startswith = "amazon"
+
+[[rules]]
+category = "Expenses:Living:Restaurants"
+contains = "restaurant"
+"""
+
+
+def _categorizer(tmp_path, rules=RULES):
+    filename = tmp_path / 'rules.toml'
+    filename.write_text(rules)
+    return categorize.Categorizer(categorize.load_rules(str(filename)))
+
+
+@pytest.mark.parametrize(
+    'description,category,index',
+    [
+        ('ACME Corp  Salary', 'Income:Salary', 0),
+        ('acme corp salary january', None, None),
+        ('SBB Zürich', 'Expenses:Transport', 1),
+        ('sbbx', None, None),
+        ('Bus Ticket 42', 'Expenses:Transport', 1),
+        ('migros restaurant', 'Expenses:Living:Groceries', 2),
+        ('Restaurant Coop', 'Expenses:Living:Groceries', 2),
+        ('amazon.de coop', 'Expenses:Living:Groceries', 2),
+        ('Amazon.de', 'Expenses:Shopping', 3),
+        ('Restaurant Amazonas', 'Expenses:Living:Restaurants', 4),
+        ('Unknown', None, None),
+    ],
+)
+def test_categorize(tmp_path, description, category, index):
+    categorizer = _categorizer(tmp_path)
+    for _ in range(2):
+        rule = categorizer.categorize(
+            categorize.normalize_description(description)
+        )
+        assert (rule and rule.category) == category
+        assert (rule and rule.index) == index
+
+
+def test_categorize_overlapping_substrings():
+    categorizer = categorize.Categorizer(
+        [
+            categorize.create_rule(categorize.CONTAINS, ['bc'], 'A', 0),
+            categorize.create_rule(categorize.CONTAINS, ['abcd', 'c'], 'B', 1),
+            categorize.create_rule(categorize.CONTAINS, ['abx'], 'C', 2),
+        ]
+    )
+    assert categorizer.categorize('xabcdx').category == 'A'
+    assert categorizer.categorize('abxc').category == 'B'
+    assert categorizer.categorize('abx').category == 'C'
+    assert categorizer.categorize('ab') is None
+
+
+@pytest.mark.parametrize(
+    'rules',
+    [
+        '[[rules]]\ncontains = "x"',
+        '[[rules]]\ncategory = "A"\ncontains = "x"\nexact = "y"',
+        '[[rules]]\ncategory = "A"\ncontains = " "',
+        '[[rules]]\ncategory = "A"\nregex = "(a)"',
+        '[[rules]]\ncategory = "A"\nregex = "(?i)a"',
+        '[[rules]]\ncategory = "A"\nregex = "["',
+        'rules = 1 +',
+    ],
+)
+def test_load_invalid_rules(tmp_path, rules):
+    with pytest.raises(ValueError):
+        _categorizer(tmp_path, rules)
+
+
+def test_filter(tmp_path):
+    categorizer = _categorizer(tmp_path)
+    transactions = [
+        model.Payment(
+            date=datetime.datetime(2024, 1, 1), amount=-5, payee='Migros'
+        ),
+        model.Payment(
+            date=datetime.datetime(2024, 1, 1),
+            amount=-5,
+            payee='Migros',
+            category='Food',
+        ),
+    ]
+    categorized = list(categorizer.filter(transactions))
+    assert [t.category for t in categorized] == [
+        'Expenses:Living:Groceries',
+        'Food',
+    ]
+
+
+def test_convert_rules(tmp_path, capsys):
+    statement = tmp_path / 'dkb.csv'
+    statement.write_text(DKB_CHECKING_CSV)
+    rules = tmp_path / 'rules.toml'
+    rules.write_text('[[rules]]\ncategory = "Test"\nregex = "."\n')
+    args = ['pybank-convert', '-i', 'dkb-checking', '--rules=%s' % rules]
+    assert convert.main(args + [str(statement)]) == 0
+    assert capsys.readouterr().out.count('\nLTest') == 2
+
+    rules.write_text('[[rules]]\n')
+    assert convert.main(args + [str(statement)]) == 2
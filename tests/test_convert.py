@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+from pybank import convert
+from pybank import qif
+
+from sample_statements import DKB_CHECKING_CSV
+
+
+def test_convert_batch(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    statements = tmp_path / 'statements'
+    (statements / '2023').mkdir(parents=True)
+    (statements / '2024').mkdir()
+    (statements / '2023' / 'dkb.csv').write_text(DKB_CHECKING_CSV)
+    (statements / '2024' / 'dkb.csv').write_text(DKB_CHECKING_CSV)
+    (statements / '2024' / 'unknown.csv').write_text('a,b\n1,2\n')
+    output_dir = tmp_path / 'output'
+
+    exit_code = convert.main(
+        ['pybank-convert', '-j', '2', '-o', str(output_dir), str(statements)]
+    )
+
+    # The unknown file fails, but doesn't stop the others.
+    assert exit_code == 1
+    assert 'Supermarkt' in (output_dir / '2023' / 'dkb.qif').read_text()
+    assert 'Supermarkt' in (output_dir / '2024' / 'dkb.qif').read_text()
+    assert not (output_dir / '2024' / 'unknown.qif').exists()
+
+
+def test_convert_batch_inputs(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    statements = tmp_path / 'statements'
+    (statements / '.git').mkdir(parents=True)
+    (statements / 'a.csv').write_text(DKB_CHECKING_CSV)
+    (statements / 'a.txt').write_text(DKB_CHECKING_CSV)
+    (statements / '.a.csv').write_text(DKB_CHECKING_CSV)
+    (statements / '.git' / 'b.csv').write_text(DKB_CHECKING_CSV)
+    # The output of an earlier run, within the inputs.
+    output_dir = statements / 'qif'
+    output_dir.mkdir()
+    (output_dir / 'c.csv').write_text(DKB_CHECKING_CSV)
+    (statements / 'd.qif').write_text('!Type:Bank\n')
+
+    exit_code = convert.main(
+        ['pybank-convert', '-j', '2', '-o', str(output_dir), str(statements)]
+    )
+
+    assert exit_code == 0
+    assert sorted(os.listdir(output_dir)) == ['a.csv.qif', 'a.txt.qif', 'c.csv']
+
+
+def test_convert_batch_file_partial_output(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    statement = tmp_path / 'dkb.csv'
+    statement.write_text(DKB_CHECKING_CSV)
+    output = tmp_path / 'dkb.qif'
+
+    def write_transaction(self, transaction):
+        raise qif.SerializationError('Unknown transaction type.')
+
+    monkeypatch.setattr(qif.Writer, 'write_transaction', write_transaction)
+    with pytest.raises(ValueError):
+        convert._convert_batch_file(
+            'auto', None, False, False, str(statement), str(output)
+        )
+    assert not output.exists()
+
+
+def test_convert_profile_dump(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    statement = tmp_path / 'dkb.csv'
+    statement.write_text(DKB_CHECKING_CSV)
+    prefix = str(tmp_path / 'profile')
+
+    exit_code = convert.main(
+        [
+            'pybank-convert',
+            '-i',
+            'auto',
+            '--profile-dump=%s' % prefix,
+            str(statement),
+        ]
+    )
+
+    assert exit_code == 0
+    assert 'Supermarkt' in capsys.readouterr().out
+    assert (tmp_path / 'profile.prof').exists()
+    assert 'Peak:' in (tmp_path / 'profile.tracemalloc.txt').read_text()
+
+
+def test_convert_cache(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    statement = tmp_path / 'dkb.csv'
+    statement.write_text(DKB_CHECKING_CSV)
+    args = ['pybank-convert', '-i', 'dkb-checking', '--cache', str(statement)]
+
+    assert convert.main(args) == 0
+    imported = capsys.readouterr().out
+    assert convert.main(args) == 0
+    cached = capsys.readouterr().out
+
+    assert 'Supermarkt' in imported
+    assert cached == imported
+    entries = list((tmp_path / 'cache' / 'pybank' / 'statements').iterdir())
+    assert len(entries) == 1
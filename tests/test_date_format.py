@@ -0,0 +1,24 @@
+import datetime
+
+import pytest
+
+from pybank import date_format
+
+
+def test_date_parser():
+    parse_date = date_format.DateParser('%d.%m.%Y', '%d.%m.%y')
+    assert parse_date('29.12.23') == datetime.datetime(2023, 12, 29)
+    assert parse_date('29.12.23') is parse_date('29.12.23')
+    # A file might still mix formats.
+    assert parse_date('01.01.2024') == datetime.datetime(2024, 1, 1)
+    with pytest.raises(ValueError):
+        parse_date('2024-01-01')
+
+
+def test_date_parser_iso():
+    parse_date = date_format.DateParser('%Y-%m-%d %H:%M:%S')
+    assert parse_date('2024-01-31 12:30:00') == datetime.datetime(
+        2024, 1, 31, 12, 30
+    )
+    with pytest.raises(ValueError):
+        parse_date('2024-01-31')
@@ -0,0 +1,46 @@
+import os
+
+from pybank import encoding
+
+
+def test_detect_encoding_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    filename = tmp_path / 'statement.csv'
+    filename.write_bytes('Datum;Empfänger;Betrag\n'.encode('utf-8'))
+
+    detected = encoding.detect_encoding(str(filename))
+    assert 'Empfänger' in filename.read_text(encoding=detected)
+    assert os.listdir(tmp_path / 'cache' / 'pybank' / 'encodings')
+
+    # A cache hit doesn't run the detection again.
+    monkeypatch.setattr(encoding, '_detect_sample', None)
+    assert encoding.detect_encoding(str(filename)) == detected
+
+
+def test_detect_encoding_hint(tmp_path):
+    filename = tmp_path / 'statement.csv'
+    filename.write_bytes(b'')
+    assert (
+        encoding.detect_encoding(str(filename), hint='windows-1252')
+        == 'windows-1252'
+    )
+
+
+def test_detect_encoding_ascii_sample(tmp_path):
+    filename = tmp_path / 'statement.csv'
+    rows = 'Datum;Empfaenger;Betrag\n' * 5000
+    filename.write_bytes((rows + 'Datum;Café Müller;Betrag\n').encode('utf-8'))
+
+    # The sample only has ASCII, but the file is UTF-8.
+    detected = encoding.detect_encoding(str(filename), use_cache=False)
+    assert filename.read_text(encoding=detected).endswith('Müller;Betrag\n')
+
+
+def test_detect_encoding_rest_of_file(tmp_path):
+    filename = tmp_path / 'statement.csv'
+    rows = 'Datum;Empfaenger;Betrag\n' * 5000
+    filename.write_bytes((rows + 'Datum;Café;Betrag\n').encode('cp1252'))
+
+    # The sample only has ASCII, but the file isn't UTF-8.
+    detected = encoding.detect_encoding(str(filename), use_cache=False)
+    assert filename.read_text(encoding=detected).endswith('Café;Betrag\n')
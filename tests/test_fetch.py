@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from pybank import fetch
+from pybank import model
+
+
+class FakeBank:
+    # Each bank waits for the other, so the test hangs unless both run at the
+    # same time.
+    barrier = None
+
+    def __init__(self, debug=False):
+        self.logged_out = False
+
+    def login(self, username=None, password=None, statements=None):
+        self.username = username
+
+    def logout(self):
+        self.logged_out = True
+
+    def get_accounts(self):
+        self.barrier.wait()
+        return [model.CheckingAccount(name='%s-checking' % self.username)]
+
+    def get_transactions(self, account, start, end):
+        return (model.Payment(date=start, amount=-12.5, payee='Supermarkt'),)
+
+
+class FailingBank(FakeBank):
+    instances = None
+
+    def __init__(self, debug=False):
+        super().__init__(debug)
+        self.instances.append(self)
+
+    def get_accounts(self):
+        raise RuntimeError('Login failed')
+
+
+def test_fetch_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        fetch, 'BANK_BY_NAME', {'fake': FakeBank, 'failing': FailingBank}
+    )
+    monkeypatch.setattr(FakeBank, 'barrier', threading.Barrier(2, timeout=10))
+    monkeypatch.setattr(FailingBank, 'instances', [])
+    monkeypatch.setattr('builtins.input', lambda text: 'n')
+    config = tmp_path / 'banks.toml'
+    config.write_text(
+        '[[banks]]\n'
+        'bank = "fake"\n'
+        'username = "alice"\n'
+        '[[banks]]\n'
+        'bank = "fake"\n'
+        'name = "fake-bob"\n'
+        'username = "bob"\n'
+        '[[banks]]\n'
+        'bank = "failing"\n'
+    )
+    # Slashes in output filenames are replaced, so relative to the cwd.
+    monkeypatch.chdir(tmp_path)
+    outfile = '%(account)s.qif'
+
+    exit_code = fetch.main(
+        ['pybank-fetch', '-c', str(config), '-f', '2024-01-01', '-o', outfile]
+    )
+
+    # The failing bank doesn't stop the others, and its session is closed.
+    assert exit_code == 1
+    assert [bank.logged_out for bank in FailingBank.instances] == [True]
+    for name in ('alice', 'bob'):
+        output = (tmp_path / ('%s-checking.qif' % name)).read_text()
+        assert 'Supermarkt' in output
+        assert '-12.5' in output
+
+
+def test_load_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, 'BANK_BY_NAME', {'fake': FakeBank})
+    config = tmp_path / 'banks.toml'
+    config.write_text(
+        '[[banks]]\n'
+        'bank = "fake"\n'
+        'accounts = ["1234"]\n'
+        'statements = "statements/*.csv"\n'
+        'outfile = "fake.qif"\n'
+    )
+
+    assert fetch.load_config(str(config)) == [
+        fetch.Job(
+            name='fake',
+            bank_name='fake',
+            accounts=('1234',),
+            statements=('statements/*.csv',),
+            output_filename='fake.qif',
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    'config',
+    [
+        '',
+        '[[banks]]\nbank = "unknown"\n',
+        '[[banks]]\nbank = "fake"\n[[banks]]\nbank = "fake"\n',
+        '[[banks]\n',
+        '[[banks]]\nbank = "fake"\naccounts = 1234\n',
+        '[[banks]]\nbank = "fake"\nstatements = ["a.csv", 1]\n',
+        '[[banks]]\nbank = "fake"\nusername = ["me"]\n',
+    ],
+)
+def test_load_config_invalid(config, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, 'BANK_BY_NAME', {'fake': FakeBank})
+    filename = tmp_path / 'banks.toml'
+    filename.write_text(config)
+
+    with pytest.raises(ValueError):
+        fetch.load_config(str(filename))
+
+
+def test_config_replaces_bank_options(capsys):
+    assert fetch.main(['pybank-fetch', '-c', 'banks.toml', '-b', 'dkb']) == 2
+    assert 'in the config' in capsys.readouterr().err
@@ -0,0 +1,119 @@
+import datetime
+
+import pytest
+
+from pybank import convert
+from pybank import import_id
+from pybank import model
+
+from sample_statements import DKB_CHECKING_CSV
+
+
+def _payment(day, memo, amount=-1):
+    return model.Payment(
+        date=datetime.datetime(2024, 1, day), amount=amount, memo=memo
+    )
+
+
+def test_compute_ids():
+    ids = import_id.compute_ids(
+        [
+            _payment(3, 'Coffee'),
+            _payment(3, '  COFFEE '),
+            _payment(3, 'Coffee', amount=-2),
+        ]
+    )
+    version, key_hash, occurrence = ids[0].split(':')
+    assert version == import_id.CURRENT_VERSION
+    assert len(key_hash) == import_id.HASH_LENGTH
+    assert occurrence == '0'
+    # The normalized fields are identical, so only the occurrence differs.
+    assert ids[1] == ids[0][:-1] + '1'
+    assert ids[2].split(':')[1] != key_hash
+
+    # The ids don't depend on other transactions of the statement.
+    assert import_id.compute_ids([_payment(3, 'Coffee')]) == ids[:1]
+
+    with pytest.raises(ValueError):
+        import_id.IdGenerator('v0')
+
+
+def test_index(tmp_path):
+    filename = str(tmp_path / 'seen.sqlite')
+    ids = ['v1:%016x:0' % i for i in range(1200)]
+    with import_id.ImportIdIndex(filename) as index:
+        index.add('checking', ids[:1000])
+        index.add('checking', ids[:10])
+    with import_id.ImportIdIndex(filename) as index:
+        assert index.contains('checking', ids[0])
+        assert not index.contains('checking', ids[1000])
+        assert not index.contains('savings', ids[0])
+        assert index.find_known('checking', ids) == set(ids[:1000])
+        assert index.find_known('savings', ids) == set()
+
+
+def test_seen_filter():
+    january = [_payment(1, 'Rent'), _payment(3, 'Coffee')]
+    rolling = [
+        _payment(1, 'Rent'),
+        _payment(3, 'Coffee'),
+        _payment(3, 'Coffee'),
+        _payment(4, 'Groceries'),
+    ]
+    with import_id.ImportIdIndex(':memory:') as index:
+        seen_filter = import_id.SeenFilter(index, 'checking')
+        assert list(seen_filter.filter(january)) == january
+        seen_filter.commit()
+
+        seen_filter = import_id.SeenFilter(index, 'checking')
+        assert list(seen_filter.filter(rolling)) == rolling[2:]
+        assert seen_filter.skipped == 2
+        # Not committed, e.g. because writing failed.
+        seen_filter = import_id.SeenFilter(index, 'checking')
+        assert list(seen_filter.filter(rolling)) == rolling[2:]
+
+        seen_filter = import_id.SeenFilter(index, 'savings')
+        assert list(seen_filter.filter(january)) == january
+
+
+def test_convert_seen_index(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    statement = tmp_path / 'dkb.csv'
+    statement.write_text(DKB_CHECKING_CSV)
+    args = [
+        'pybank-convert',
+        '-i',
+        'dkb-checking',
+        '--seen-index=%s' % (tmp_path / 'seen.sqlite'),
+        str(statement),
+    ]
+    assert convert.main(args) == 0
+    assert capsys.readouterr().out.count('\n^') == 2
+    assert convert.main(args) == 0
+    assert capsys.readouterr().out.count('\n^') == 0
+    # Another account with the same importer.
+    assert convert.main(args[:-1] + ['--source=other', str(statement)]) == 0
+    assert capsys.readouterr().out.count('\n^') == 2
+
+
+def test_seen_filter_similar():
+    january = [_payment(1, 'Rent', amount=-900), _payment(3, 'Fee')]
+    # Re-issued with enriched descriptions.
+    reissued = [_payment(1, 'Rent January', amount=-900), _payment(9, 'Fee')]
+    with import_id.ImportIdIndex(':memory:') as index:
+        seen_filter = import_id.SeenFilter(index, 'checking')
+        assert list(seen_filter.filter(january + january[1:])) == (
+            january + january[1:]
+        )
+        # Identical rows of a statement aren't similar.
+        assert seen_filter.similar == []
+        seen_filter.commit()
+        january_ids = import_id.compute_ids(january)
+
+        seen_filter = import_id.SeenFilter(index, 'checking', window_days=3)
+        assert list(seen_filter.filter(reissued)) == reissued
+        assert seen_filter.similar == [(reissued[0], january_ids[:1])]
+
+        seen_filter = import_id.SeenFilter(index, 'savings')
+        list(seen_filter.filter(reissued))
+        assert seen_filter.similar == []
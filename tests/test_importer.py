@@ -0,0 +1,157 @@
+import datetime
+import io
+
+import pydantic
+import pytest
+
+from pybank import importer
+from pybank import model
+from pybank.importer import auto
+from pybank.importer import dkb
+from pybank.importer import ib
+from pybank.importer import postfinance
+from pybank.importer import revolut
+from pybank.importer import schwab
+from pybank.importer import wise
+
+from sample_statements import DKB_CHECKING_CSV, IB_STATEMENT_CSV
+
+
+def test_iter_csv_with_header():
+    metadata, rows = importer.iter_csv_with_header(
+        io.StringIO(DKB_CHECKING_CSV)
+    )
+    assert metadata == {
+        'Girokonto': 'DE64120300001234567890',
+        'Kontostand vom 31.12.2023:': '1.234,56 €',
+    }
+    first = next(rows)
+    assert first['Betrag (€)'] == '-1.012,34'
+    assert [row['Verwendungszweck'] for row in rows] == ['Gehalt']
+
+
+def test_dkb_iter_transactions():
+    transactions = dkb.DkbCheckingImporter().iter_transactions(
+        io.StringIO(DKB_CHECKING_CSV)
+    )
+    first = next(transactions)
+    assert first.amount == -1012.34
+    assert first.payee == 'Supermarkt Gmbh'
+    assert [t.amount for t in transactions] == [2500]
+
+
+def test_strict_import():
+    trusted = dkb.DkbCheckingImporter().import_transactions(
+        io.StringIO(DKB_CHECKING_CSV)
+    )
+    strict = dkb.DkbCheckingImporter(strict=True).import_transactions(
+        io.StringIO(DKB_CHECKING_CSV)
+    )
+    assert trusted == strict
+
+    with pytest.raises(pydantic.ValidationError):
+        dkb.DkbCheckingImporter(strict=True)._create(
+            model.Payment, date='yesterday', amount=1
+        )
+    # Even trusted importers don't create transactions without an amount.
+    with pytest.raises(pydantic.ValidationError):
+        dkb.DkbCheckingImporter()._create(
+            model.Payment, date=datetime.datetime(2024, 1, 3), amount=None
+        )
+
+
+def test_read_prefix():
+    file = io.StringIO('a;b\n' * 10000)
+    prefix = importer.read_prefix(file, size=10)
+    assert prefix == 'a;b\na;b\n'
+    assert file.tell() == 0
+
+
+@pytest.mark.parametrize(
+    'content,importer_class',
+    [
+        (DKB_CHECKING_CSV, dkb.DkbCheckingImporter),
+        (
+            'Konto:;CH1234\nWährung:;CHF\n\n'
+            'Datum;Buchungsdetails;Gutschrift in CHF;Lastschrift in CHF\n',
+            postfinance.PostFinanceCheckingImporter,
+        ),
+        (
+            'Statement,Header,Field Name,Field Value\n'
+            'Statement,Data,BrokerName,Interactive Brokers\n',
+            ib.InteractiveBrokersImporter,
+        ),
+        (
+            '"TransferWise ID",Date,Amount,Currency,Description\n',
+            wise.WiseImporter,
+        ),
+        (
+            'Type,Product,Started Date,Completed Date,Description,Amount,Fee,'
+            'Currency,State,Balance\n',
+            revolut.RevolutImporter,
+        ),
+        (
+            '"Transactions  for account XXXX-1234 as of 01/31/2024"\n'
+            '"Date","Action","Symbol","Description","Quantity","Price",'
+            '"Fees & Comm","Amount",\n',
+            schwab.SchwabBrokerageImporter,
+        ),
+    ],
+)
+def test_auto_detect(content, importer_class):
+    detected = auto.AutoImporter()._detect(io.StringIO(content))
+    assert type(detected) is importer_class
+
+
+def test_auto_detect_unknown():
+    assert not auto.AutoImporter().can_import(io.StringIO('a,b,c\n1,2,3\n'))
+
+
+def test_auto_get_encoding(tmp_path):
+    postfinance_csv = tmp_path / 'postfinance.csv'
+    postfinance_csv.write_bytes(
+        'Konto:;CH1234\nWährung:;CHF\n\n'
+        'Datum;Buchungsdetails;Gutschrift in CHF;Lastschrift in CHF\n'
+        '2024-01-03;Café;;12.50\n'.encode('windows-1252')
+    )
+    dkb_csv = tmp_path / 'dkb.csv'
+    dkb_csv.write_text(DKB_CHECKING_CSV, encoding='utf-8')
+
+    # The encoding of the detected format, as with `-i postfinance-checking`.
+    assert auto.AutoImporter.get_encoding(str(postfinance_csv)) == (
+        'windows-1252'
+    )
+    assert auto.AutoImporter.get_encoding(str(dkb_csv)) is None
+
+
+def test_ib_statement_index():
+    index = ib.StatementIndex(io.StringIO(IB_STATEMENT_CSV))
+    assert index['Trades']['Data']['Order']['Stocks']['__rows'] == [
+        [
+            'USD',
+            'AAPL',
+            '2024-01-02, 10:00:00',
+            '10',
+            '150',
+            '151',
+            '-1500',
+            '-1',
+        ]
+    ]
+    assert index['Trades']['Data']['Order']['Forex'].get('__rows', []) == []
+    assert index['Notes']['Data']['__rows'] == [
+        ['Multi-line\nnote, with a comma']
+    ]
+    assert 'Fees' not in index
+    assert index['Fees']['Data']['Other Fees']['__rows'] == []
+
+
+def test_ib_import():
+    transactions = ib.InteractiveBrokersImporter().import_transactions(
+        io.StringIO(IB_STATEMENT_CSV), 'USD'
+    )
+    assert [type(t) for t in transactions] == [
+        model.InvestmentSecurityPurchase,
+        model.InvestmentDividend,
+    ]
+    assert transactions[0].amount == -1501
@@ -0,0 +1,156 @@
+import datetime
+
+import pytest
+
+from pybank import convert
+from pybank import incremental
+from pybank import model
+
+from sample_statements import DKB_CHECKING_CSV
+
+
+def _payment(day, memo):
+    return model.Payment(
+        date=datetime.datetime(2024, 1, day), amount=-1, memo=memo
+    )
+
+
+def test_mark_filter():
+    january = [_payment(1, 'Rent'), _payment(3, 'Coffee')]
+    mark_filter = incremental.MarkFilter()
+    assert list(mark_filter.filter(january)) == january
+    mark = mark_filter.mark
+    assert mark.date == datetime.datetime(2024, 1, 3)
+    assert mark.occurrences == 1
+
+    # The next export overlaps and has a second coffee on the 3rd.
+    rolling = [
+        _payment(3, 'Coffee'),
+        _payment(3, 'Coffee'),
+        _payment(4, 'Groceries'),
+        _payment(1, 'Rent'),
+    ]
+    mark_filter = incremental.MarkFilter(mark)
+    assert list(mark_filter.filter(rolling)) == rolling[1:3]
+    assert mark_filter.skipped == 2
+    assert mark_filter.mark.date == datetime.datetime(2024, 1, 4)
+    assert mark_filter.mark.occurrences == 1
+
+    # An older export doesn't move the mark back.
+    mark_filter = incremental.MarkFilter(mark)
+    assert list(mark_filter.filter(january[:1])) == []
+    assert mark_filter.mark == mark
+
+
+def test_mark_filter_newest_first():
+    # DKB and PostFinance list the newest transactions first.
+    first = [_payment(3, 'Bakery'), _payment(3, 'Coffee')]
+    mark_filter = incremental.MarkFilter()
+    assert list(mark_filter.filter(first)) == first
+    mark = mark_filter.mark
+    assert mark.occurrences == 2
+
+    second = [_payment(3, 'Lunch')] + first
+    mark_filter = incremental.MarkFilter(mark)
+    assert list(mark_filter.filter(second)) == second[:1]
+    assert mark_filter.mark.occurrences == 3
+
+    # Marks of version 1 state files only count the rows on their date. They
+    # are skipped from the oldest end.
+    old_mark = incremental.HighWaterMark(mark.date, 2)
+    second.append(_payment(2, 'Rent'))
+    mark_filter = incremental.MarkFilter(old_mark)
+    assert list(mark_filter.filter(second)) == second[:1]
+
+
+def test_mark_filter_reads_lazily():
+    read = []
+
+    def statement(transactions):
+        for transaction in transactions:
+            read.append(transaction)
+            yield transaction
+
+    mark = incremental.HighWaterMark(
+        datetime.datetime(2024, 1, 3), 1, frozenset({'unknown'})
+    )
+    newest_first = [_payment(d, 'Coffee') for d in (5, 4, 3, 2, 1)]
+    mark_filter = incremental.MarkFilter(mark)
+    transactions = mark_filter.filter(statement(newest_first))
+    assert next(transactions) == newest_first[0]
+    assert read == newest_first[:1]
+
+    # The rows after the first one before the mark are older still.
+    assert list(transactions) == newest_first[1:3]
+    assert read == newest_first[:4]
+    assert mark_filter.stopped
+
+    # Oldest-first statements are read to the end.
+    read.clear()
+    mark_filter = incremental.MarkFilter(mark)
+    oldest_first = newest_first[::-1]
+    assert list(mark_filter.filter(statement(oldest_first))) == oldest_first[2:]
+    assert read == oldest_first
+    assert not mark_filter.stopped
+
+
+def test_load_and_save_marks(tmp_path):
+    filename = str(tmp_path / 'state.json')
+    assert incremental.load_marks(filename) == {}
+    marks = {
+        'dkb-checking': incremental.HighWaterMark(
+            datetime.datetime(2024, 1, 3), 2, frozenset({'v1:00:0', 'v1:01:0'})
+        )
+    }
+    incremental.save_marks(filename, marks)
+    assert incremental.load_marks(filename) == marks
+
+    # Version 1 state files have no ids.
+    (tmp_path / 'state.json').write_text(
+        '{"version": 1, "sources": {"dkb-checking": '
+        '{"date": "2024-01-03T00:00:00", "occurrences": 2}}}'
+    )
+    assert incremental.load_marks(filename) == {
+        'dkb-checking': incremental.HighWaterMark(
+            datetime.datetime(2024, 1, 3), 2
+        )
+    }
+
+    (tmp_path / 'state.json').write_text('[]')
+    with pytest.raises(ValueError):
+        incremental.load_marks(filename)
+
+
+def test_convert_incremental(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    statement = tmp_path / 'dkb.csv'
+    state = tmp_path / 'state.json'
+    args = [
+        'pybank-convert',
+        '-i',
+        'dkb-checking',
+        '--incremental=%s' % state,
+        str(statement),
+    ]
+
+    statement.write_text(DKB_CHECKING_CSV)
+    assert convert.main(args) == 0
+    assert capsys.readouterr().out.count('\n^') == 2
+    assert convert.main(args) == 0
+    assert capsys.readouterr().out.count('\n^') == 0
+
+    header, rows = DKB_CHECKING_CSV.split('"Betrag (€)"\n')
+    new_row = rows.splitlines()[0].replace('29.12.23', '30.12.23')
+    statement.write_text(header + '"Betrag (€)"\n' + new_row + '\n' + rows)
+    assert convert.main(args) == 0
+    output = capsys.readouterr().out
+    assert output.count('\n^') == 1
+    assert 'D12/30/23' in output
+
+    # Rows older than the mark aren't even parsed.
+    invalid_row = '"invalid";"row"\n'
+    statement.write_text(
+        header + '"Betrag (€)"\n' + new_row + '\n' + rows + invalid_row
+    )
+    assert convert.main(args) == 0
+    assert capsys.readouterr().out.count('\n^') == 0
@@ -0,0 +1,106 @@
+import io
+import json
+
+from pybank import importer
+from pybank import metrics
+from pybank import profiling
+from pybank.importer import auto
+from pybank.importer import dkb
+from pybank.importer import revolut
+
+REVOLUT_CSV = """\
+Type,Product,Started Date,Completed Date,Description,Amount,Fee,Currency,State,Balance
+CARD_PAYMENT,Current,2024-01-02 10:00:00,2024-01-03 10:00:00,Bakery,-4.50,0.00,EUR,COMPLETED,95.50
+CARD_PAYMENT,Current,2024-01-04 10:00:00,2024-01-05 10:00:00,Shop,-10.00,0.00,GBP,COMPLETED,90.00
+TOPUP,Current
+"""
+
+
+def test_importer_metrics():
+    sink = metrics.MemorySink()
+    transactions = revolut.RevolutImporter(
+        metrics_sink=sink
+    ).import_transactions(io.StringIO(REVOLUT_CSV), 'EUR')
+
+    assert len(transactions) == 1
+    [record] = sink.records
+    assert record.importer == 'RevolutImporter'
+    assert record.rows_read == 4
+    assert record.bytes_read == len(REVOLUT_CSV)
+    assert record.transactions == 1
+    assert record.skipped == {
+        importer.SKIP_OTHER_CURRENCY: 1,
+        importer.SKIP_SHORT_ROW: 1,
+    }
+    assert record.parse_failures == 0
+    assert profiling.PARSING in record.phase_times
+    assert record.timestamp > 0
+
+
+def test_importer_metrics_rows():
+    # A memo spanning two lines and an empty row.
+    dkb_csv = (
+        '"Girokonto";"DE64120300001234567890"\n'
+        '"Buchungsdatum";"Status";"Verwendungszweck";"Betrag (€)"\n'
+        '"29.12.23";"Gebucht";"Einkauf\nim Supermarkt";"-1.012,34"\n'
+        '\n'
+        '"28.12.23";"Gebucht";"Gehalt";"2.500,00"\n'
+    )
+    sink = metrics.MemorySink()
+    dkb.DkbCheckingImporter(metrics_sink=sink).import_transactions(
+        io.StringIO(dkb_csv)
+    )
+
+    [record] = sink.records
+    assert record.rows_read == 5
+    assert record.transactions == 2
+    assert record.skipped == {importer.SKIP_SHORT_ROW: 1}
+
+
+def test_auto_importer_metrics():
+    sink = metrics.MemorySink()
+    auto.AutoImporter(metrics_sink=sink).import_transactions(
+        io.StringIO(REVOLUT_CSV)
+    )
+
+    [record] = sink.records
+    assert record.importer == 'RevolutImporter'
+    assert record.transactions == 2
+    assert profiling.FORMAT_DETECTION in record.phase_times
+
+
+def test_sinks(tmp_path):
+    records = [
+        metrics.ImportMetrics(
+            importer='DkbCheckingImporter', rows_read=10, transactions=8
+        ),
+        metrics.ImportMetrics(
+            importer='DkbCheckingImporter', rows_read=5, parse_failures=1
+        ),
+    ]
+    records[0].skip(importer.SKIP_TOTAL_ROW)
+
+    json_filename = str(tmp_path / 'metrics.jsonl')
+    prom_filename = str(tmp_path / 'metrics.prom')
+    for filename in (json_filename, prom_filename):
+        sink = metrics.open_sink(filename)
+        for record in records:
+            sink.emit(record)
+        sink.close()
+
+    with open(json_filename) as file:
+        lines = [json.loads(line) for line in file]
+    assert [line['rows_read'] for line in lines] == [10, 5]
+
+    with open(prom_filename) as file:
+        prom = file.read().splitlines()
+    assert '# TYPE pybank_import_rows_read_total counter' in prom
+    assert (
+        'pybank_import_rows_read_total{importer="DkbCheckingImporter"} 15'
+        in prom
+    )
+    assert (
+        'pybank_import_rows_skipped_total'
+        '{importer="DkbCheckingImporter",reason="total row"} 1' in prom
+    )
+    assert not [p for p in tmp_path.iterdir() if p.suffix == '.tmp']
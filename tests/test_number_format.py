@@ -0,0 +1,18 @@
+import pytest
+
+from pybank import number_format
+
+
+def test_parse_decimal_number():
+    assert number_format.parse_decimal_number('-1.234,56', 'de_DE') == -1234.56
+    assert number_format.parse_decimal_number("1'234.56", 'de_CH') == 1234.56
+    assert number_format.parse_decimal_number('1’234.5', 'de_CH') == 1234.5
+    assert number_format.parse_decimal_number('1,234.56', 'en_US') == 1234.56
+    assert number_format.parse_decimal_number('-0.5', 'en_GB') == -0.5
+
+
+def test_parse_decimal_number_invalid():
+    with pytest.raises(ValueError):
+        number_format.parse_decimal_number('1,2,3', 'de_DE')
+    with pytest.raises(ValueError):
+        number_format.parse_decimal_number('1', 'xx_XX')
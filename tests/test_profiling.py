@@ -0,0 +1,24 @@
+from pybank import profiling
+
+
+def test_profiler_nested_stages():
+    profiler = profiling.Profiler()
+    items = profiler.iterate(profiling.PARSING, iter(range(3)))
+    for _ in items:
+        with profiler.stage(profiling.SERIALIZATION):
+            pass
+    with profiler.stage(profiling.PARSING):
+        with profiler.stage(profiling.MODEL_CONSTRUCTION):
+            pass
+
+    stats = profiler.get_stats()
+    assert list(stats) == [
+        profiling.PARSING,
+        profiling.SERIALIZATION,
+        profiling.MODEL_CONSTRUCTION,
+    ]
+    # Three items, the end of the iteration and the explicit stage.
+    assert stats[profiling.PARSING][2] == 5
+    assert stats[profiling.SERIALIZATION][2] == 3
+    assert all(wall >= 0 and cpu >= 0 for wall, cpu, calls in stats.values())
+    assert 'model construction' in profiling.format_stats(stats)
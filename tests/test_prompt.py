@@ -0,0 +1,43 @@
+import threading
+
+from pybank import prompt
+
+
+def test_ask_serializes_prompts(monkeypatch):
+    active = []
+    overlaps = []
+
+    def fake_input(text):
+        active.append(text)
+        overlaps.append(len(active) > 1)
+        threading.Event().wait(0.01)
+        active.remove(text)
+        return 'y'
+
+    monkeypatch.setattr('builtins.input', fake_input)
+    prompts = []
+    threads = [
+        threading.Thread(
+            target=lambda: prompts.append(prompt.ask('Token: ')),
+            name='bank-%i' % i,
+        )
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert prompts == ['y'] * 4
+    assert overlaps == [False] * 4
+
+
+def test_ask_prefixes_thread_name(monkeypatch):
+    texts = []
+    monkeypatch.setattr('builtins.input', lambda text: texts.append(text))
+    thread = threading.Thread(target=prompt.ask, args=('PIN: ',), name='dkb')
+    thread.start()
+    thread.join()
+    prompt.ask('Logout? ')
+
+    assert texts == ['[dkb] PIN: ', 'Logout? ']
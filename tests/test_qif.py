@@ -1,4 +1,5 @@
 import datetime
+import io
 
 from pybank import model
 from pybank import qif
@@ -34,3 +35,24 @@ def test_serialize_account():
 
     account = model.Account(name='Test', transactions=transactions)
     assert 'Memo1' in qif.serialize_account(account)
+
+
+def test_writer():
+    date = datetime.datetime(2024, 1, 31)
+    accounts = [
+        model.Account(
+            name='Test%i' % i,
+            transactions=[
+                model.Payment(date=date, amount=i, memo='Memo%i' % i)
+            ],
+        )
+        for i in range(2)
+    ]
+    output = io.StringIO()
+    with qif.Writer(output, buffer_size=10) as writer:
+        for account in accounts:
+            writer.write_account(account)
+
+    assert output.getvalue() == ''.join(
+        qif.serialize_account(account) + '\n' for account in accounts
+    )
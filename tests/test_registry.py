@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import pytest
+
+from pybank import convert
+from pybank import fetch
+from pybank import registry
+
+
+def test_registry_loads_on_access():
+    assert 'dkb-checking' in registry.IMPORTERS
+    assert 'unknown' not in registry.IMPORTERS
+    assert {'auto', 'wise'} <= set(registry.IMPORTERS)
+    assert registry.IMPORTERS['wise'].__name__ == 'WiseImporter'
+    with pytest.raises(KeyError):
+        registry.IMPORTERS['unknown']
+
+
+@pytest.mark.parametrize('module', ['pybank.convert', 'pybank.fetch'])
+def test_startup_skips_heavy_modules(module):
+    # In a fresh process, as other tests have imported everything already.
+    code = (
+        'import sys, %s; '
+        "print(' '.join(m for m in ('charset_normalizer', 'pydantic', "
+        "'selenium') if m in sys.modules))" % module
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == ''
+
+
+@pytest.mark.parametrize('main', [convert.main, fetch.main])
+def test_help(main, capsys):
+    assert main(['pybank', '--help']) == 0
+    assert 'Usage:' in capsys.readouterr().out
@@ -0,0 +1,22 @@
+import datetime
+
+from pybank import similarity
+
+
+def test_similarity_index():
+    index = similarity.SimilarityIndex(window_days=3)
+    day = similarity.get_day(datetime.date(2024, 1, 10))
+    fee = similarity.get_amount_key(-4.9)
+    assert fee == -490
+    # Out of date order.
+    for offset, label in ((0, 'a'), (5, 'b'), (-4, 'c'), (3, 'd'), (-3, 'e')):
+        index.add('checking', fee, day + offset, label)
+    index.add('savings', fee, day, 'f')
+    index.add('checking', fee + 1, day, 'g')
+    assert len(index) == 7
+
+    assert index.find_similar('checking', fee, day) == ['e', 'a', 'd']
+    assert index.find_similar('checking', fee, day + 8) == ['b']
+    assert index.find_similar('checking', fee, day + 9) == []
+    assert index.find_similar('savings', fee, day - 3) == ['f']
+    assert index.find_similar('other', fee, day) == []
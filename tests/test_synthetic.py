@@ -0,0 +1,22 @@
+import io
+
+import pytest
+import synthetic
+
+from pybank import convert
+
+
+@pytest.mark.parametrize('format_name', list(synthetic.FORMATS))
+def test_synthetic_import(format_name):
+    importer_name = synthetic.FORMATS[format_name][2]
+    importer = convert.IMPORTER_BY_NAME[importer_name]()
+    file = io.StringIO(''.join(synthetic.generate(format_name, 100)))
+
+    transactions = importer.import_batch(file)
+
+    # IB statements spread the rows over several currencies and expand forex
+    # trades into several transactions.
+    if importer_name == 'interactive-brokers':
+        assert len(transactions) >= 100
+    else:
+        assert len(transactions) == 100
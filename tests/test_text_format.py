@@ -0,0 +1,15 @@
+from pybank import text_format
+
+
+def test_normalize_text():
+    assert text_format.normalize_text(None) is None
+    assert text_format.normalize_text('  a   b ') == 'a b'
+    assert (
+        text_format.normalize_text('SUPERMARKT  GMBH\n Einkauf ')
+        == 'Supermarkt Gmbh\nEinkauf'
+    )
+    # Cached and interned, so repeated texts share one string.
+    raw = ''.join(['MAX ', ' MUSTER'])
+    assert text_format.normalize_text(raw) is text_format.normalize_text(
+        ''.join(['MAX ', ' MUSTER'])
+    )
@@ -0,0 +1,93 @@
+import datetime
+import random
+
+from pybank import transfers
+
+
+def _leg(account, day, amount, currency='CHF', hints=()):
+    return transfers.Leg(
+        account=account,
+        date=datetime.date(2024, 1, day),
+        amount=amount,
+        currency=currency,
+        label='%s:%i:%s' % (account, day, amount),
+        hints=frozenset(hints),
+    )
+
+
+def test_match():
+    to_broker = _leg('postfinance', 20, -1000)
+    at_broker = _leg('ib', 22, 1000)
+    # Same amount, but too late or in another currency.
+    late = _leg('dkb', 28, 1000)
+    euros = _leg('dkb', 21, 1000, currency='EUR')
+    # Within the same account isn't a transfer.
+    refund = _leg('postfinance', 21, 1000)
+    matcher = transfers.TransferMatcher()
+    matcher.add([to_broker, at_broker, late, euros, refund])
+    result = matcher.match()
+    assert result.matches == [transfers.Match(to_broker, at_broker)]
+    assert result.matches[0].days == 2
+    assert result.unmatched == [euros, refund, late]
+    assert result.get_clearing_balance() == {'CHF': 2000, 'EUR': 1000}
+
+
+def test_match_tie_breaking():
+    debit = _leg('postfinance', 10, -500, hints=['wise'])
+    revolut = _leg('revolut', 10, 500)
+    wise = _leg('wise', 12, 500)
+    early = _leg('dkb', 9, 500)
+
+    matcher = transfers.TransferMatcher()
+    matcher.add([debit, revolut, wise, early])
+    assert matcher.match().matches == [transfers.Match(debit, wise)]
+
+    # Without hints, the closest date wins.
+    matcher = transfers.TransferMatcher(
+        tie_breaker=lambda d, c: (abs((c.date - d.date).days),)
+    )
+    matcher.add([debit, wise, early, revolut])
+    assert matcher.match().matches == [transfers.Match(debit, revolut)]
+
+    # Credits before the debit are outside a zero window.
+    matcher = transfers.TransferMatcher(max_days_before=0, max_days_after=0)
+    matcher.add([debit, early])
+    assert matcher.match().matches == []
+
+
+def test_match_incrementally():
+    matcher = transfers.TransferMatcher()
+    debit = _leg('postfinance', 30, -250.1)
+    matcher.add([debit, _leg('postfinance', 2, -40)])
+    result = matcher.match()
+    assert result.matches == []
+    assert result.get_clearing_balance() == {'CHF': -290.1}
+
+    # The next statement of the other account.
+    credit = _leg('dkb', 31, 250.1)
+    matcher.add([credit])
+    result = matcher.match()
+    assert result.matches == [transfers.Match(debit, credit)]
+    assert result.get_clearing_balance() == {'CHF': -40}
+
+
+def test_match_history():
+    # 15 years of 5 accounts, with several transfers a day.
+    rng = random.Random(0)
+    accounts = ['postfinance', 'dkb', 'ib', 'wise', 'revolut']
+    start = datetime.date(2010, 1, 1)
+    legs = []
+    for day in range(15 * 365):
+        for _ in range(3):
+            amount = rng.randrange(1, 10**6) / 100
+            source, target = rng.sample(accounts, 2)
+            date = start + datetime.timedelta(days=day)
+            legs.append(transfers.Leg(source, date, -amount, 'CHF', None))
+            if rng.random() < 0.95:
+                date += datetime.timedelta(days=rng.randrange(4))
+                legs.append(transfers.Leg(target, date, amount, 'CHF', None))
+    matcher = transfers.TransferMatcher()
+    matcher.add(legs)
+    result = matcher.match()
+    assert 2 * len(result.matches) + len(result.unmatched) == len(legs)
+    assert len(result.unmatched) < 0.1 * len(legs)